@@ -0,0 +1,177 @@
+"""
+Volume fades for Spotify Ad Silencer
+Ramps volumes along a curve on a timer thread, so muting, unmuting and the
+replacement audio fade in and out without blocking the main loop
+
+Enable with SPOTIFY_FADE_MS (ramp length, 0 = instant) and optionally
+SPOTIFY_FADE_CURVE (linear, equal-power or smooth)
+"""
+
+import os
+import math
+import time
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Gain for a rising ramp at progress 0..1; falling ramps use the mirror image,
+# so an equal-power fade-out/fade-in pair keeps the summed power constant
+CURVES: Dict[str, Callable[[float], float]] = {
+    'linear': lambda p: p,
+    'equal-power': lambda p: math.sin(p * math.pi / 2),
+    'smooth': lambda p: p * p * (3 - 2 * p),
+}
+
+def _env_seconds(name: str) -> float:
+    try:
+        return max(0.0, float(os.environ.get(name, '0')) / 1000)
+    except ValueError:
+        logger.warning(f"Ignoring {name}={os.environ.get(name)!r}: not a number of milliseconds")
+        return 0.0
+
+FADE_SECONDS = _env_seconds('SPOTIFY_FADE_MS')
+FADE_CURVE = os.environ.get('SPOTIFY_FADE_CURVE', 'equal-power')
+if FADE_CURVE not in CURVES:
+    logger.warning(f"Unknown fade curve {FADE_CURVE!r}, using equal-power (choices: {', '.join(CURVES)})")
+    FADE_CURVE = 'equal-power'
+
+class Ramp:
+    """One volume ramp: `apply` gets levels from `start` to `end` over `duration` seconds"""
+
+    __slots__ = ('name', 'apply', 'start', 'end', 'duration', 'shape', 'on_done', 'started_at', 'level', 'cancelled')
+
+    def __init__(self, name: str, apply: Callable[[float], None], start: float, end: float, duration: float,
+                 curve: str, on_done: Optional[Callable[[], None]], started_at: float):
+        self.name = name
+        self.apply = apply
+        self.start = start
+        self.end = end
+        self.duration = duration
+        self.shape = CURVES[curve]
+        self.on_done = on_done
+        self.started_at = started_at
+        self.level = start  # Last level computed for this ramp
+        self.cancelled = False
+
+    def level_at(self, now: float) -> float:
+        progress = 1.0 if self.duration <= 0 else min(1.0, max(0.0, (now - self.started_at) / self.duration))
+        if self.end < self.start:
+            return self.end + (self.start - self.end) * self.shape(1.0 - progress)
+        return self.start + (self.end - self.start) * self.shape(progress)
+
+    def finished_at(self, now: float) -> bool:
+        return now - self.started_at >= self.duration
+
+class FadeScheduler:
+    """
+    Runs named ramps on one daemon timer thread. Starting a ramp under a name
+    that is already ramping cancels the old one and continues from the level it
+    had reached, so a fade-out can be turned around mid-flight. Updates are
+    coalesced: each tick applies only the latest level, and a slow `apply`
+    (e.g. an osascript call) just means fewer, larger steps. `on_done` runs on
+    the timer thread once a ramp reaches its end level without being replaced.
+    """
+
+    def __init__(self, tick: float = 0.02, clock: Callable[[], float] = time.monotonic):
+        self.tick = tick
+        self.clock = clock
+        self._ramps: Dict[str, Ramp] = {}
+        self._levels: Dict[str, float] = {}  # Level each name was last left at
+        self._wake = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.updates = 0
+
+    def start(self, name: str, apply: Callable[[float], None], end: float, duration: float,
+              curve: str = 'equal-power', start: Optional[float] = None,
+              on_done: Optional[Callable[[], None]] = None) -> Ramp:
+        """Ramp `name` to `end`; `start` defaults to where the name's last ramp stopped (else 1 - end)"""
+        with self._wake:
+            previous = self._ramps.pop(name, None)
+            if previous is not None:
+                previous.cancelled = True
+            if start is None:
+                start = self._levels.get(name, 1.0 - end)
+            ramp = Ramp(name, apply, start, end, duration, curve, on_done, self.clock())
+            self._ramps[name] = ramp
+            if self._thread is None or not self._thread.is_alive():
+                self._closed = False
+                self._thread = threading.Thread(target=self._run, name="audio-fades", daemon=True)
+                self._thread.start()
+            self._wake.notify()
+        return ramp
+
+    def cancel(self, name: str) -> Optional[float]:
+        """Stop a ramp where it is (on_done does not run); returns the level it reached"""
+        with self._wake:
+            ramp = self._ramps.pop(name, None)
+            if ramp is None:
+                return self._levels.get(name)
+            ramp.cancelled = True
+            return ramp.level
+
+    def level(self, name: str) -> Optional[float]:
+        with self._wake:
+            ramp = self._ramps.get(name)
+            return ramp.level if ramp is not None else self._levels.get(name)
+
+    def active(self, name: str) -> bool:
+        with self._wake:
+            return name in self._ramps
+
+    def _step(self, finish: bool = False):
+        """Compute and apply one level per ramp (outside the lock, so apply may start new ramps)"""
+        now = self.clock()
+        due = []
+        with self._wake:
+            for name, ramp in list(self._ramps.items()):
+                done = finish or ramp.finished_at(now)
+                ramp.level = ramp.end if done else ramp.level_at(now)
+                self._levels[name] = ramp.level
+                if done:
+                    del self._ramps[name]
+                due.append((ramp, ramp.level, done))
+        for ramp, level, done in due:
+            if ramp.cancelled:
+                continue  # Replaced while we were computing
+            try:
+                ramp.apply(level)
+                self.updates += 1
+                if done and ramp.on_done is not None:
+                    ramp.on_done()
+            except Exception as e:
+                logger.debug(f"Fade '{ramp.name}' step failed: {e}")
+
+    def _run(self):
+        while True:
+            with self._wake:
+                while not self._ramps and not self._closed:
+                    self._wake.wait()
+                if self._closed:
+                    return
+            started = self.clock()
+            self._step()
+            time.sleep(max(0.0, self.tick - (self.clock() - started)))
+
+    def close(self):
+        """Jump every ramp to its end level (running on_done) and stop the timer thread"""
+        with self._wake:
+            self._closed = True
+            self._wake.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._step(finish=True)
+
+fade_scheduler = FadeScheduler()
+
+if __name__ == "__main__":
+    # Show the shape of each curve as a fade-out/fade-in pair
+    for curve in CURVES:
+        print(f"{curve}:")
+        for step in range(11):
+            progress = step / 10
+            out = Ramp('out', print, 1.0, 0.0, 1.0, curve, None, 0.0).level_at(progress)
+            fade_in = Ramp('in', print, 0.0, 1.0, 1.0, curve, None, 0.0).level_at(progress)
+            print(f"  {progress:4.1f}  out {out:5.3f} {'█' * round(out * 20):<20}  in {fade_in:5.3f} {'█' * round(fade_in * 20)}")
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Accuracy and throughput benchmark suite for ad detection
+Runs EnhancedAdDetector (and the basic fallback detector) over a labeled title corpus
+
+Usage:
+    python benchmark_ad_detection.py [--corpus corpus/titles_v1.json] [--rounds 200] [--backend ngram --model path]
+                                     [--uncompiled]  # Also time the original per-pattern loop as a baseline
+"""
+
+import sys
+import os
+import re
+import json
+import time
+import argparse
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+# Add current directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from enhanced_ad_detection import AdPattern, EnhancedAdDetector
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", "titles_v1.json")
+THRESHOLDS = [0.5, 0.6, 0.7, 0.8, 0.9]
+
+def load_corpus(path: str) -> Tuple[int, List[Dict]]:
+    """Load a labeled corpus: returns (version, [{title, ad, language}])"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data['version'], data['titles']
+
+def precision_recall(entries: List[Dict], predictions: List[bool]) -> Dict[str, float]:
+    """Precision/recall/F1 with 'ad' as the positive class"""
+    tp = sum(1 for e, p in zip(entries, predictions) if p and e['ad'])
+    fp = sum(1 for e, p in zip(entries, predictions) if p and not e['ad'])
+    fn = sum(1 for e, p in zip(entries, predictions) if not p and e['ad'])
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / (tp + fn) if tp + fn else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {'precision': precision, 'recall': recall, 'f1': f1, 'fp': fp, 'fn': fn}
+
+def report_accuracy(detector: EnhancedAdDetector, entries: List[Dict]):
+    """Precision/recall per threshold, then per language at the default threshold"""
+    titles = [e['title'] for e in entries]
+
+    print("\n🎯 ACCURACY BY THRESHOLD")
+    print(f"{'threshold':>9} {'precision':>9} {'recall':>7} {'f1':>6} {'FP':>4} {'FN':>4}")
+    predictions_by_threshold = {}
+    for threshold in THRESHOLDS:
+        predictions = [v.is_ad for _, v in detector.classify_many(titles, threshold)]
+        predictions_by_threshold[threshold] = predictions
+        m = precision_recall(entries, predictions)
+        print(f"{threshold:>9.2f} {m['precision']:>9.3f} {m['recall']:>7.3f} {m['f1']:>6.3f} {m['fp']:>4} {m['fn']:>4}")
+
+    print("\n🌍 ACCURACY BY LANGUAGE (threshold 0.6)")
+    print(f"{'language':>9} {'titles':>6} {'precision':>9} {'recall':>7} {'FP':>4} {'FN':>4}")
+    predictions = predictions_by_threshold[0.6]
+    for language in sorted({e['language'] for e in entries}):
+        subset = [(e, p) for e, p in zip(entries, predictions) if e['language'] == language]
+        m = precision_recall([e for e, _ in subset], [p for _, p in subset])
+        print(f"{language:>9} {len(subset):>6} {m['precision']:>9.3f} {m['recall']:>7.3f} {m['fp']:>4} {m['fn']:>4}")
+
+    misses = [(e, p) for e, p in zip(entries, predictions) if e['ad'] != p]
+    if misses:
+        print("\n❌ MISCLASSIFIED (threshold 0.6)")
+        for e, p in misses:
+            print(f"    [{e['language']}] '{e['title']}' -> {'AD' if p else 'MUSIC'}")
+
+def time_per_title(classify: Callable[[str], bool], titles: List[str], rounds: int) -> float:
+    """Best-of-3 nanoseconds per title"""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter_ns()
+        for _ in range(rounds):
+            for title in titles:
+                classify(title)
+        best = min(best, (time.perf_counter_ns() - start) / (rounds * len(titles)))
+    return best
+
+def allocated_per_title(classify: Callable[[str], bool], titles: List[str]) -> Tuple[float, float]:
+    """(peak transient bytes, retained blocks) per title measured with tracemalloc"""
+    tracemalloc.start()
+    try:
+        peak_total = 0
+        blocks_before = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+        for title in titles:
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            classify(title)
+            _, peak = tracemalloc.get_traced_memory()
+            peak_total += peak - current
+        blocks_after = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+    finally:
+        tracemalloc.stop()
+    return peak_total / len(titles), (blocks_after - blocks_before) / len(titles)
+
+def uncompiled_classifier(detector: EnhancedAdDetector) -> Callable[[str], bool]:
+    """
+    The detector's patterns run the way is_ad_playing did before they were
+    compiled: a fresh deduplicated pattern list per call, then one re.search /
+    substring test per pattern and per music regex
+    """
+    locale_code = detector.user_locale.split('_')[0].lower()
+    music_patterns = [r".+\s-\s.+", r".+\s–\s.+", r".+\sby\s.+"]
+
+    def relevant_patterns() -> List[AdPattern]:
+        patterns = []
+        patterns.extend(detector.ad_patterns.get(locale_code, []))
+        for lang_patterns in detector.ad_patterns.values():
+            for pattern in lang_patterns:
+                if pattern not in patterns:
+                    patterns.append(pattern)
+        return patterns
+
+    def classify(window_title: str, confidence_threshold: float = 0.6) -> bool:
+        if not window_title or not window_title.strip():
+            return True
+        title = window_title.strip()
+        if title in ("Spotify Free", "Spotify Premium", "Spotify"):
+            return False
+        if any(indicator in title for indicator in (':\\', '.exe', '/', '\\')):
+            return False
+        max_confidence = 0.0
+        for pattern in relevant_patterns():
+            if pattern.pattern_type == 'exact':
+                if title == pattern.pattern:
+                    max_confidence = max(max_confidence, pattern.confidence)
+            elif pattern.pattern_type == 'contains':
+                if pattern.pattern.lower() in title.lower():
+                    max_confidence = max(max_confidence, pattern.confidence)
+            elif pattern.pattern_type == 'regex':
+                if re.search(pattern.pattern, title, re.IGNORECASE):
+                    max_confidence = max(max_confidence, pattern.confidence)
+        for music_pattern in music_patterns:
+            if re.search(music_pattern, title):
+                max_confidence = max(0.0, max_confidence - 0.4)
+                break
+        return max_confidence >= confidence_threshold
+
+    return classify
+
+def report_throughput(entries: List[Dict], rounds: int, backend_options: Dict, uncompiled: bool = False):
+    """ns/title and allocations/title for each detection path"""
+    titles = [e['title'] for e in entries]
+    candidates = [
+        ("is_ad_playing (uncached)", EnhancedAdDetector(cache_size=0, **backend_options).is_ad_playing),
+        ("is_ad_playing (exhaustive)",
+         EnhancedAdDetector(cache_size=0, early_exit=False, **backend_options).is_ad_playing),
+        ("is_ad_playing (cached)", EnhancedAdDetector(**backend_options).is_ad_playing),
+    ]
+    if uncompiled:
+        candidates.append(("per-pattern loop (baseline)", uncompiled_classifier(EnhancedAdDetector(cache_size=0))))
+    try:
+        from main import _basic_ad_detection
+        candidates.append(("_basic_ad_detection", _basic_ad_detection))
+    except Exception as e:
+        print(f"\n⚠️  Skipping _basic_ad_detection (main.py not importable here: {e})")
+
+    print("\n⏱️  THROUGHPUT")
+    print(f"{'detector':<27} {'ns/title':>9} {'titles/sec':>11} {'peak B/title':>12} {'blocks/title':>12}")
+    for label, classify in candidates:
+        for title in titles:  # Warm up caches and lazy compilation
+            classify(title)
+        ns = time_per_title(classify, titles, rounds)
+        peak_bytes, blocks = allocated_per_title(classify, titles)
+        print(f"{label:<27} {ns:>9,.0f} {1e9 / ns:>11,.0f} {peak_bytes:>12,.0f} {blocks:>12.2f}")
+
+def report_evaluation_depth(entries: List[Dict]):
+    """Mean patterns evaluated per title with and without early termination"""
+    titles = [e['title'] for e in entries]
+    print("\n🪜 PATTERNS EVALUATED PER TITLE")
+    print(f"{'threshold':>9} {'early exit':>10} {'exhaustive':>10}")
+    for threshold in THRESHOLDS:
+        depths = []
+        for early_exit in (True, False):
+            detector = EnhancedAdDetector(cache_size=0, early_exit=early_exit)
+            for title in titles:
+                detector.detect(title, threshold)
+            depths.append(detector.cache_info()['patterns_per_evaluation'])
+        print(f"{threshold:>9.2f} {depths[0]:>10.1f} {depths[1]:>10.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Ad detection accuracy/throughput benchmark")
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help="Labeled corpus JSON file")
+    parser.add_argument('--rounds', type=int, default=200, help="Timing rounds over the corpus")
+    parser.add_argument('--backend', choices=['patterns', 'ngram'], default='patterns', help="Detector scoring backend")
+    parser.add_argument('--model', help="N-gram model file (default: models/ngram_model.npz)")
+    parser.add_argument('--uncompiled', action='store_true',
+                        help="Also time the per-pattern loop the compiled matcher replaced (baseline for speedups)")
+    args = parser.parse_args()
+    backend_options = {'backend': args.backend, 'model_path': args.model}
+
+    version, entries = load_corpus(args.corpus)
+    ads = sum(1 for e in entries if e['ad'])
+
+    print("📊 AD DETECTION BENCHMARK SUITE")
+    print("=" * 60)
+    print(f"Corpus: {os.path.basename(args.corpus)} v{version} | {len(entries)} titles "
+          f"({ads} ads, {len(entries) - ads} not ads) | backend: {args.backend}")
+
+    report_accuracy(EnhancedAdDetector(cache_size=0, **backend_options), entries)
+    if args.backend == 'patterns':
+        report_evaluation_depth(entries)
+    report_throughput(entries, args.rounds, backend_options, args.uncompiled)
+    print("=" * 60)
+
+if __name__ == "__main__":
+    main()
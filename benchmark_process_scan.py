@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Process discovery benchmark: shared /proc scanner vs psutil.process_iter
+Optionally spawns idle processes first so the box has ~N processes (Linux)
+
+Usage:
+    python benchmark_process_scan.py [--processes 5000] [--rounds 20]
+"""
+
+import sys
+import os
+import time
+import argparse
+import subprocess
+from typing import Callable, List
+
+# Add current directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from process_events import ProcessScanner, PROC_AVAILABLE
+
+SPOTIFY_NAMES = ['spotify', 'Spotify']
+
+def count_processes() -> int:
+    return len(ProcessScanner().snapshot())
+
+def spawn_idle_processes(target: int) -> List[subprocess.Popen]:
+    """Start `sleep` processes until about `target` processes exist"""
+    children = []
+    missing = target - count_processes()
+    for _ in range(max(0, missing)):
+        try:
+            children.append(subprocess.Popen(['sleep', '3600'], stdin=subprocess.DEVNULL,
+                                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+        except OSError as e:
+            print(f"⚠️  Stopped spawning after {len(children)} processes: {e}")
+            break
+    return children
+
+def time_per_call(find: Callable[[], List[int]], rounds: int) -> float:
+    """Best-of-3 milliseconds per call"""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            find()
+        best = min(best, (time.perf_counter() - start) * 1000 / rounds)
+    return best
+
+def psutil_find() -> List[int]:
+    """The previous discovery path in main.py"""
+    import psutil
+    pids = []
+    for proc in psutil.process_iter(['name', 'pid']):
+        try:
+            if proc.info['name'] in SPOTIFY_NAMES:
+                pids.append(proc.info['pid'])
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return pids
+
+def main():
+    parser = argparse.ArgumentParser(description="Process discovery benchmark")
+    parser.add_argument('--processes', type=int, default=5000, help="Spawn idle processes up to this many (0: don't spawn)")
+    parser.add_argument('--rounds', type=int, default=20, help="Timed calls per measurement")
+    args = parser.parse_args()
+
+    children = spawn_idle_processes(args.processes) if args.processes and PROC_AVAILABLE else []
+    try:
+        scanner = ProcessScanner()
+        candidates = [
+            ("ProcessScanner (fresh scan)", lambda: scanner.find(SPOTIFY_NAMES, max_age=0)),
+            ("ProcessScanner (memoized)", lambda: scanner.find(SPOTIFY_NAMES)),
+        ]
+        try:
+            import psutil  # noqa: F401
+            candidates.append(("psutil.process_iter", psutil_find))
+        except ImportError:
+            print("⚠️  psutil not installed - skipping the psutil path")
+
+        print("📊 PROCESS DISCOVERY BENCHMARK")
+        print("=" * 60)
+        print(f"Processes: {count_processes()} | /proc scanner: {'yes' if PROC_AVAILABLE else 'no (psutil)'}")
+        print(f"\n{'method':<28} {'ms/call':>9} {'calls/sec':>10}")
+        for label, find in candidates:
+            find()  # Warm up
+            ms = time_per_call(find, args.rounds)
+            print(f"{label:<28} {ms:>9.3f} {1000 / ms:>10,.0f}")
+        print("=" * 60)
+    finally:
+        for child in children:
+            child.kill()
+        for child in children:
+            child.wait()
+
+if __name__ == "__main__":
+    main()
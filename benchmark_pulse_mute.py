@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+PulseAudio mute path benchmark: finding Spotify's streams by listing and
+scanning every sink input vs reading the event-maintained SinkInputIndex
+
+Usage:
+    python benchmark_pulse_mute.py [--runs 300] [--toggle]
+"""
+
+import sys
+import os
+import time
+import argparse
+from typing import Callable, List
+
+# Add current directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pulse_streams import PULSECTL_AVAILABLE, LatencyHistogram, SinkInputIndex, is_spotify_stream
+
+PROCESS_NAMES = ['spotify', 'Spotify']
+
+def measure(lookup: Callable[[], List[object]], runs: int, act: Callable[[List[object]], None]) -> LatencyHistogram:
+    histogram = LatencyHistogram()
+    act(lookup())  # Warm up
+    for _ in range(runs):
+        started = time.perf_counter()
+        act(lookup())
+        histogram.record(time.perf_counter() - started)
+    return histogram
+
+def main():
+    parser = argparse.ArgumentParser(description="PulseAudio Spotify stream lookup benchmark")
+    parser.add_argument('--runs', type=int, default=300, help="Lookups per path")
+    parser.add_argument('--toggle', action='store_true',
+                        help="Also set each found stream's volume (to its current value) like a mute would")
+    args = parser.parse_args()
+
+    if not PULSECTL_AVAILABLE:
+        print("❌ pulsectl (or libpulse) is not installed")
+        return 1
+    import pulsectl
+
+    with pulsectl.Pulse('spotify-ad-silencer-benchmark') as pulse:
+        index = SinkInputIndex(PROCESS_NAMES).start()
+        if not index.wait_ready(5.0):
+            print("❌ Sink input index did not connect to PulseAudio")
+            index.close()
+            return 1
+
+        def scan():
+            return [info for info in pulse.sink_input_list() if is_spotify_stream(info.proplist, PROCESS_NAMES)]
+
+        def act(streams):
+            if args.toggle:
+                for info in streams:
+                    pulse.volume_set_all_chans(info, info.volume.value_flat)
+
+        print("📊 PULSEAUDIO MUTE PATH BENCHMARK")
+        print("=" * 60)
+        print(f"Sink inputs on the server: {len(pulse.sink_input_list())} | "
+              f"Spotify streams: {len(index.streams())} | {args.runs} runs each"
+              f"{' | with volume calls' if args.toggle else ''}")
+        for label, lookup in (("scan", scan), ("index", index.streams)):
+            histogram = measure(lookup, args.runs, act)
+            print(f"\n{label}: {histogram.describe()}")
+            for line in histogram.render():
+                print(f"  {line}")
+        print(f"\nIndex events handled: {index.events}")
+        index.close()
+        print("=" * 60)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+External command benchmark: subprocess.run vs CommandExecutor (direct spawn
+and persistent /bin/sh helper), plus a check that a hung command is bounded
+
+Usage:
+    python benchmark_subprocess.py [--runs 300] [--command uname -a]
+"""
+
+import sys
+import os
+import time
+import argparse
+import subprocess
+from typing import Callable, List
+
+# Add current directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from command_executor import CommandExecutor, HELPERS_AVAILABLE
+
+def timings(call: Callable[[], object], runs: int) -> List[float]:
+    call()  # Warm up
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - started)
+    return sorted(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description="External command latency benchmark")
+    parser.add_argument('--runs', type=int, default=300, help="Calls per method")
+    parser.add_argument('--command', nargs='+', default=['uname', '-a'], help="Command to run")
+    args = parser.parse_args()
+
+    executor = CommandExecutor()
+    candidates = [
+        ("subprocess.run", lambda: subprocess.run(args.command, capture_output=True, text=True)),
+        ("executor (spawn)", lambda: executor.run(args.command)),
+    ]
+    if HELPERS_AVAILABLE:
+        candidates.append(("executor (helper)", lambda: executor.run(args.command, persistent=True)))
+
+    print("📊 EXTERNAL COMMAND BENCHMARK")
+    print("=" * 60)
+    print(f"Command: {' '.join(args.command)} | {args.runs} runs each")
+    print(f"\n{'method':<20} {'p50':>9} {'p99':>9} {'max':>9}")
+    for label, call in candidates:
+        samples = timings(call, args.runs)
+        p50 = samples[len(samples) // 2]
+        p99 = samples[min(len(samples) - 1, int(0.99 * len(samples)))]
+        print(f"{label:<20} {p50 * 1000:>7.2f}ms {p99 * 1000:>7.2f}ms {samples[-1] * 1000:>7.2f}ms")
+
+    for persistent in ([False, True] if HELPERS_AVAILABLE else [False]):
+        result = executor.run(['sleep', '30'], timeout=0.5, persistent=persistent)
+        mode = 'helper' if persistent else 'spawn'
+        print(f"\nHung command ({mode}): timed out={result.timed_out} after {result.elapsed * 1000:.0f}ms")
+
+    print("\nExecutor stats:")
+    for name, summary in executor.stats().items():
+        print(f"  {name}: {summary}")
+    executor.close()
+    print("=" * 60)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Window backend benchmark: serial chain vs racing polling backends
+Uses scripted scrapers with wmctrl/xdotool-like latency (no X server needed)
+
+Usage:
+    python benchmark_window_backends.py [--polls 200]
+"""
+
+import sys
+import os
+import time
+import random
+import argparse
+from typing import List
+
+# Add current directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from window_backends import BackendChain, PollingBackend, SpotifyWindow
+
+def scripted_scraper(name: str, typical: float, slow: float, slow_rate: float, answers: float, seed: int):
+    """A scraper taking `typical` seconds, `slow` seconds `slow_rate` of the time, answering `answers` of the time"""
+    rng = random.Random(seed)
+
+    def scrape():
+        time.sleep(slow if rng.random() < slow_rate else typical)
+        return SpotifyWindow(f"Artist - Song ({name})") if rng.random() < answers else None
+    return scrape
+
+def make_backends(seed: int) -> List[PollingBackend]:
+    # wmctrl: one fork, occasionally stuck behind a busy X server; xdotool: two forks
+    return [PollingBackend('wmctrl', scripted_scraper('wmctrl', 0.008, 0.120, 0.05, 0.9, seed), min_interval=0),
+            PollingBackend('xdotool', scripted_scraper('xdotool', 0.015, 0.060, 0.05, 1.0, seed + 1), min_interval=0)]
+
+def measure(chain: BackendChain, polls: int) -> List[float]:
+    latencies = []
+    for _ in range(polls):
+        started = time.perf_counter()
+        chain.poll()
+        latencies.append(time.perf_counter() - started)
+    return sorted(latencies)
+
+def main():
+    parser = argparse.ArgumentParser(description="Window backend racing benchmark")
+    parser.add_argument('--polls', type=int, default=200, help="Polls per configuration")
+    args = parser.parse_args()
+
+    print("📊 WINDOW BACKEND BENCHMARK")
+    print("=" * 72)
+    print(f"{'mode':<10} {'mean':>9} {'p50':>9} {'p99':>9} {'max':>9}   winners")
+    for label, race in [("serial", False), ("race", True)]:
+        chain = BackendChain(make_backends(seed=7), race=race)
+        latencies = measure(chain, args.polls)
+        mean = sum(latencies) / len(latencies)
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))]
+        winners = ', '.join(f"{name} {stats.wins}" for name, stats in chain.stats.items())
+        print(f"{label:<10} {mean * 1000:>7.1f}ms {p50 * 1000:>7.1f}ms {p99 * 1000:>7.1f}ms "
+              f"{latencies[-1] * 1000:>7.1f}ms   {winners}")
+        chain.close()
+    print("=" * 72)
+
+if __name__ == "__main__":
+    main()
@@ -55,6 +55,10 @@ class PackageBuilder:
         if readme_path.exists():
             cmd.extend(["--add-data", f"{readme_path}{os.pathsep}."])
         
+        patterns_path = self.project_root / "patterns"
+        if patterns_path.exists():
+            cmd.extend(["--add-data", f"{patterns_path}{os.pathsep}patterns"])
+        
         if self.current_os == "windows":
             cmd.extend([
                 "--console",  # Keep console for now, can be changed to --windowed later
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Capability probing for Spotify Ad Silencer
+Checks once which tools and APIs work here (wmctrl, xdotool, Xlib, MPRIS,
+PulseAudio, PipeWire, osascript), caches the answers with a TTL, and guards each backend
+with a circuit breaker so failing tools are not retried on every poll
+
+Show what this machine supports:
+    python capabilities.py
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from command_executor import command_executor
+
+logger = logging.getLogger(__name__)
+
+class ProbeResult:
+    """Outcome of one probe"""
+
+    __slots__ = ('name', 'available', 'detail', 'checked_at')
+
+    def __init__(self, name: str, available: bool, detail: str = '', checked_at: float = 0.0):
+        self.name = name
+        self.available = available
+        self.detail = detail
+        self.checked_at = checked_at
+
+    def __repr__(self) -> str:
+        return f"ProbeResult({self.name}, {'available' if self.available else 'missing'}, {self.detail!r})"
+
+class CircuitBreaker:
+    """
+    Stops calling a failing backend. After `failure_threshold` consecutive
+    failures the breaker opens and allow() refuses calls for `reset_timeout`
+    seconds; then one trial call is let through (half-open) and further calls
+    are refused until it reports back. Each failed trial doubles the timeout, up
+    to `max_timeout`; a success closes the breaker. A trial that never reports
+    (the caller had nothing to say) is replaced by a new one after the timeout.
+    Thread-safe: racing backends report from pool threads.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half-open'
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 30.0,
+                 max_timeout: float = 600.0, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_timeout = max_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.last_error = ''
+        self._timeout = reset_timeout
+        self._opened_at = 0.0
+        self._trial_at: Optional[float] = None  # When the half-open trial was let through
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """May the backend be called now?"""
+        with self._lock:
+            now = self.clock()
+            if self.state == self.OPEN:
+                if now - self._opened_at < self._timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_at = None
+            if self.state == self.HALF_OPEN:
+                if self._trial_at is not None and now - self._trial_at < self._timeout:
+                    return False  # A trial is already in flight
+                self._trial_at = now
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"✅ {self.name} works again")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._timeout = self.reset_timeout
+            self._trial_at = None
+
+    def record_failure(self, error: str = ''):
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error)
+            if self.state == self.HALF_OPEN:
+                self._timeout = min(self._timeout * 2, self.max_timeout)
+                self._open()
+            elif self.state == self.CLOSED and self.failures >= self.failure_threshold:
+                self._open()
+                logger.warning(f"⚠️  {self.name} failed {self.failures} times ({self.last_error}) - "
+                               f"pausing it for {self._timeout:.0f}s")
+
+    def _open(self):
+        """Trip the breaker (lock held)"""
+        self.state = self.OPEN
+        self.trips += 1
+        self._opened_at = self.clock()
+        self._trial_at = None
+
+    def describe(self) -> str:
+        if self.state == self.CLOSED:
+            return self.state
+        return f"{self.state} ({self.failures} failures, retry in {self._timeout:.0f}s: {self.last_error})"
+
+class CapabilityRegistry:
+    """
+    Named probes with cached results. Both positive and negative answers are
+    kept for `ttl` seconds, so a missing tool costs one probe per TTL instead of
+    one failed fork per poll. Once a result expires it is still returned while a
+    background thread re-probes, so callers on the poll path never wait on a
+    probe (only the very first one is synchronous). Breakers are created on
+    demand per backend name.
+    """
+
+    def __init__(self, ttl: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._probes: Dict[str, Tuple[Callable[[], Tuple[bool, str]], Tuple[str, ...]]] = {}
+        self._results: Dict[str, ProbeResult] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._refreshing: Set[str] = set()  # Names being re-probed in the background
+        self._lock = threading.Lock()
+
+    def register(self, name: str, probe: Callable[[], Tuple[bool, str]], platforms: Tuple[str, ...] = ()):
+        """Add a probe returning (available, detail); `platforms` limits it to sys.platform prefixes"""
+        self._probes[name] = (probe, platforms)
+        self._results.pop(name, None)
+
+    def names(self) -> List[str]:
+        return [name for name, (_, platforms) in self._probes.items()
+                if not platforms or sys.platform.startswith(platforms)]
+
+    def probe(self, name: str, refresh: bool = False) -> ProbeResult:
+        """Cached probe result (re-probed in the background after the TTL, or now with refresh=True)"""
+        with self._lock:
+            result = self._results.get(name)
+            if result is not None and not refresh:
+                if self.clock() - result.checked_at >= self.ttl and name not in self._refreshing:
+                    self._refreshing.add(name)
+                    threading.Thread(target=self._run_probe, args=(name,),
+                                     name=f"probe-{name}", daemon=True).start()
+                return result
+        return self._run_probe(name)
+
+    def _run_probe(self, name: str) -> ProbeResult:
+        try:
+            return self._probe_now(name)
+        finally:
+            with self._lock:
+                self._refreshing.discard(name)
+
+    def _probe_now(self, name: str) -> ProbeResult:
+        now = self.clock()
+        if name not in self._probes:
+            return ProbeResult(name, False, 'unknown capability', now)
+        probe, platforms = self._probes[name]
+        if platforms and not sys.platform.startswith(platforms):
+            available, detail = False, f"not on {sys.platform}"
+        else:
+            try:
+                available, detail = probe()
+            except Exception as e:
+                available, detail = False, str(e)
+        result = ProbeResult(name, available, detail, now)
+        with self._lock:
+            previous = self._results.get(name)
+            self._results[name] = result
+        if previous is not None and previous.available != available:
+            logger.info(f"🧰 {name} is now {'available' if available else 'unavailable'}: {detail}")
+        return result
+
+    def available(self, name: str) -> bool:
+        return self.probe(name).available
+
+    def probe_all(self, refresh: bool = False) -> List[ProbeResult]:
+        return [self.probe(name, refresh) for name in self.names()]
+
+    def breaker(self, name: str, **kwargs) -> CircuitBreaker:
+        """The circuit breaker for a backend (created on first use)"""
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = self._breakers[name] = CircuitBreaker(name, clock=self.clock, **kwargs)
+            return breaker
+
+    def usable(self, name: str) -> bool:
+        """Probe says the tool exists and its breaker allows a call"""
+        return self.available(name) and self.breaker(name).allow()
+
+    def summary(self) -> str:
+        """One-line status for logs"""
+        parts = []
+        for name in self.names():
+            result = self.probe(name)
+            breaker = self._breakers.get(name)
+            mark = '✅' if result.available else '❌'
+            if result.available and breaker is not None and breaker.state != CircuitBreaker.CLOSED:
+                mark = '⏸️'
+            parts.append(f"{name} {mark}")
+        return ', '.join(parts)
+
+    def status(self) -> Dict[str, Dict[str, object]]:
+        """Probe results and breaker states, e.g. for diagnostics"""
+        status = {}
+        for name in self.names():
+            result = self.probe(name)
+            breaker = self._breakers.get(name)
+            status[name] = {'available': result.available, 'detail': result.detail,
+                            'breaker': breaker.describe() if breaker is not None else CircuitBreaker.CLOSED}
+        for name, breaker in self._breakers.items():
+            status.setdefault(name, {'breaker': breaker.describe()})  # Backends without a probe
+        return status
+
+def _probe_command(command: str, *args: str, timeout: float = 2.0) -> Tuple[bool, str]:
+    """A tool is available if it is on PATH and `command args` exits cleanly"""
+    path = shutil.which(command)
+    if path is None:
+        return False, "not installed"
+    if not args:
+        return True, path
+    result = command_executor.run([path, *args], timeout=timeout)
+    if result.timed_out:
+        return False, f"'{command}' timed out"
+    if result.returncode != 0:
+        return False, (result.stderr.strip().splitlines() or [f"exit code {result.returncode}"])[0]
+    return True, path
+
+def _probe_display() -> Optional[str]:
+    return None if os.environ.get('DISPLAY') else "no X display"
+
+def _probe_wmctrl() -> Tuple[bool, str]:
+    problem = _probe_display()
+    return (False, problem) if problem else _probe_command('wmctrl', '-m')
+
+def _probe_xdotool() -> Tuple[bool, str]:
+    problem = _probe_display()
+    return (False, problem) if problem else _probe_command('xdotool', 'version')
+
+def _probe_xlib() -> Tuple[bool, str]:
+    from x11_window_watcher import XLIB_AVAILABLE
+    if not XLIB_AVAILABLE:
+        return False, "python-xlib not installed"
+    problem = _probe_display()
+    if problem:
+        return False, problem
+    from Xlib import display
+    connection = display.Display()
+    try:
+        return True, connection.get_display_name()
+    finally:
+        connection.close()
+
+def _probe_mpris() -> Tuple[bool, str]:
+    from mpris_backend import JEEPNEY_AVAILABLE
+    if not JEEPNEY_AVAILABLE:
+        return False, "jeepney not installed"
+    if not os.environ.get('DBUS_SESSION_BUS_ADDRESS'):
+        return False, "no D-Bus session bus"
+    from jeepney.io.blocking import open_dbus_connection
+    with open_dbus_connection(bus='SESSION') as connection:
+        return True, connection.unique_name
+
+def _probe_pulse() -> Tuple[bool, str]:
+    from pulse_streams import PULSECTL_AVAILABLE
+    if not PULSECTL_AVAILABLE:
+        return False, "pulsectl (or libpulse) not installed"
+    import pulsectl
+    with pulsectl.Pulse('spotify-ad-silencer-probe') as pulse:
+        return True, pulse.server_info().server_name
+
+def _probe_pipewire() -> Tuple[bool, str]:
+    from pipewire_backend import PIPEWIRE_AVAILABLE, PIPEWIRE_REQUESTED
+    if not PIPEWIRE_REQUESTED:
+        return False, "not enabled (SPOTIFY_AUDIO_BACKEND=pipewire)"
+    if not PIPEWIRE_AVAILABLE:
+        return False, "pw-dump/pw-cli not installed"
+    return _probe_command('pw-cli', 'info', '0')
+
+def _probe_osascript() -> Tuple[bool, str]:
+    return _probe_command('osascript')
+
+capabilities = CapabilityRegistry()
+capabilities.register('wmctrl', _probe_wmctrl, ('linux',))
+capabilities.register('xdotool', _probe_xdotool, ('linux',))
+capabilities.register('xlib', _probe_xlib, ('linux',))
+capabilities.register('mpris', _probe_mpris, ('linux',))
+capabilities.register('pulse', _probe_pulse, ('linux',))
+capabilities.register('pipewire', _probe_pipewire, ('linux',))
+capabilities.register('osascript', _probe_osascript, ('darwin',))
+
+if __name__ == "__main__":
+    print("🧰 CAPABILITIES")
+    print("=" * 60)
+    for result in capabilities.probe_all():
+        print(f"{'✅' if result.available else '❌'} {result.name:<10} {result.detail}")
+    if not capabilities.names():
+        print(f"No probes for {sys.platform}")
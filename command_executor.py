@@ -0,0 +1,246 @@
+"""
+Bounded-latency command execution for Spotify Ad Silencer
+Runs external tools (wmctrl, xdotool, osascript) with per-call deadlines and
+kills them on timeout, optionally through long-lived /bin/sh helpers so polls
+don't pay a Python fork+exec each time; keeps spawn counts and latency stats
+"""
+
+import os
+import sys
+import time
+import shlex
+import shutil
+import signal
+import select
+import logging
+import threading
+import subprocess
+from collections import deque
+from typing import Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Persistent helpers need a POSIX shell and select() on pipes
+HELPERS_AVAILABLE = os.name == 'posix' and shutil.which('sh') is not None
+
+DEFAULT_TIMEOUT = 2.0
+
+# Own process group so a timeout kills the command's children too. process_group
+# (3.11+) keeps subprocess's fast vfork path; start_new_session forces a full fork
+if os.name != 'posix':
+    _NEW_GROUP = {}
+elif sys.version_info >= (3, 11):
+    _NEW_GROUP = {'process_group': 0}
+else:
+    _NEW_GROUP = {'start_new_session': True}
+
+class CommandResult:
+    """subprocess.CompletedProcess look-alike that also records timing"""
+
+    __slots__ = ('args', 'returncode', 'stdout', 'stderr', 'elapsed', 'timed_out')
+
+    def __init__(self, args: Sequence[str], returncode: Optional[int], stdout: str = '', stderr: str = '',
+                 elapsed: float = 0.0, timed_out: bool = False):
+        self.args = list(args)
+        self.returncode = returncode  # None when the command was killed on timeout
+        self.stdout = stdout
+        self.stderr = stderr
+        self.elapsed = elapsed
+        self.timed_out = timed_out
+
+    def check_returncode(self):
+        """Raise like subprocess.run(check=True) would"""
+        if self.timed_out:
+            raise subprocess.TimeoutExpired(self.args, self.elapsed, self.stdout)
+        if self.returncode != 0:
+            raise subprocess.CalledProcessError(self.returncode, self.args, self.stdout, self.stderr)
+
+class CommandStats:
+    """Per-command counters and a window of recent latencies"""
+
+    __slots__ = ('runs', 'spawns', 'timeouts', 'failures', 'samples')
+
+    def __init__(self, window: int = 512):
+        self.runs = 0
+        self.spawns = 0     # Processes started from Python (direct runs and new helpers)
+        self.timeouts = 0
+        self.failures = 0   # Non-zero exit codes
+        self.samples = deque(maxlen=window)
+
+    def percentile(self, fraction: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def describe(self) -> str:
+        return (f"{self.runs} runs, {self.spawns} spawns, {self.timeouts} timeouts, {self.failures} failed, "
+                f"p50 {self.percentile(0.5) * 1000:.1f}ms, p99 {self.percentile(0.99) * 1000:.1f}ms")
+
+def _kill(process: subprocess.Popen):
+    """Kill a process and everything it started (own process group on POSIX)"""
+    try:
+        if os.name == 'posix':
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError, OSError):
+        pass
+
+class ShellHelper:
+    """
+    A long-lived /bin/sh reading one command per line on stdin. Each command's
+    output is followed by a marker line carrying its exit status, so results
+    are read back without starting a new process from Python. Commands read
+    /dev/null instead of the helper's stdin; their stderr is discarded.
+    """
+
+    def __init__(self):
+        self.process = subprocess.Popen(['sh'], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL, bufsize=0, **_NEW_GROUP)
+        self._token = 0
+        self.alive = True
+
+    def run(self, args: Sequence[str], timeout: float) -> CommandResult:
+        """Run `args`; raises TimeoutError (helper is then dead) or OSError if the helper died"""
+        self._token += 1
+        marker = f"\x1e{self._token}:".encode()
+        line = f"{shlex.join(args)} </dev/null 2>/dev/null; printf '\\036%d:%d\\n' {self._token} $?\n"
+        started = time.perf_counter()
+        deadline = started + timeout
+        self.process.stdin.write(line.encode())
+        fd = self.process.stdout.fileno()
+        buffer = b''
+        while True:
+            end = buffer.find(marker)
+            if end >= 0 and buffer.find(b'\n', end) >= 0:
+                status = buffer[end + len(marker):buffer.index(b'\n', end)]
+                return CommandResult(args, int(status), buffer[:end].decode('utf-8', 'replace'), '',
+                                     time.perf_counter() - started)
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                self.close()
+                raise TimeoutError(f"{args[0]} timed out after {timeout}s")
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                self.close()
+                raise OSError("command helper exited")
+            buffer += chunk
+
+    def close(self):
+        if self.alive:
+            self.alive = False
+            _kill(self.process)
+            self.process.wait()
+            for pipe in (self.process.stdin, self.process.stdout):
+                try:
+                    pipe.close()
+                except OSError:
+                    pass
+
+class CommandExecutor:
+    """
+    Runs commands with a deadline, killing them (and their children) when it
+    passes. persistent=True routes the call through an idle ShellHelper (up to
+    `max_helpers` run at once, e.g. for concurrently raced window backends),
+    falling back to a direct spawn when helpers are unavailable or all busy.
+    """
+
+    def __init__(self, default_timeout: float = DEFAULT_TIMEOUT, max_helpers: int = 4):
+        self.default_timeout = default_timeout
+        self.max_helpers = max_helpers
+        self._idle: List[ShellHelper] = []
+        self._helpers = 0
+        self._stats: Dict[str, CommandStats] = {}
+        self._lock = threading.Lock()
+
+    def _stat(self, name: str) -> CommandStats:
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = CommandStats()
+            return stats
+
+    def run(self, args: Sequence[str], timeout: Optional[float] = None, persistent: bool = False) -> CommandResult:
+        """Run `args` and capture text output; never blocks longer than `timeout` (plus kill time)"""
+        timeout = self.default_timeout if timeout is None else timeout
+        stats = self._stat(os.path.basename(args[0]))
+        result = None
+        if persistent and HELPERS_AVAILABLE:
+            result = self._run_in_helper(args, timeout, stats)
+        if result is None:
+            result = self._spawn(args, timeout, stats)
+        stats.runs += 1
+        stats.samples.append(result.elapsed)
+        if result.timed_out:
+            stats.timeouts += 1
+            logger.warning(f"⏱️  {args[0]} did not finish within {timeout}s - killed")
+        elif result.returncode != 0:
+            stats.failures += 1
+        return result
+
+    def _spawn(self, args: Sequence[str], timeout: float, stats: CommandStats) -> CommandResult:
+        started = time.perf_counter()
+        process = subprocess.Popen(list(args), stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE, text=True, errors='replace', **_NEW_GROUP)
+        stats.spawns += 1
+        try:
+            stdout, stderr = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            _kill(process)
+            stdout, stderr = process.communicate()
+            return CommandResult(args, None, stdout or '', stderr or '', time.perf_counter() - started, True)
+        return CommandResult(args, process.returncode, stdout, stderr, time.perf_counter() - started)
+
+    def _run_in_helper(self, args: Sequence[str], timeout: float, stats: CommandStats) -> Optional[CommandResult]:
+        """Result from a helper, or None to fall back to a direct spawn"""
+        helper = self._acquire(stats)
+        if helper is None:
+            return None
+        try:
+            result = helper.run(args, timeout)
+        except TimeoutError:
+            self._discard()
+            return CommandResult(args, None, '', '', timeout, True)
+        except OSError as e:
+            logger.debug(f"Command helper failed: {e}")
+            helper.close()
+            self._discard()
+            return None
+        with self._lock:
+            self._idle.append(helper)
+        return result
+
+    def _acquire(self, stats: CommandStats) -> Optional[ShellHelper]:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+            if self._helpers >= self.max_helpers:
+                return None
+            self._helpers += 1
+        try:
+            helper = ShellHelper()
+        except OSError as e:
+            logger.debug(f"Cannot start command helper: {e}")
+            self._discard()
+            return None
+        stats.spawns += 1
+        return helper
+
+    def _discard(self):
+        with self._lock:
+            self._helpers -= 1
+
+    def stats(self) -> Dict[str, str]:
+        """Per-command summary (runs, spawns, timeouts, p50/p99 latency)"""
+        with self._lock:
+            return {name: stats.describe() for name, stats in self._stats.items()}
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._helpers -= len(idle)
+        for helper in idle:
+            helper.close()
+
+command_executor = CommandExecutor()
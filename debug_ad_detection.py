@@ -3,47 +3,85 @@
 """
 Debug script for testing ad detection
 Use this to test specific window titles and see why they might not be detected as ads
+
+Usage:
+    python debug_ad_detection.py                      # Interactive session
+    python debug_ad_detection.py titles.log [options] # Classify a log file (one title per line)
 """
 
 import sys
 import os
+import argparse
 
 # Add current directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from enhanced_ad_detection import EnhancedAdDetector
+from title_normalization import normalize_title
 
 def test_ad_detection(title: str):
     """Test a specific title with detailed output"""
-    detector = EnhancedAdDetector()
+    # Evaluate every pattern so all matches and the true confidence are shown
+    detector = EnhancedAdDetector(early_exit=False)
+    verdict = detector.detect(title)
     
     print(f"\n🔍 TESTING: '{title}'")
     print("=" * 50)
     
-    # Test with different confidence levels
-    confidence_levels = [0.5, 0.6, 0.7, 0.8, 0.9]
+    status = "🔇 AD" if verdict.is_ad else "🎵 MUSIC"
+    print(f"Verdict at threshold {verdict.threshold}: {status}")
+    print(f"Final confidence: {verdict.confidence:.2f}")
     
-    for confidence in confidence_levels:
-        result = detector.is_ad_playing(title, confidence)
-        status = "🔇 AD" if result else "🎵 MUSIC"
-        print(f"Confidence {confidence}: {status}")
+    if verdict.reason:
+        print(f"Short-circuited: {verdict.reason}")
+    if verdict.matched_patterns:
+        print("Matched patterns:")
+        for pattern in verdict.matched_patterns:
+            print(f"    '{pattern.pattern}' ({pattern.pattern_type}, {pattern.language}) -> {pattern.confidence:.2f}")
+    elif not verdict.reason:
+        print("Matched patterns: none")
+    if verdict.music_discount:
+        print(f"Music format discount: -{verdict.music_discount:.2f}")
+    if verdict.patterns_evaluated:
+        print(f"Patterns evaluated: {verdict.patterns_evaluated}")
     
-    # Show detailed analysis
-    print(f"\nTitle length: {len(title)} characters")
-    print(f"Contains ' - ': {' - ' in title}")
-    print(f"Is empty/whitespace: {not title or not title.strip()}")
-    print(f"Looks like file path: {any(x in title for x in [':\\', '.exe', '/', '\\'])}")
+    info = normalize_title(title)
+    print(f"\nTitle length: {info.length} characters, {info.token_count} words")
+    print(f"Folded form: '{info.folded}'")
+    print("=" * 50)
+
+def classify_log_file(path: str, threshold: float, processes: int, summary_only: bool):
+    """Classify every line of a title log and print confidence/verdict per line plus a summary"""
+    detector = EnhancedAdDetector()
+    ads = 0
+    total = 0
     
-    # Test against specific patterns
-    common_ad_words = ['Premium', 'Free', 'Ad', 'Commercial', 'Upgrade', 'Watch', 'Video']
-    found_words = [word for word in common_ad_words if word.lower() in title.lower()]
-    if found_words:
-        print(f"Contains ad keywords: {found_words}")
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        titles = (line.rstrip('\r\n') for line in f)
+        for title, verdict in detector.classify_many(titles, threshold, processes=processes):
+            total += 1
+            if verdict.is_ad:
+                ads += 1
+            if not summary_only:
+                print(f"{verdict.confidence:.2f}\t{'AD' if verdict.is_ad else 'MUSIC'}\t{title}")
     
-    print("=" * 50)
+    music = total - ads
+    print(f"\n📊 {path}: {total} titles | 🔇 {ads} ads | 🎵 {music} music | threshold {threshold}",
+          file=sys.stderr)
 
 def main():
-    """Interactive debug session"""
+    """Interactive debug session, or batch classification when given a log file"""
+    parser = argparse.ArgumentParser(description="Debug Spotify ad detection")
+    parser.add_argument('logfile', nargs='?', help="File with one window title per line")
+    parser.add_argument('--threshold', type=float, default=0.6, help="Confidence threshold (default: 0.6)")
+    parser.add_argument('--processes', type=int, default=0, help="Worker processes for large files (default: in-process)")
+    parser.add_argument('--summary-only', action='store_true', help="Only print the totals")
+    args = parser.parse_args()
+    
+    if args.logfile:
+        classify_log_file(args.logfile, args.threshold, args.processes, args.summary_only)
+        return
+    
     print("🎯 SPOTIFY AD DETECTION DEBUGGER")
     print("="*50)
     print("This will help debug why certain titles aren't detected as ads")
@@ -4,14 +4,23 @@ Handles international ads and dynamic content
 """
 
 import re
+import time
 import locale
 import logging
-from typing import Dict, List, Optional
+import multiprocessing
+from collections import OrderedDict
+from functools import partial
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from dataclasses import dataclass
 
+from known_music import KnownMusicStore
+from pattern_packs import PatternPackLoader
+from title_normalization import NormalizedTitle, fold_text, normalize_title
+
 logger = logging.getLogger(__name__)
 
-@dataclass
+@dataclass(frozen=True)
 class AdPattern:
     """Represents an ad detection pattern"""
     pattern: str
@@ -19,12 +28,249 @@ class AdPattern:
     confidence: float
     pattern_type: str  # 'exact', 'contains', 'regex'
 
+# Confidence removed from titles that look like "Artist - Song"
+MUSIC_DISCOUNT = 0.4
+
+# Stage kinds in CompiledPatternMatcher
+EXACT, EXACT_CI, CONTAINS, REGEX = range(4)
+
+class CompiledPatternMatcher:
+    """
+    Ad pattern set compiled once into confidence-ordered evaluation stages.
+
+    Patterns are bucketed by (confidence, locale partition, kind) and each bucket
+    becomes one stage, evaluated in descending confidence with the user's locale
+    first within a level:
+    - 'exact' patterns become a dict lookup on the stripped title; 'regex' patterns
+      that are just an anchored literal (^Werbung$) become one on the folded title
+    - 'contains' literals become one lookahead alternation over the folded title
+    - other 'regex' patterns become one alternation with a named group per source
+      (anchored ones run with match() instead of search())
+
+    Exact patterns and anchored patterns that start with literal text (^Spotify - )
+    name the whole title, so the music format discount does not apply to them.
+
+    Because stages are ordered, the first match that isn't discounted is the best
+    one, and a caller that only needs a verdict can stop before stages too weak to
+    reach its threshold.
+    """
+
+    # ^literal$ with no regex metacharacters in between
+    _ANCHORED_LITERAL = re.compile(r'\^([^\\.^$*+?{}\[\]|()]+)\$')
+    # ^literal... - an anchored pattern naming a specific title rather than a shape
+    _LITERAL_PREFIX = re.compile(r'\^[^\\.^$*+?{}\[\]|()\s]')
+
+    def __init__(self, patterns: List[AdPattern], locale_code: str = ''):
+        tables: Dict[int, Dict[str, List[AdPattern]]] = {kind: {} for kind in (EXACT, EXACT_CI, CONTAINS, REGEX)}
+
+        for pattern in patterns:
+            if pattern.pattern_type == 'exact':
+                kind, key = EXACT, pattern.pattern
+            elif pattern.pattern_type == 'contains':
+                kind, key = CONTAINS, fold_text(pattern.pattern)
+            elif pattern.pattern_type == 'regex':
+                literal = self._ANCHORED_LITERAL.fullmatch(pattern.pattern)
+                if literal:
+                    kind, key = EXACT_CI, fold_text(literal.group(1))
+                else:
+                    kind, key = REGEX, pattern.pattern
+            else:
+                logger.warning(f"Unknown pattern type '{pattern.pattern_type}' for pattern '{pattern.pattern}'")
+                continue
+            # Same pattern text may appear in several languages - keep all for provenance
+            tables[kind].setdefault(key, []).append(pattern)
+
+        # (confidence, partition, kind) -> [(key, patterns sharing that key)]
+        buckets: Dict[Tuple[float, int, int], List[Tuple[str, Tuple[AdPattern, ...]]]] = {}
+        for kind, table in tables.items():
+            for key, group in table.items():
+                confidence = max(p.confidence for p in group)
+                partition = 0 if any(p.language == locale_code for p in group) else 1
+                group = tuple(sorted(group, key=lambda p: -p.confidence))
+                buckets.setdefault((confidence, partition, kind), []).append((key, group))
+
+        # [(confidence, kind, lookup, pattern count, names the whole title)]
+        self.stages: List[Tuple[float, int, object, int, bool]] = []
+        for confidence, partition, kind in sorted(buckets, key=lambda b: (-b[0], b[1], b[2])):
+            entries = buckets[(confidence, partition, kind)]
+            if kind in (EXACT, EXACT_CI):
+                self.stages.append((confidence, kind, dict(entries), len(entries), True))
+            elif kind == CONTAINS:
+                alternation = '|'.join(re.escape(key) for key, _ in sorted(entries, key=lambda e: -len(e[0])))
+                lookup = (re.compile(f"(?=({alternation}))"), dict(entries))
+                self.stages.append((confidence, kind, lookup, len(entries), False))
+            else:
+                for find, groups, singles, whole in self._compile_regexes(entries):
+                    self.stages.append((confidence, kind, (find, groups, singles), len(groups), whole))
+
+        self.pattern_count = sum(stage[3] for stage in self.stages)
+
+    @classmethod
+    def _compile_regexes(cls, entries: List[Tuple[str, Tuple[AdPattern, ...]]]) -> List[Tuple[Callable, Dict[Optional[str], Tuple[AdPattern, ...]], List[Tuple[Callable, Tuple[AdPattern, ...]]], bool]]:
+        """
+        Compile one regex bucket into [(match or search, group name -> patterns,
+        [(per-pattern match or search, patterns)], names the whole title)]
+        """
+        compiled = []
+        anchored = [(s, g) for s, g in entries if s.startswith('^') and '|' not in s]
+        floating = [(s, g) for s, g in entries if not (s.startswith('^') and '|' not in s)]
+        named = [(s, g) for s, g in anchored if cls._LITERAL_PREFIX.match(s)]
+        shaped = [(s, g) for s, g in anchored if not cls._LITERAL_PREFIX.match(s)]
+        for subset, use_match, whole in ((named, True, True), (shaped, True, False), (floating, False, False)):
+            singles = []
+            for source, group in subset:
+                try:
+                    regex = re.compile(source, re.IGNORECASE)
+                except re.error as e:
+                    logger.warning(f"Skipping invalid regex pattern '{source}': {e}")
+                    continue
+                singles.append((source, regex.match if use_match else regex.search, group))
+            if not singles:
+                continue
+            try:
+                alternation = '|'.join(f"(?P<p{i}>{source})" for i, (source, _, _) in enumerate(singles))
+                regex = re.compile(alternation, re.IGNORECASE)
+                compiled.append((regex.match if use_match else regex.search,
+                                 {f"p{i}": group for i, (_, _, group) in enumerate(singles)},
+                                 [(find, group) for _, find, group in singles], whole))
+            except re.error:
+                # Backreferences or clashing group names break once wrapped - run them one by one
+                for _, find, group in singles:
+                    compiled.append((find, {None: group}, [(find, group)], whole))
+        return compiled
+
+    def match(self, title: NormalizedTitle, stop_below: Optional[float] = None,
+              discount: float = 0.0) -> Tuple[float, float, List[AdPattern], int]:
+        """
+        Match a normalized title. Returns (score, discount applied, matched patterns, patterns evaluated).
+
+        `discount` (the music format discount) comes off every match except those from
+        patterns naming the whole title, which keep their confidence.
+
+        With `stop_below`, evaluation ends at the first match scoring at least that, or at
+        the first stage whose confidence is below it - nothing after that can reach the
+        caller's threshold, so a 0.0 result then only means "below stop_below". Without it
+        every stage runs.
+        """
+        stripped, folded = title.stripped, title.folded
+        score = 0.0
+        applied = 0.0
+        matched: List[AdPattern] = []
+        evaluated = 0
+
+        for confidence, kind, lookup, size, whole in self.stages:
+            if stop_below is not None:
+                if confidence < stop_below:
+                    break
+                if not whole and confidence - discount < stop_below:
+                    continue  # Can't reach it once discounted
+
+            evaluated += size
+
+            if kind == EXACT or kind == EXACT_CI:
+                group = lookup.get(stripped if kind == EXACT else folded)
+                hits = [group] if group else []
+            elif kind == CONTAINS:
+                regex, groups = lookup
+                if stop_below is None:
+                    hits = [groups[m.group(1)] for m in regex.finditer(folded)]
+                else:
+                    m = regex.search(folded)
+                    hits = [groups[m.group(1)]] if m else []
+            else:
+                find, groups, singles = lookup
+                m = find(stripped)
+                if not m:
+                    hits = []
+                elif stop_below is None:
+                    # The alternation reports one branch - recheck each pattern for full provenance
+                    hits = [group for single, group in singles if single(stripped)]
+                else:
+                    hits = [groups.get(m.lastgroup) or groups.get(None, ())]
+
+            for group in hits:
+                matched.extend(group)
+                taken = 0.0 if whole else min(discount, confidence)
+                if confidence - taken > score:
+                    score, applied = confidence - taken, taken
+            if stop_below is not None and hits and score >= stop_below:
+                break
+
+        return score, applied, list(dict.fromkeys(matched)), evaluated
+
+class DetectionVerdict:
+    """Outcome of one detection pass, with enough provenance to explain it"""
+    __slots__ = ('title', 'is_ad', 'confidence', 'threshold', 'matched_patterns',
+                 'music_discount', 'reason', 'patterns_evaluated', 'exact')
+
+    def __init__(self, title: str, is_ad: bool, confidence: float, threshold: float,
+                 matched_patterns: Tuple[AdPattern, ...] = (), music_discount: float = 0.0,
+                 reason: Optional[str] = None, patterns_evaluated: int = 0, exact: bool = True):
+        self.title = title
+        self.is_ad = is_ad
+        self.confidence = confidence
+        self.threshold = threshold
+        self.matched_patterns = matched_patterns  # AdPatterns that matched, strongest first
+        self.music_discount = music_discount  # Confidence removed because the title looks like music
+        self.reason = reason  # Short-circuit reason: 'empty', 'known_music', 'paused', 'file_path' or None
+        self.patterns_evaluated = patterns_evaluated
+        # False after an early exit: is_ad is final, but confidence and matched_patterns are
+        # only a lower bound (later stages were skipped)
+        self.exact = exact
+
+    def __bool__(self) -> bool:
+        return self.is_ad
+
+    def describe(self) -> str:
+        """One-line explanation for logs and the debugger"""
+        if self.reason:
+            return f"{'AD' if self.is_ad else 'MUSIC'} ({self.reason})"
+        patterns = ', '.join(f"'{p.pattern}' [{p.language} {p.confidence:.2f}]" for p in self.matched_patterns)
+        bound = '' if self.exact else '>='
+        text = f"{'AD' if self.is_ad else 'MUSIC'} confidence {bound}{self.confidence:.2f}/{self.threshold:.2f}"
+        if patterns:
+            text += f" matched {patterns}"
+        if self.music_discount:
+            text += f" (-{self.music_discount:.2f} music format)"
+        return text
+
+    def __repr__(self) -> str:
+        return f"DetectionVerdict({self.title!r}, {self.describe()})"
+
 class EnhancedAdDetector:
-    def __init__(self):
+    def __init__(self, cache_size: int = 512, pattern_dirs: Optional[List[str]] = None,
+                 ad_patterns: Optional[Dict[str, List[AdPattern]]] = None,
+                 reload_interval: float = 2.0, known_music_path: Optional[str] = None,
+                 backend: str = 'patterns', model_path: Optional[str] = None,
+                 early_exit: bool = True):
         self.user_locale = self._get_user_locale()
-        self.ad_patterns = self._load_ad_patterns()
+        # Patterns come from pack files unless given explicitly (e.g. pool workers)
+        self._pack_loader = PatternPackLoader(pattern_dirs) if ad_patterns is None else None
+        self.reload_interval = reload_interval  # Max frequency of pack mtime checks
+        self._last_reload_check = time.monotonic()
+        self.ad_patterns = ad_patterns if ad_patterns is not None else self._load_ad_patterns()
         self.music_patterns = self._load_music_patterns()
-        self.recent_titles = []  # Track recent titles for pattern learning
+        # Learned whitelist of titles that played long enough without being ads
+        self.known_music = KnownMusicStore(known_music_path) if known_music_path else None
+        # Scoring backend: 'patterns' (hand-written AdPatterns) or 'ngram' (trained
+        # model, loaded lazily on first use; falls back to patterns if unavailable)
+        self.backend = backend
+        self.model_path = model_path
+        self._ngram_model = None
+        self._ngram_unavailable = False
+        # Stop pattern evaluation once the verdict can't change (first match, or the
+        # remaining stages are too weak to reach the threshold). Off = exact confidences
+        self.early_exit = early_exit
+        self.evaluations = 0
+        self.patterns_evaluated = 0
+        # LRU verdict cache: the window title only changes every few minutes
+        # while the main loop polls every 300ms-1s
+        self.cache_size = cache_size
+        self._verdict_cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.pattern_version = 0
+        self._compile_patterns()
         
     def _get_user_locale(self) -> str:
         """Get user's system locale"""
@@ -34,165 +280,283 @@ class EnhancedAdDetector:
             return 'en_US'
     
     def _load_ad_patterns(self) -> Dict[str, List[AdPattern]]:
-        """Load ad patterns for different languages/regions"""
-        patterns = {
-            # English patterns
-            'en': [
-                AdPattern("Advertisement", 'en', 0.95, 'exact'),
-                AdPattern("Spotify Free", 'en', 0.90, 'exact'),
-                AdPattern("Spotify Premium", 'en', 0.90, 'exact'),
-                AdPattern("Get Spotify Premium", 'en', 0.85, 'contains'),
-            ],
-            
-            # Swedish patterns (based on "Titta nu")
-            'sv': [
-                AdPattern("Titta nu", 'sv', 0.90, 'exact'),
-                AdPattern("Spotify Free", 'sv', 0.85, 'exact'),
-                AdPattern("Spotify Premium", 'sv', 0.85, 'exact'),
-                AdPattern("Lyssna utan annonser", 'sv', 0.90, 'contains'),  # "Listen without ads"
-                AdPattern("Uppgradera till Premium", 'sv', 0.85, 'contains'),  # "Upgrade to Premium"
-            ],
-            
-            # German patterns
-            'de': [
-                AdPattern("Werbung", 'de', 0.95, 'exact'),  # "Advertisement"
-                AdPattern("Jetzt ansehen", 'de', 0.80, 'exact'),  # "Watch now"
-            ],
-            
-            # Generic patterns (work across languages)
-            'generic': [
-                AdPattern(r"^Spotify$", 'generic', 0.70, 'regex'),  # Just "Spotify" alone
-                AdPattern(r"^\s*$", 'generic', 0.85, 'regex'),  # Empty or whitespace only
-                AdPattern(r"Premium", 'generic', 0.60, 'contains'),  # "Premium" in any language
-                AdPattern(r"Free", 'generic', 0.60, 'contains'),  # "Free" appears in many languages
-                
-                # Common "watch now" patterns in different languages
-                AdPattern("Titta nu", 'generic', 0.85, 'exact'),  # Swedish
-                AdPattern("Watch now", 'generic', 0.85, 'exact'),  # English
-                AdPattern("Jetzt ansehen", 'generic', 0.85, 'exact'),  # German
-                AdPattern("Regarder maintenant", 'generic', 0.85, 'exact'),  # French
-                AdPattern("Ver ahora", 'generic', 0.85, 'exact'),  # Spanish
-                AdPattern("Guarda ora", 'generic', 0.85, 'exact'),  # Italian
-                AdPattern("Bekijk nu", 'generic', 0.85, 'exact'),  # Dutch
-                
-                # Additional common ad patterns
-                AdPattern("Spotify Ad", 'generic', 0.95, 'contains'),  # Direct ad indicator
-                AdPattern("Commercial", 'generic', 0.90, 'contains'),  # Commercial break
-                AdPattern("Upgrade", 'generic', 0.75, 'contains'),  # Upgrade prompts
-                AdPattern("Try Premium", 'generic', 0.80, 'contains'),  # Premium trial ads
-                AdPattern("Get Premium", 'generic', 0.80, 'contains'),  # Premium promotion
-                AdPattern("Ad-free", 'generic', 0.75, 'contains'),  # Ad-free promotion
-                AdPattern("No ads", 'generic', 0.75, 'contains'),  # No ads promotion
-                AdPattern("Listen without", 'generic', 0.75, 'contains'),  # Listen without ads
-                
-                # Short suspicious titles (common for ads)
-                AdPattern(r"^.{1,10}$", 'generic', 0.70, 'regex'),  # Very short titles (1-10 chars)
-                AdPattern(r"^\w+\s*\w*$", 'generic', 0.65, 'regex'),  # 1-2 words only
-                
-                # Video/visual ad indicators
-                AdPattern("Video", 'generic', 0.70, 'contains'),  # Video ads
-                AdPattern("Play", 'generic', 0.60, 'contains'),  # Play button ads
-                AdPattern("Click", 'generic', 0.60, 'contains'),  # Click here ads
-            ]
-        }
+        """Load ad patterns for different languages/regions from the pattern packs"""
+        packs, _ = self._pack_loader.load()
+        patterns: Dict[str, List[AdPattern]] = {}
         
+        for pack in packs:
+            for entry in pack.patterns:
+                pattern = AdPattern(entry['pattern'], entry['language'], entry['confidence'], entry['type'])
+                patterns.setdefault(pattern.language, []).append(pattern)
+        
+        if not patterns:
+            logger.warning(f"No ad pattern packs found in {self._pack_loader.pack_dirs} - "
+                           "only empty titles will be detected as ads")
         return patterns
     
-    def _load_music_patterns(self) -> List[str]:
-        """Patterns that indicate actual music is playing"""
+    def reload_patterns_if_changed(self, force: bool = False) -> bool:
+        """
+        Hot-reload pattern packs when their files change on disk.
+        Checks mtimes at most every `reload_interval` seconds; returns True if reloaded.
+        """
+        if self._pack_loader is None:
+            return False
+        
+        now = time.monotonic()
+        if not force and now - self._last_reload_check < self.reload_interval:
+            return False
+        self._last_reload_check = now
+        
+        if not force and not self._pack_loader.has_changed():
+            return False
+        
+        previous_hash = self._pack_loader.content_hash
+        try:
+            ad_patterns = self._load_ad_patterns()
+        except Exception as e:
+            logger.error(f"Failed to reload pattern packs, keeping current patterns: {e}")
+            return False
+        
+        if self._pack_loader.content_hash == previous_hash:
+            return False  # Touched but identical content - keep the compiled matcher
+        
+        self.update_ad_patterns(ad_patterns)
+        total = sum(len(group) for group in ad_patterns.values())
+        logger.info(f"🔄 Reloaded ad pattern packs ({total} patterns)")
+        return True
+    
+    def _load_music_patterns(self) -> List[Tuple[str, bool]]:
+        """Patterns that indicate actual music is playing, with whether they match the folded title"""
         return [
-            r".+\s-\s.+",  # "Artist - Song" format
-            r".+\s–\s.+",  # "Artist – Song" format (em dash)
-            r".+\sby\s.+",  # "Song by Artist" format
+            (r".+\s-\s.+", True),    # "Artist - Song" format (en/em dashes are folded to '-')
+            (r".+\sby\s.+", False),  # "Song by Artist" format (lowercase 'by' only, so not "... BY Upgrade")
         ]
     
     def _get_relevant_patterns(self) -> List[AdPattern]:
         """Get ad patterns relevant to user's locale"""
-        patterns = []
+        # dict.fromkeys keeps first-seen order and drops duplicates in O(n)
+        patterns = {}
         
         # Get locale-specific patterns
         locale_code = self.user_locale.split('_')[0].lower()
         if locale_code in self.ad_patterns:
-            patterns.extend(self.ad_patterns[locale_code])
+            patterns.update(dict.fromkeys(self.ad_patterns[locale_code]))
         
         # Always include ALL language patterns for international users
         # Spotify serves ads in different languages regardless of system locale
         for lang_patterns in self.ad_patterns.values():
-            for pattern in lang_patterns:
-                if pattern not in patterns:  # Avoid duplicates
-                    patterns.append(pattern)
+            patterns.update(dict.fromkeys(lang_patterns))
         
-        return patterns
+        return list(patterns)
+    
+    def _compile_patterns(self):
+        """Compile the ad and music patterns once so each poll is a single pass"""
+        locale_code = self.user_locale.split('_')[0].lower()
+        self._matcher = CompiledPatternMatcher(self._get_relevant_patterns(), locale_code)
+        self._music_regex_folded = re.compile('|'.join(f"(?:{p})" for p, folded in self.music_patterns if folded) or '(?!)')
+        self._music_regex = re.compile('|'.join(f"(?:{p})" for p, folded in self.music_patterns if not folded) or '(?!)')
+        # Cached verdicts were computed against the old pattern set
+        self.pattern_version += 1
+        self.clear_cache()
+    
+    def update_ad_patterns(self, ad_patterns: Dict[str, List[AdPattern]]):
+        """Replace the ad pattern set and recompile (invalidates cached verdicts)"""
+        self.ad_patterns = ad_patterns
+        self._compile_patterns()
+    
+    def observe_playback(self, verdict: DetectionVerdict, is_ad: Optional[bool] = None):
+        """
+        Feed the verdict for the title currently playing so long-playing music is learned.
+        Pass `is_ad` when the final decision came from elsewhere (e.g. MPRIS track ids).
+        """
+        if self.known_music is not None and verdict.reason is None:
+            self.known_music.observe(verdict.title, verdict.is_ad if is_ad is None else is_ad)
+    
+    def close(self):
+        """Persist learned state (call on shutdown)"""
+        if self.known_music is not None:
+            self.known_music.flush()
+    
+    def clear_cache(self):
+        """Drop all cached verdicts (hit/miss counters are kept)"""
+        self._verdict_cache.clear()
+    
+    def cache_info(self) -> Dict[str, int]:
+        """Verdict cache statistics for logging and status output"""
+        return {
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'size': len(self._verdict_cache),
+            'max_size': self.cache_size,
+            'pattern_version': self.pattern_version,
+            'evaluations': self.evaluations,
+            'patterns_per_evaluation': round(self.patterns_evaluated / self.evaluations, 1) if self.evaluations else 0.0,
+            'pattern_count': self._matcher.pattern_count,
+        }
     
     def is_ad_playing(self, window_title: str, confidence_threshold: float = 0.6) -> bool:
         """
         Determine if an ad is playing based on window title
         """
-        if not window_title or not window_title.strip():
-            return True  # Empty titles are usually ads
-        
-        title = window_title.strip()
+        return self.detect(window_title, confidence_threshold).is_ad
+    
+    def detect(self, window_title: str, confidence_threshold: float = 0.6) -> DetectionVerdict:
+        """
+        Classify a window title and return the full verdict (memoized per title)
+        """
+        if self._pack_loader is not None:
+            self.reload_patterns_if_changed()
         
-        # Special handling for common non-ad states
-        if self._is_paused_or_idle_state(title):
-            return False  # Don't treat paused music as ads
+        title = normalize_title(window_title).stripped
+        key = (title, confidence_threshold)
         
-        # Check if it's clearly a file path or executable (wrong window detection)
-        if self._is_file_path(title):
-            return False  # This indicates wrong window, not an ad
+        cache = self._verdict_cache
+        verdict = cache.get(key)
+        if verdict is not None:
+            cache.move_to_end(key)
+            self.cache_hits += 1
+            return verdict
         
-        max_confidence = 0.0
+        self.cache_misses += 1
+        verdict = self._evaluate(title, confidence_threshold, self.early_exit)
+        if self.cache_size > 0:
+            cache[key] = verdict
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)  # Evict least recently used
+        return verdict
+    
+    def classify_many(self, titles: Iterable[str], confidence_threshold: float = 0.6,
+                      processes: int = 0, batch_size: int = 10000,
+                      early_exit: bool = False) -> Iterator[Tuple[str, DetectionVerdict]]:
+        """
+        Classify a stream of window titles, yielding (title, verdict) in input order.
+
+        Titles are consumed in batches of `batch_size`; repeated titles within a batch
+        are scored once. With `processes` > 1 each batch is spread across a process pool.
+        Bypasses the LRU verdict cache so offline corpora don't evict live entries.
+        Evaluates every pattern by default so offline analysis sees true confidences.
+        """
+        pool = None
+        if processes and processes > 1:
+            pool = multiprocessing.Pool(processes, initializer=_init_pool_detector,
+                                        initargs=(self.ad_patterns, self.backend, self.model_path))
+        try:
+            iterator = iter(titles)
+            while True:
+                batch = list(islice(iterator, batch_size))
+                if not batch:
+                    break
+                
+                unique = list(dict.fromkeys(normalize_title(title).stripped for title in batch))
+                if pool is not None:
+                    chunksize = max(1, len(unique) // (processes * 4))
+                    worker = partial(_pool_evaluate, confidence_threshold=confidence_threshold,
+                                     early_exit=early_exit)
+                    verdicts = dict(zip(unique, pool.map(worker, unique, chunksize)))
+                else:
+                    verdicts = dict(zip(unique, self._evaluate_many(unique, confidence_threshold, early_exit)))
+                
+                for title in batch:
+                    yield title, verdicts[normalize_title(title).stripped]
+        finally:
+            if pool is not None:
+                pool.terminate()
+    
+    def _evaluate(self, title: str, confidence_threshold: float, early_exit: bool = False) -> DetectionVerdict:
+        """Uncached classification of an already stripped title"""
+        return self._evaluate_many([title], confidence_threshold, early_exit)[0]
+    
+    def _evaluate_many(self, titles: List[str], confidence_threshold: float,
+                       early_exit: bool = False) -> List[DetectionVerdict]:
+        """Uncached classification of stripped titles; the n-gram backend scores them as one batch"""
+        records = [normalize_title(title) for title in titles]
+        verdicts = [self._short_circuit(record, confidence_threshold) for record in records]
+        pending = [i for i, verdict in enumerate(verdicts) if verdict is None]
+        if not pending:
+            return verdicts
         
-        # Check against known ad patterns
-        for pattern in self._get_relevant_patterns():
-            if pattern.pattern_type == 'exact':
-                if title == pattern.pattern:
-                    max_confidence = max(max_confidence, pattern.confidence)
-            elif pattern.pattern_type == 'contains':
-                if pattern.pattern.lower() in title.lower():
-                    max_confidence = max(max_confidence, pattern.confidence)
-            elif pattern.pattern_type == 'regex':
-                if re.search(pattern.pattern, title, re.IGNORECASE):
-                    max_confidence = max(max_confidence, pattern.confidence)
+        model = self._get_ngram_model() if self.backend == 'ngram' else None
+        if model is not None:
+            probabilities = model.predict_proba([titles[i] for i in pending])
+            for i, probability in zip(pending, probabilities):
+                confidence = float(probability)
+                verdicts[i] = DetectionVerdict(titles[i], confidence >= confidence_threshold,
+                                               confidence, confidence_threshold)
+        else:
+            for i in pending:
+                verdicts[i] = self._pattern_verdict(records[i], confidence_threshold, early_exit)
+        return verdicts
+    
+    def _short_circuit(self, record: NormalizedTitle, confidence_threshold: float) -> Optional[DetectionVerdict]:
+        """Verdict for titles that need no scoring (empty, known music, paused, file path)"""
+        title = record.stripped
+        if not title:
+            # Empty titles are usually ads
+            return DetectionVerdict(title, True, 1.0, confidence_threshold, reason='empty')
         
-        # Check if it looks like music (Artist - Song format)
-        for music_pattern in self.music_patterns:
-            if re.search(music_pattern, title):
-                max_confidence = max(0.0, max_confidence - 0.4)  # Reduce confidence if it looks like music
-                break
+        # Learned music is fast-pathed before any pattern evaluation
+        if self.known_music is not None and title in self.known_music:
+            return DetectionVerdict(title, False, 0.0, confidence_threshold, reason='known_music')
         
-        return max_confidence >= confidence_threshold
-    
-    def _is_paused_or_idle_state(self, title: str) -> bool:
-        """Check if Spotify is in a paused or idle state (not an ad)"""
-        paused_indicators = [
-            "Spotify Free",  # Common when paused
-            "Spotify Premium",  # Common when paused
-            "Spotify",  # Just "Spotify" when idle
-        ]
+        # Special handling for common non-ad states
+        if record.is_paused:
+            # Don't treat paused music as ads
+            return DetectionVerdict(title, False, 0.0, confidence_threshold, reason='paused')
         
-        # If it's exactly one of these without additional content, it's likely paused
-        title_clean = title.strip()
-        for indicator in paused_indicators:
-            if title_clean == indicator:
-                return True  # This is paused/idle, not an ad
+        # Check if it's clearly a file path or executable (wrong window detection)
+        if record.is_path:
+            # This indicates wrong window, not an ad
+            return DetectionVerdict(title, False, 0.0, confidence_threshold, reason='file_path')
         
-        return False
+        return None
     
-    def _is_file_path(self, title: str) -> bool:
-        """Check if the title is actually a file path (wrong window detection)"""
-        path_indicators = [
-            ':\\',  # Windows drive letter
-            '.exe',  # Executable file
-            '/',    # Unix path separator
-            '\\',   # Windows path separator
-        ]
+    def _pattern_verdict(self, record: NormalizedTitle, confidence_threshold: float,
+                         early_exit: bool = False) -> DetectionVerdict:
+        """Score a normalized title against the compiled AdPatterns"""
+        # Check if it looks like music (Artist - Song format) first: the discount
+        # raises the confidence a pattern needs to reach the threshold
+        looks_like_music = (self._music_regex_folded.search(record.folded) is not None or
+                            self._music_regex.search(record.stripped) is not None)
+        # Small epsilon so float rounding (0.9 - 0.4) doesn't skip a stage that reaches it
+        stop_below = confidence_threshold - 1e-9 if early_exit else None
         
-        for indicator in path_indicators:
-            if indicator in title:
-                return True
+        # Check against known ad patterns in descending confidence order
+        confidence, music_discount, matched, evaluated = self._matcher.match(
+            record, stop_below, MUSIC_DISCOUNT if looks_like_music else 0.0)
+        self.evaluations += 1
+        self.patterns_evaluated += evaluated
         
-        return False
+        matched.sort(key=lambda p: -p.confidence)
+        return DetectionVerdict(record.stripped, confidence >= confidence_threshold, confidence,
+                                confidence_threshold, tuple(matched), music_discount,
+                                patterns_evaluated=evaluated, exact=not early_exit)
+    
+    def _get_ngram_model(self):
+        """Lazily import NumPy and load the n-gram model on first use"""
+        if self._ngram_model is None and not self._ngram_unavailable:
+            try:
+                from ngram_classifier import NgramAdClassifier, DEFAULT_MODEL_PATH
+                path = self.model_path or DEFAULT_MODEL_PATH
+                self._ngram_model = NgramAdClassifier.load(path)
+                logger.info(f"🧠 Loaded n-gram ad classifier: {path}")
+            except Exception as e:
+                # ImportError (no NumPy), missing or corrupt model file
+                logger.warning(f"N-gram backend unavailable, using pattern matching: {e}")
+                self._ngram_unavailable = True
+        return self._ngram_model
+
+# Per-process detector for EnhancedAdDetector.classify_many worker pools
+_pool_detector: Optional[EnhancedAdDetector] = None
+
+def _init_pool_detector(ad_patterns: Dict[str, List[AdPattern]], backend: str, model_path: Optional[str]):
+    """Pool initializer: build one detector per worker with the parent's patterns"""
+    global _pool_detector
+    _pool_detector = EnhancedAdDetector(cache_size=0, ad_patterns=ad_patterns,
+                                        backend=backend, model_path=model_path)
+
+def _pool_evaluate(title: str, confidence_threshold: float, early_exit: bool = False) -> DetectionVerdict:
+    """Classify one stripped title in a pool worker"""
+    return _pool_detector._evaluate(title, confidence_threshold, early_exit)
 
 # Test the enhanced detector
 def run_international_test():
@@ -0,0 +1,138 @@
+"""
+Learned known-music whitelist for Spotify Ad Silencer
+Remembers titles that played long enough without being an ad so they skip pattern matching
+"""
+
+import os
+import sys
+import time
+import bisect
+import hashlib
+import logging
+from array import array
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+FILE_MAGIC = b'KMS1'
+
+def title_hash(title: str) -> int:
+    """Stable 64-bit hash of a (stripped) window title"""
+    return int.from_bytes(hashlib.blake2b(title.encode('utf-8'), digest_size=8).digest(), 'little')
+
+class KnownMusicStore:
+    """
+    Persistent set of known-music titles stored as 64-bit hashes.
+
+    On disk: magic + uint64 hashes in insertion order (oldest first), 8 bytes per
+    title. In memory: a sorted copy of the same hashes for bisect lookups plus a
+    small exact tier of recently learned hashes that have not been merged yet.
+    Writes are batched; once `max_entries` is exceeded the oldest titles are dropped.
+    """
+
+    def __init__(self, path: str = "known_music.bin", dwell_seconds: float = 90.0,
+                 max_entries: int = 200000, batch_size: int = 32, flush_interval: float = 300.0):
+        self.path = path
+        self.dwell_seconds = dwell_seconds  # Continuous non-ad play needed before a title is learned
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._order = array('Q')   # Insertion order, mirrors the file
+        self._sorted = array('Q')  # Same hashes, sorted for bisect
+        self._pending = set()      # Learned since the last flush
+        self._last_flush = time.monotonic()
+        self._current_title: Optional[str] = None
+        self._current_since = 0.0
+        self._current_learned = False
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._sorted) + len(self._pending)
+
+    def __contains__(self, title: str) -> bool:
+        key = title_hash(title)
+        if key in self._pending:
+            return True
+        index = bisect.bisect_left(self._sorted, key)
+        return index < len(self._sorted) and self._sorted[index] == key
+
+    def _load(self):
+        """Load the hash file; a missing or corrupt file starts an empty store"""
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logger.warning(f"Failed to read known music store: {e}")
+            return
+
+        if data[:4] != FILE_MAGIC or (len(data) - 4) % 8:
+            logger.warning(f"Ignoring corrupt known music store: {self.path}")
+            return
+
+        self._order.frombytes(data[4:])
+        if sys.byteorder != 'little':
+            self._order.byteswap()  # File is always little-endian
+        self._sorted = array('Q', sorted(self._order))
+        logger.debug(f"Loaded {len(self._order)} known music titles")
+
+    def add(self, title: str):
+        """Learn a title as music (persisted on the next batched flush)"""
+        if title in self:
+            return
+        self._pending.add(title_hash(title))
+        self.maybe_flush()
+
+    def observe(self, title: str, is_ad: bool, now: Optional[float] = None):
+        """
+        Feed the title currently playing. A title shown continuously for
+        `dwell_seconds` without being classified as an ad is learned.
+        """
+        now = time.monotonic() if now is None else now
+
+        if title != self._current_title or is_ad:
+            # New title (or an ad verdict) restarts the dwell clock
+            self._current_title = None if is_ad else title
+            self._current_since = now
+            self._current_learned = False
+            return
+
+        if not self._current_learned and now - self._current_since >= self.dwell_seconds:
+            self._current_learned = True
+            self.add(title)
+
+    def maybe_flush(self):
+        """Flush if enough titles are pending or the flush interval has passed"""
+        if not self._pending:
+            return
+        if (len(self._pending) >= self.batch_size or
+                time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """Merge pending titles, enforce the size bound and rewrite the file atomically"""
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+
+        self._order.extend(sorted(self._pending))
+        self._pending.clear()
+        if len(self._order) > self.max_entries:
+            del self._order[:len(self._order) - self.max_entries]  # Drop the oldest
+        self._sorted = array('Q', sorted(self._order))
+
+        data = self._order
+        if sys.byteorder != 'little':
+            data = array('Q', data)
+            data.byteswap()
+
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(FILE_MAGIC)
+                f.write(data.tobytes())
+            os.replace(temp_path, self.path)
+            logger.debug(f"Saved {len(self._order)} known music titles")
+        except OSError as e:
+            logger.warning(f"Failed to save known music store: {e}")
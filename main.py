@@ -12,14 +12,25 @@ Enhanced cross-platform Spotify ad detection and silencing tool.
 import time
 import psutil
 import platform
-import subprocess
 import os
 import sys
 import logging
 import random
 import glob
+import threading
 from typing import Optional, Dict, Any
 from version import __version__ as APP_VERSION
+from title_normalization import normalize_title
+from process_events import process_scanner
+from capabilities import capabilities
+from command_executor import command_executor
+from pulse_streams import LatencyHistogram, SinkInputIndex, is_spotify_stream
+from pipewire_backend import shared_streams
+from volume_snapshots import VolumeSnapshotStore, stream_key
+from audio_fades import FADE_CURVE, FADE_SECONDS, fade_scheduler
+from mute_actuator import MuteActuator
+from window_backends import PollingBackend, SpotifyWindow, WindowBackend, create_backends, register_backend
+from session_recorder import RecordingAudioController, RecordingAudioPlayer, SessionRecorder, open_session_recorder
 
 # Try to import pygame for audio playback
 try:
@@ -37,6 +48,10 @@ logger = logging.getLogger(__name__)
 
 # Detect the operating system
 CURRENT_OS = platform.system().lower()
+
+# Deadlines for external tools: a hung X server or AppleScript call must not stall the loop
+WINDOW_COMMAND_TIMEOUT = 1.0
+AUDIO_COMMAND_TIMEOUT = 3.0
 logger.info(f"Detected OS: {CURRENT_OS}")
 
 # Import platform-specific libraries
@@ -64,18 +79,31 @@ elif CURRENT_OS == 'linux':
     try:
         import pulsectl
         LINUX_LIBS_AVAILABLE = True
-    except ImportError as e:
+    except (ImportError, OSError) as e:  # OSError: libpulse itself is missing
         logger.warning(f"Linux audio libraries not available: {e}")
         LINUX_LIBS_AVAILABLE = False
 else:
     logger.warning(f"Unsupported OS: {CURRENT_OS}")
 
 class ProcessSpecificAudioController:
-    def __init__(self):
+    def __init__(self, config_dir: str = ".", fade_seconds: float = FADE_SECONDS, fade_curve: str = FADE_CURVE):
         self.is_spotify_muted = False
-        self.spotify_original_volume = 1.0
         self.spotify_process_names = self._get_spotify_process_names()
+        self.stream_index = None  # Linux: Spotify sink inputs kept current by PulseAudio events
+        self.pipewire = None      # Linux: Spotify's stream nodes, when PipeWire is controlled natively
+        # Time from a mute request to the streams being found and changed, per lookup path
+        self.mute_latency = {'index': LatencyHistogram(), 'scan': LatencyHistogram(),
+                             'pipewire': LatencyHistogram()}
+        # Per-stream volumes from before the mute, also on disk in case we crash while muted
+        self.volume_snapshots = VolumeSnapshotStore(config_dir)
+        self._reconcile_pending = False
+        # Optional ramps instead of instant mute/unmute; the lock keeps the fade thread's
+        # volume steps and the main loop's mute changes from interleaving
+        self.fade_seconds = fade_seconds
+        self.fade_curve = fade_curve
+        self._lock = threading.RLock()
         self._setup_audio_control()
+        self._reconcile_volume_snapshot()
     
     def _get_spotify_process_names(self):
         """Get Spotify process names for the current OS"""
@@ -94,7 +122,7 @@ class ProcessSpecificAudioController:
             self._setup_windows_audio()
         elif CURRENT_OS == 'darwin':
             self._setup_macos_audio()
-        elif CURRENT_OS == 'linux' and LINUX_LIBS_AVAILABLE:
+        elif CURRENT_OS == 'linux' and (LINUX_LIBS_AVAILABLE or capabilities.available('pipewire')):
             self._setup_linux_audio()
         else:
             logger.warning("Process-specific audio control not available on this platform")
@@ -111,24 +139,147 @@ class ProcessSpecificAudioController:
         logger.debug("macOS process-specific audio control initialized")
     
     def _setup_linux_audio(self):
-        """Setup Linux audio control using PulseAudio"""
+        """Setup Linux audio control: PulseAudio, or PipeWire natively with SPOTIFY_AUDIO_BACKEND=pipewire"""
+        if capabilities.available('pipewire'):
+            try:
+                self.pipewire = shared_streams(self.spotify_process_names)
+                logger.debug("Linux PipeWire process-specific control initialized")
+                return
+            except Exception as e:
+                logger.warning(f"Native PipeWire control not available, using PulseAudio: {e}")
+        if not LINUX_LIBS_AVAILABLE:
+            logger.warning("Process-specific audio control not available on this platform")
+            return
+        
         try:
             self.pulse = pulsectl.Pulse('spotify-ad-silencer')
             logger.debug("Linux PulseAudio process-specific control initialized")
         except Exception as e:
             logger.error(f"Failed to setup Linux audio control: {e}")
             self.pulse = None
+            return
+        
+        try:
+            self.stream_index = SinkInputIndex(self.spotify_process_names).start()
+        except Exception as e:
+            logger.debug(f"Sink input index not available, scanning streams on each mute: {e}")
+    
+    def close(self):
+        """Stop background listeners and report mute latency"""
+        if self.stream_index is not None:
+            self.stream_index.close()
+            self.stream_index = None
+        if self.pipewire is not None:
+            self.pipewire.close()
+        for path, histogram in self.mute_latency.items():
+            if histogram.total:
+                logger.debug(f"Mute latency ({path}): {histogram.describe()}")
+    
+    def _reconcile_volume_snapshot(self):
+        """Undo a mute left behind by a run that stopped while Spotify was muted"""
+        if not self._reconcile_pending:
+            if not self.volume_snapshots.load():
+                return
+            self._reconcile_pending = True
+            logger.info(f"🔈 Found Spotify volumes saved by a run that ended while muted ({self.volume_snapshots.snapshot_file})")
+        # Only streams that are still silent: anything else was changed since
+        restored = self._restore_volumes(only_silent=True)
+        if restored is None:
+            return  # Spotify (or its streams) not there yet; retried on the next mute change
+        self._reconcile_pending = False
+        self.volume_snapshots.clear()
+        if restored:
+            logger.info(f"🔊 Restored the volume of {restored} Spotify stream(s) muted by the earlier run")
+    
+    def _restore_volumes(self, only_silent: bool = False) -> Optional[int]:
+        """Put the snapshot's volumes back in one pass; streams restored, or None if none were found"""
+        if CURRENT_OS == 'windows' and WINDOWS_LIBS_AVAILABLE:
+            return self._restore_volumes_windows(self._spotify_sessions(), only_silent)
+        elif CURRENT_OS == 'darwin':
+            return self._restore_volumes_macos(only_silent)
+        elif CURRENT_OS == 'linux' and self.pipewire is not None:
+            return self._restore_volumes_pipewire(self.pipewire.streams(), only_silent)
+        elif CURRENT_OS == 'linux' and getattr(self, 'pulse', None):
+            return self._restore_volumes_linux(self._spotify_inputs()[1], only_silent)
+        return None
     
     def set_spotify_mute(self, mute: bool):
         """Set Spotify process audio mute state (cross-platform)"""
-        if CURRENT_OS == 'windows':
-            self._set_spotify_mute_windows(mute)
+        with self._lock:
+            if self._reconcile_pending:
+                self._reconcile_volume_snapshot()
+            if self.fade_seconds > 0 and CURRENT_OS in ('windows', 'darwin', 'linux'):
+                self._fade_spotify(mute)
+            elif CURRENT_OS == 'windows':
+                self._set_spotify_mute_windows(mute)
+            elif CURRENT_OS == 'darwin':
+                self._set_spotify_mute_macos(mute)
+            elif CURRENT_OS == 'linux':
+                self._set_spotify_mute_linux(mute)
+            else:
+                logger.warning("Process-specific mute operation not supported on this platform")
+    
+    def _fade_spotify(self, mute: bool):
+        """
+        Ramp Spotify's streams down to silence or back to their saved volumes on
+        the fade thread. A new request turns a ramp still in flight around from
+        the level it reached, e.g. when an ad turns out to be music after all.
+        """
+        if mute == self.is_spotify_muted:
+            return
+        try:
+            targets = self._volume_targets()
+        except Exception as e:
+            logger.error(f"Failed to control Spotify audio: {e}")
+            return
+        if not targets:
+            logger.warning("No Spotify audio streams found")
+            return
+        
+        if mute and not self.volume_snapshots.volumes:
+            # Snapshot (and save) full volumes - not ones an unfinished fade-in left behind
+            self.volume_snapshots.capture((key, volume) for key, volume, _ in targets)
+        levels = []
+        for key, _, set_volume in targets:
+            level = self.volume_snapshots.volume_for(key)
+            if level is not None:
+                levels.append((set_volume, level))
+        
+        def apply(fraction: float):
+            with self._lock:
+                for set_volume, level in levels:
+                    set_volume(level * fraction)
+        
+        fade_scheduler.start('spotify', apply, 0.0 if mute else 1.0, self.fade_seconds, self.fade_curve,
+                             on_done=None if mute else self._finish_fade_in)
+        self.is_spotify_muted = mute
+        logger.debug(f"Fading Spotify {'out' if mute else 'in'} over {self.fade_seconds * 1000:.0f}ms")
+    
+    def _finish_fade_in(self):
+        """Set the exact saved volumes once a fade-in completes (runs on the fade thread)"""
+        with self._lock:
+            if self.is_spotify_muted:
+                return  # Muted again meanwhile
+            self._restore_volumes()
+            self.volume_snapshots.clear()
+    
+    def _volume_targets(self):
+        """(stream key, current volume, volume setter) for each Spotify stream"""
+        if CURRENT_OS == 'windows' and WINDOWS_LIBS_AVAILABLE:
+            return [(stream_key(pid=session.Process.pid), session.SimpleAudioVolume.GetMasterVolume(),
+                     lambda level, volume=session.SimpleAudioVolume: volume.SetMasterVolume(level, None))
+                    for session in self._spotify_sessions()]
         elif CURRENT_OS == 'darwin':
-            self._set_spotify_mute_macos(mute)
-        elif CURRENT_OS == 'linux':
-            self._set_spotify_mute_linux(mute)
-        else:
-            logger.warning("Process-specific mute operation not supported on this platform")
+            return [(stream_key(), self._get_volume_macos(), self._set_volume_macos)]
+        elif CURRENT_OS == 'linux' and self.pipewire is not None:
+            return [(self._node_key(node), node.volume,
+                     lambda level, node=node: self.pipewire.set_volume(node, level))
+                    for node in self.pipewire.streams()]
+        elif CURRENT_OS == 'linux' and getattr(self, 'pulse', None):
+            return [(self._sink_input_key(sink_input), sink_input.volume.value_flat,
+                     lambda level, sink_input=sink_input: self.pulse.volume_set_all_chans(sink_input, level))
+                    for sink_input in self._spotify_inputs()[1]]
+        return []
     
     def _set_spotify_mute_windows(self, mute: bool):
         """Windows-specific Spotify process mute control"""
@@ -137,66 +288,68 @@ class ProcessSpecificAudioController:
             return
         
         try:
-            # Get all audio sessions
-            sessions = AudioUtilities.GetAllSessions()
-            spotify_sessions = []
-            
-            # Find Spotify audio sessions
-            for session in sessions:
-                if session.Process and session.Process.name() in self.spotify_process_names:
-                    spotify_sessions.append(session)
+            spotify_sessions = self._spotify_sessions()
             
             if not spotify_sessions:
                 logger.warning("No Spotify audio sessions found")
                 return
             
-            # Control each Spotify session
-            for session in spotify_sessions:
-                volume = session.SimpleAudioVolume
-                if mute and not self.is_spotify_muted:
-                    # Store original volume before muting
-                    self.spotify_original_volume = volume.GetMasterVolume()
-                    volume.SetMute(True, None)
+            if mute and not self.is_spotify_muted:
+                # Snapshot every session's volume (and save it) before muting any of them
+                self.volume_snapshots.capture(
+                    (stream_key(pid=session.Process.pid), session.SimpleAudioVolume.GetMasterVolume())
+                    for session in spotify_sessions)
+                for session in spotify_sessions:
+                    session.SimpleAudioVolume.SetMute(True, None)
                     logger.debug(f"Muted Spotify process (PID: {session.Process.pid})")
-                elif not mute and self.is_spotify_muted:
-                    # Unmute and restore original volume
-                    volume.SetMute(False, None)
-                    volume.SetMasterVolume(self.spotify_original_volume, None)
-                    logger.debug(f"Unmuted Spotify process (PID: {session.Process.pid})")
+            elif not mute and self.is_spotify_muted:
+                self._restore_volumes_windows(spotify_sessions)
+                self.volume_snapshots.clear()
             
             self.is_spotify_muted = mute
             
         except Exception as e:
             logger.error(f"Failed to control Spotify audio on Windows: {e}")
     
+    def _spotify_sessions(self):
+        """Spotify's Windows audio sessions"""
+        return [session for session in AudioUtilities.GetAllSessions()
+                if session.Process and session.Process.name() in self.spotify_process_names]
+    
+    def _restore_volumes_windows(self, spotify_sessions, only_silent: bool = False) -> Optional[int]:
+        if not spotify_sessions:
+            return None
+        by_key = {stream_key(pid=session.Process.pid): session for session in spotify_sessions}
+        restored = 0
+        for key, level in self.volume_snapshots.restore_plan(by_key):
+            volume = by_key[key].SimpleAudioVolume
+            if only_silent and not volume.GetMute() and volume.GetMasterVolume() > 0:
+                continue
+            volume.SetMute(False, None)
+            volume.SetMasterVolume(level, None)
+            restored += 1
+            logger.debug(f"Unmuted Spotify process (PID: {by_key[key].Process.pid})")
+        return restored
+    
     def _set_spotify_mute_macos(self, mute: bool):
         """macOS-specific Spotify process mute control using AppleScript"""
         try:
             if mute and not self.is_spotify_muted:
-                # Get current Spotify volume
-                result = subprocess.run([
-                    'osascript', '-e', 
-                    'tell application "Spotify" to get sound volume'
-                ], capture_output=True, text=True)
-                
-                if result.returncode == 0:
-                    self.spotify_original_volume = int(result.stdout.strip())
+                # Snapshot Spotify's volume (and save it) first: never mute what can't be restored
+                self.volume_snapshots.capture([(stream_key(), self._get_volume_macos())])
                 
                 # Mute Spotify
-                subprocess.run([
+                command_executor.run([
                     'osascript', '-e', 
                     'tell application "Spotify" to set sound volume to 0'
-                ], check=True)
+                ], timeout=AUDIO_COMMAND_TIMEOUT, persistent=True).check_returncode()
                 
                 self.is_spotify_muted = True
                 logger.info("Muted Spotify on macOS")
                 
             elif not mute and self.is_spotify_muted:
-                # Restore Spotify volume
-                subprocess.run([
-                    'osascript', '-e', 
-                    f'tell application "Spotify" to set sound volume to {self.spotify_original_volume}'
-                ], check=True)
+                self._restore_volumes_macos()
+                self.volume_snapshots.clear()
                 
                 self.is_spotify_muted = False
                 logger.info("Unmuted Spotify on macOS")
@@ -204,59 +357,179 @@ class ProcessSpecificAudioController:
         except Exception as e:
             logger.error(f"Failed to control Spotify audio on macOS: {e}")
     
+    def _get_volume_macos(self) -> int:
+        result = command_executor.run([
+            'osascript', '-e', 
+            'tell application "Spotify" to get sound volume'
+        ], timeout=AUDIO_COMMAND_TIMEOUT, persistent=True)
+        result.check_returncode()
+        return int(result.stdout.strip())
+    
+    def _restore_volumes_macos(self, only_silent: bool = False) -> Optional[int]:
+        level = self.volume_snapshots.volume_for(stream_key())
+        if level is None:
+            return 0
+        if only_silent:
+            try:
+                if self._get_volume_macos() != 0:
+                    return 0
+            except Exception:
+                return None  # Spotify not running yet
+        self._set_volume_macos(level)
+        return 1
+    
+    def _set_volume_macos(self, level: float):
+        command_executor.run([
+            'osascript', '-e', 
+            f'tell application "Spotify" to set sound volume to {int(round(level))}'
+        ], timeout=AUDIO_COMMAND_TIMEOUT, persistent=True).check_returncode()
+    
     def _set_spotify_mute_linux(self, mute: bool):
         """Linux-specific Spotify process mute control using PulseAudio"""
+        if self.pipewire is not None:
+            self._set_spotify_mute_pipewire(mute)
+            return
         if not hasattr(self, 'pulse') or not self.pulse:
             logger.warning("Linux audio control not available")
             return
         
         try:
-            # Get all sink inputs (application audio streams)
-            sink_inputs = self.pulse.sink_input_list()
-            spotify_inputs = []
-            
-            # Find Spotify sink inputs
-            for sink_input in sink_inputs:
-                if hasattr(sink_input, 'proplist') and sink_input.proplist:
-                    app_name = sink_input.proplist.get('application.name', '').lower()
-                    process_name = sink_input.proplist.get('application.process.binary', '').lower()
-                    
-                    if ('spotify' in app_name or 
-                        any(proc.lower() in process_name for proc in self.spotify_process_names)):
-                        spotify_inputs.append(sink_input)
+            started = time.perf_counter()
+            path, spotify_inputs = self._spotify_inputs()
             
             if not spotify_inputs:
                 logger.warning("No Spotify audio streams found")
                 return
             
-            # Control each Spotify audio stream
-            for sink_input in spotify_inputs:
-                if mute and not self.is_spotify_muted:
-                    # Store original volume before muting
-                    self.spotify_original_volume = sink_input.volume.value_flat
+            if mute and not self.is_spotify_muted:
+                # Snapshot every stream's volume (and save it) before muting any of them
+                self.volume_snapshots.capture((self._sink_input_key(sink_input), sink_input.volume.value_flat)
+                                              for sink_input in spotify_inputs)
+                for sink_input in spotify_inputs:
                     self.pulse.volume_set_all_chans(sink_input, 0.0)
                     logger.debug(f"Muted Spotify audio stream (index: {sink_input.index})")
-                elif not mute and self.is_spotify_muted:
-                    # Restore original volume
-                    self.pulse.volume_set_all_chans(sink_input, self.spotify_original_volume)
-                    logger.debug(f"Unmuted Spotify audio stream (index: {sink_input.index})")
+            elif not mute and self.is_spotify_muted:
+                self._restore_volumes_linux(spotify_inputs)
+                self.volume_snapshots.clear()
             
+            self.mute_latency[path].record(time.perf_counter() - started)
             self.is_spotify_muted = mute
             
         except Exception as e:
             logger.error(f"Failed to control Spotify audio on Linux: {e}")
 
+    def _set_spotify_mute_pipewire(self, mute: bool):
+        """Mute Spotify's PipeWire stream nodes (mute flag in Props, confirmed by the graph monitor)"""
+        try:
+            started = time.perf_counter()
+            nodes = self.pipewire.streams()
+            
+            if not nodes:
+                logger.warning("No Spotify audio streams found")
+                return
+            
+            confirmed = True
+            if mute and not self.is_spotify_muted:
+                # Snapshot every stream's volume (and save it) before muting any of them
+                self.volume_snapshots.capture((self._node_key(node), node.volume) for node in nodes)
+                confirmed = self.pipewire.set_mute(nodes, True, timeout=AUDIO_COMMAND_TIMEOUT)
+                logger.debug(f"Muted Spotify audio streams (nodes: {[node.id for node in nodes]})")
+            elif not mute and self.is_spotify_muted:
+                self._restore_volumes_pipewire(nodes)
+                self.volume_snapshots.clear()
+            if not confirmed:
+                logger.warning("PipeWire did not confirm the mute change in time")
+            
+            self.mute_latency['pipewire'].record(time.perf_counter() - started)
+            self.is_spotify_muted = mute
+            
+        except Exception as e:
+            logger.error(f"Failed to control Spotify audio via PipeWire: {e}")
+
+    def _restore_volumes_pipewire(self, nodes, only_silent: bool = False) -> Optional[int]:
+        if not nodes:
+            return None
+        by_key = {self._node_key(node): node for node in nodes}
+        restored = 0
+        unmute = []
+        for key, level in self.volume_snapshots.restore_plan(by_key):
+            node = by_key[key]
+            if only_silent and not node.mute and node.volume > 0:
+                continue
+            if node.mute:
+                unmute.append(node)
+            if abs(node.volume - level) > 0.005:
+                self.pipewire.set_volume(node, level)  # Left lower by a fade
+            restored += 1
+        if unmute:
+            # One batch for all nodes
+            self.pipewire.set_mute(unmute, False, timeout=AUDIO_COMMAND_TIMEOUT)
+            logger.debug(f"Unmuted Spotify audio streams (nodes: {[node.id for node in unmute]})")
+        return restored
+
+    @staticmethod
+    def _node_key(node) -> str:
+        return stream_key(node.id, node.pid)
+
+    def _restore_volumes_linux(self, spotify_inputs, only_silent: bool = False) -> Optional[int]:
+        if not spotify_inputs:
+            return None
+        by_key = {self._sink_input_key(sink_input): sink_input for sink_input in spotify_inputs}
+        restored = 0
+        for key, level in self.volume_snapshots.restore_plan(by_key):
+            sink_input = by_key[key]
+            if only_silent and sink_input.volume.value_flat > 0:
+                continue
+            self.pulse.volume_set_all_chans(sink_input, level)
+            restored += 1
+            logger.debug(f"Unmuted Spotify audio stream (index: {sink_input.index})")
+        return restored
+
+    @staticmethod
+    def _sink_input_key(sink_input) -> str:
+        pid = (getattr(sink_input, 'proplist', None) or {}).get('application.process.id')
+        return stream_key(sink_input.index, pid)
+
+    def _spotify_inputs(self):
+        """(lookup path, Spotify sink inputs): the event-driven index when connected, else a full scan"""
+        index = self.stream_index
+        spotify_inputs = index.streams() if index is not None and index.ready else []
+        if spotify_inputs:
+            return 'index', spotify_inputs
+        return 'scan', self._scan_spotify_inputs()
+
+    def _scan_spotify_inputs(self):
+        """Spotify sink inputs from a full sink input list (one server round trip)"""
+        return [sink_input for sink_input in self.pulse.sink_input_list()
+                if is_spotify_stream(getattr(sink_input, 'proplist', None), self.spotify_process_names)]
+
 class CrossPlatformSpotifyDetector:
-    def __init__(self):
+    def __init__(self, window_backend: Optional[WindowBackend] = None):
         self.spotify_process_names = self._get_spotify_process_names()
         # Caching for performance optimization
         self._cached_spotify_running = None
         self._cached_spotify_pids = []
         self._last_process_check = 0
         self._process_check_interval = 2.0  # Check processes every 2 seconds max
-        self._last_window_check = 0
-        self._cached_window = None
         self._window_check_interval = 0.5  # Check window every 500ms max
+        # Linux: exec events over the proc connector (or /proc scans) instead of psutil scans
+        self._process_watcher = None
+        if CURRENT_OS == 'linux':
+            try:
+                from process_events import ProcessWatcher
+                self._process_watcher = ProcessWatcher(self.spotify_process_names)
+                logger.debug(f"Spotify process detection: {self._process_watcher.mode}")
+            except Exception as e:
+                logger.debug(f"Process watcher not available, using psutil: {e}")
+        # Window/metadata backends in preference order (see window_backends.py); the
+        # SPOTIFY_WINDOW_BACKENDS env var (comma-separated names) overrides the choice
+        if window_backend is None:
+            # Probe tools once up front; cached answers keep missing ones off the hot path
+            if capabilities.names():
+                logger.info(f"🧰 Capabilities: {capabilities.summary()}")
+            only = os.environ.get('SPOTIFY_WINDOW_BACKENDS')
+            window_backend = create_backends(self, only.split(',') if only else None)
+        self.window_backend = window_backend
     
     def _get_spotify_process_names(self):
         """Get Spotify process names for the current OS"""
@@ -273,6 +546,22 @@ class CrossPlatformSpotifyDetector:
         """Check if Spotify process is running (optimized with caching)"""
         current_time = time.perf_counter()
         
+        # Some backends know without a process check (e.g. the simulator)
+        backend_says = self.window_backend.spotify_running()
+        if backend_says is not None:
+            return backend_says
+        
+        # Linux: known Spotify PIDs are tracked by connector events or pidfds, so their
+        # liveness is free and can't be fooled by PID reuse - only rescan while none run
+        if self._process_watcher is not None:
+            if (self._cached_spotify_running is False and self._process_watcher.mode != 'connector' and
+                    current_time - self._last_process_check < self._process_check_interval):
+                return False
+            self._cached_spotify_pids = self._process_watcher.running_pids()
+            self._cached_spotify_running = bool(self._cached_spotify_pids)
+            self._last_process_check = current_time
+            return self._cached_spotify_running
+        
         # Use cached result if recent
         if (self._cached_spotify_running is not None and 
             current_time - self._last_process_check < self._process_check_interval):
@@ -303,15 +592,9 @@ class CrossPlatformSpotifyDetector:
         spotify_found = False
         
         try:
-            # More efficient: only get name and pid, break early when found
-            for proc in psutil.process_iter(['name', 'pid']):
-                try:
-                    if proc.info['name'] in self.spotify_process_names:
-                        self._cached_spotify_pids.append(proc.info['pid'])
-                        spotify_found = True
-                        # Don't break - collect all Spotify PIDs for better caching
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
+            # Shared scan: reused by window detection within the same scan generation
+            self._cached_spotify_pids = process_scanner.find(self.spotify_process_names)
+            spotify_found = bool(self._cached_spotify_pids)
         except Exception as e:
             logger.debug(f"Error in process scan: {e}")
             # Fallback: assume Spotify is running if we can't scan
@@ -321,48 +604,39 @@ class CrossPlatformSpotifyDetector:
         self._last_process_check = current_time
         return spotify_found
     
-    def get_spotify_window(self) -> Optional[Any]:
-        """Get Spotify window (optimized with caching)"""
-        current_time = time.perf_counter()
-        
-        # Use cached window if recent and still valid
-        if (self._cached_window is not None and 
-            current_time - self._last_window_check < self._window_check_interval):
-            # Quick validation: check if cached window still exists
-            try:
-                if self._is_cached_window_valid():
-                    return self._cached_window
-                else:
-                    self._cached_window = None  # Invalidate cache
-            except Exception:
-                self._cached_window = None  # Invalidate cache
-        
-        # Get fresh window
-        if CURRENT_OS == 'windows':
-            window = self._get_spotify_window_windows()
-        elif CURRENT_OS == 'darwin':
-            window = self._get_spotify_window_macos()
-        elif CURRENT_OS == 'linux':
-            window = self._get_spotify_window_linux()
-        else:
-            logger.warning("Window detection not supported on this platform")
-            window = None
-        
-        # Cache the result
-        self._cached_window = window
-        self._last_window_check = current_time
-        return window
+    def get_spotify_pids(self):
+        """Spotify PIDs from the last process check, or the shared process scan"""
+        return self._cached_spotify_pids or process_scanner.find(self.spotify_process_names)
     
-    def _is_cached_window_valid(self) -> bool:
-        """Check if cached window is still valid (platform-specific)"""
-        if not self._cached_window:
-            return False
-            
+    def reset(self):
+        """Forget cached windows and PIDs (Spotify went away)"""
+        self.window_backend.reset()
+        self._cached_spotify_pids = []
+    
+    def wait_for_window_change(self, timeout: float):
+        """Sleep between polls; event-driven backends wake up early when the title changes"""
+        self.window_backend.wait_for_change(timeout)
+    
+    def wait_for_spotify(self, timeout: float):
+        """Sleep while Spotify is not running; returns early when it starts (Linux proc connector)"""
+        if self.window_backend.spotify_running() is not None:
+            self.window_backend.wait_for_change(timeout)
+        elif self._process_watcher is None:
+            time.sleep(timeout)
+        elif self._process_watcher.wait_for_start(timeout):
+            self._cached_spotify_running = None  # Force a fresh check on the next call
+    
+    def get_spotify_window(self) -> Optional[SpotifyWindow]:
+        """Get Spotify window from the fastest backend that currently has one"""
+        return self.window_backend.poll()
+    
+    def _is_window_valid(self, window: SpotifyWindow) -> bool:
+        """Check if a cached window is still valid (platform-specific)"""
         try:
-            if CURRENT_OS == 'windows' and hasattr(self._cached_window, '_hwnd'):
+            if CURRENT_OS == 'windows' and window.handle is not None:
                 # Check if Windows window handle is still valid
                 import win32gui
-                return win32gui.IsWindow(self._cached_window._hwnd)
+                return win32gui.IsWindow(window.handle)
             else:
                 # For macOS and Linux, assume cache is valid for short periods
                 # The window check interval is short anyway (500ms)
@@ -386,15 +660,11 @@ class CrossPlatformSpotifyDetector:
             # Use cached Spotify PIDs if available (much faster than re-scanning)
             spotify_pids = self._cached_spotify_pids if self._cached_spotify_pids else []
             
-            # If no cached PIDs, do a quick scan for just Spotify processes
+            # If no cached PIDs, look them up in the shared process scan
             if not spotify_pids:
                 try:
-                    for proc in psutil.process_iter(['pid', 'name']):
-                        if proc.info['name'] in self.spotify_process_names:
-                            spotify_pids.append(proc.info['pid'])
-                            # Cache for future use
-                            if proc.info['pid'] not in self._cached_spotify_pids:
-                                self._cached_spotify_pids.append(proc.info['pid'])
+                    spotify_pids = process_scanner.find(self.spotify_process_names)
+                    self._cached_spotify_pids = list(spotify_pids)  # Cache for future use
                 except Exception:
                     pass
             
@@ -429,13 +699,7 @@ class CrossPlatformSpotifyDetector:
                     if any(skip in title_lower for skip in ['helper', 'crashpad', 'msctfime']):
                         return True  # Continue enumeration
                     
-                    # Create window object
-                    class SpotifyWindow:
-                        def __init__(self, hwnd, title):
-                            self.title = title
-                            self._hwnd = hwnd
-                    
-                    window = SpotifyWindow(hwnd, title)
+                    window = SpotifyWindow(title, handle=hwnd)
                     
                     # Prioritize main Spotify windows (music playing or main app)
                     if (' - ' in title and title not in ['Spotify', 'Spotify Free', 'Spotify Premium']) or \
@@ -508,7 +772,7 @@ class CrossPlatformSpotifyDetector:
                     
                     # Only accept very specific Spotify application patterns
                     if window.title in ['Spotify', 'Spotify Free', 'Spotify Premium']:
-                        return window
+                        return SpotifyWindow(window.title)
                     elif (' - ' in window.title and 
                           # Make sure it's actually music and not a file path
                           not any(path_indicator in title_lower for path_indicator in 
@@ -516,7 +780,7 @@ class CrossPlatformSpotifyDetector:
                           # And doesn't look like development/browser content
                           not any(dev_indicator in title_lower for dev_indicator in 
                                  ['cursor', 'vscode', 'ide', 'browser', 'tab'])):
-                        return window
+                        return SpotifyWindow(window.title)
                         
             except Exception:
                 pass
@@ -529,59 +793,94 @@ class CrossPlatformSpotifyDetector:
     
     def _get_spotify_window_macos(self):
         """macOS-specific window detection using AppleScript"""
+        breaker = capabilities.breaker('osascript')
+        if not breaker.allow():
+            return None  # Failing repeatedly (e.g. no accessibility permission) - retried later
         try:
             # Get window title of Spotify app
-            result = subprocess.run([
+            result = command_executor.run([
                 'osascript', '-e', 
                 'tell application "System Events" to get the title of every window of application process "Spotify"'
-            ], capture_output=True, text=True)
+            ], timeout=WINDOW_COMMAND_TIMEOUT, persistent=True)
             
-            if result.returncode == 0 and result.stdout.strip():
+            if result.returncode != 0:
+                breaker.record_failure("timed out" if result.timed_out else f"exit code {result.returncode}")
+                return None
+            breaker.record_success()
+            if result.stdout.strip():
                 titles = result.stdout.strip().split(', ')
                 if titles and titles[0]:
-                    class SpotifyWindow:
-                        def __init__(self, title):
-                            self.title = title.strip('"')
-                    return SpotifyWindow(titles[0])
+                    return SpotifyWindow(titles[0].strip('"'))
             
             return None
         except Exception as e:
+            breaker.record_failure(e)
             logger.error(f"Error finding Spotify window on macOS: {e}")
             return None
     
-    def _get_spotify_window_linux(self):
-        """Linux-specific window detection using wmctrl or xdotool"""
+    def _get_spotify_window_wmctrl(self):
+        """Linux window detection using wmctrl (skipped while missing or failing - see capabilities.py)"""
+        if not capabilities.usable('wmctrl'):
+            return None
         try:
-            # Try wmctrl first
-            result = subprocess.run(['wmctrl', '-l'], capture_output=True, text=True)
-            if result.returncode == 0:
-                for line in result.stdout.split('\n'):
-                    if 'Spotify' in line or any(proc in line.lower() for proc in self.spotify_process_names):
-                        # Extract window title (after the third space)
-                        parts = line.split(None, 3)
-                        if len(parts) >= 4:
-                            title = parts[3]
-                            class SpotifyWindow:
-                                def __init__(self, title):
-                                    self.title = title
-                            return SpotifyWindow(title)
+            result = command_executor.run(['wmctrl', '-l'], timeout=WINDOW_COMMAND_TIMEOUT, persistent=True)
+            if result.returncode != 0:
+                capabilities.breaker('wmctrl').record_failure("timed out" if result.timed_out else f"exit code {result.returncode}")
+                return None
+            capabilities.breaker('wmctrl').record_success()
+            for line in result.stdout.split('\n'):
+                if 'Spotify' in line or any(proc in line.lower() for proc in self.spotify_process_names):
+                    # Extract window title (after the third space)
+                    parts = line.split(None, 3)
+                    if len(parts) >= 4:
+                        return SpotifyWindow(parts[3])
             
-            # Try xdotool as fallback
-            result = subprocess.run(['xdotool', 'search', '--name', 'Spotify'], capture_output=True, text=True)
+            return None
+        except Exception as e:
+            logger.error(f"Error finding Spotify window with wmctrl: {e}")
+            return None
+    
+    def _get_spotify_window_xdotool(self):
+        """Linux window detection using xdotool (raced against wmctrl by the backend chain)"""
+        if not capabilities.usable('xdotool'):
+            return None
+        try:
+            result = command_executor.run(['xdotool', 'search', '--name', 'Spotify'],
+                                          timeout=WINDOW_COMMAND_TIMEOUT, persistent=True)
             if result.returncode == 0 and result.stdout.strip():
                 window_id = result.stdout.strip().split('\n')[0]
-                result = subprocess.run(['xdotool', 'getwindowname', window_id], capture_output=True, text=True)
+                result = command_executor.run(['xdotool', 'getwindowname', window_id],
+                                              timeout=WINDOW_COMMAND_TIMEOUT, persistent=True)
                 if result.returncode == 0:
-                    class SpotifyWindow:
-                        def __init__(self, title):
-                            self.title = title.strip()
-                    return SpotifyWindow(result.stdout)
+                    capabilities.breaker('xdotool').record_success()
+                    return SpotifyWindow(result.stdout.strip())
+            if result.timed_out or (result.returncode not in (0, 1)):
+                # Exit code 1 just means no matching window
+                capabilities.breaker('xdotool').record_failure("timed out" if result.timed_out else f"exit code {result.returncode}")
             
             return None
         except Exception as e:
-            logger.error(f"Error finding Spotify window on Linux: {e}")
+            logger.error(f"Error finding Spotify window with xdotool: {e}")
             return None
 
+def _window_scraper(name: str, os_name: str, method: str):
+    """Backend factory for a CrossPlatformSpotifyDetector window scraping method"""
+    def create(detector: CrossPlatformSpotifyDetector) -> WindowBackend:
+        if CURRENT_OS != os_name:
+            raise RuntimeError(f"{os_name} only")
+        return PollingBackend(name, getattr(detector, method),
+                              detector._window_check_interval, detector._is_window_valid)
+    return create
+
+# Window scraping: slowest backends, used when no event-driven one has Spotify
+register_backend('win32', _window_scraper('win32', 'windows', '_get_spotify_window_windows'), priority=50)
+register_backend('applescript', _window_scraper('applescript', 'darwin', '_get_spotify_window_macos'), priority=50,
+                 requires=('osascript',))
+register_backend('wmctrl', _window_scraper('wmctrl', 'linux', '_get_spotify_window_wmctrl'), priority=50,
+                 requires=('wmctrl',))
+register_backend('xdotool', _window_scraper('xdotool', 'linux', '_get_spotify_window_xdotool'), priority=55,
+                 requires=('xdotool',))
+
 class EnhancedAudioPlayer:
     def __init__(self, audio_directory="audio"):
         self.audio_directory = self._find_audio_directory(audio_directory)
@@ -591,6 +890,11 @@ class EnhancedAudioPlayer:
         self.is_playing = False
         self.current_stage = None  # 'voice' or 'music'
         self.music_queue = []
+        # Fades share the mute ramp's length and curve, so the replacement cross-fades with Spotify
+        self.volume = 1.0
+        self.fade_seconds = FADE_SECONDS
+        self.fade_curve = FADE_CURVE
+        self._stopping = False  # Fading out before stopping
         
         # Create fallback embedded audio if no files found
         if not self._has_audio_files():
@@ -754,10 +1058,27 @@ class EnhancedAudioPlayer:
     def start_ad_audio_sequence(self):
         """Start playing music directly when ad is detected"""
         if self.is_playing:
+            if self._stopping:
+                # The ad came back while we were fading out: fade back in from here
+                self._stopping = False
+                self._fade_to(1.0)
             return  # Already playing
         
         self.create_music_queue()  # Prepare music queue
+        if self.fade_seconds > 0:
+            self.volume = 0.0
         self._play_ambient_music()  # Go directly to music, skip voice
+        if self.is_playing and self.fade_seconds > 0:
+            self._fade_to(1.0)
+    
+    def _set_volume(self, level: float):
+        self.volume = level
+        if PYGAME_AVAILABLE and pygame.mixer.get_init():
+            pygame.mixer.music.set_volume(level)
+    
+    def _fade_to(self, level: float, on_done=None):
+        fade_scheduler.start('replacement', self._set_volume, level, self.fade_seconds, self.fade_curve,
+                             start=self.volume, on_done=on_done)
     
     def _play_voice_announcement(self):
         """Play a random voice announcement"""
@@ -802,7 +1123,7 @@ class EnhancedAudioPlayer:
             
             # Load and play the music file at normal volume
             pygame.mixer.music.load(music_file)
-            pygame.mixer.music.set_volume(1.0)  # Full volume
+            pygame.mixer.music.set_volume(self.volume)  # Full volume (less while fading in)
             pygame.mixer.music.play(0)  # Play once, we'll handle the queue manually
             
             self.current_audio = music_file
@@ -816,7 +1137,7 @@ class EnhancedAudioPlayer:
     
     def update_audio_playback(self):
         """Update audio playback - handle transitions and queuing"""
-        if not self.is_playing:
+        if not self.is_playing or self._stopping:
             return
             
         try:
@@ -843,6 +1164,20 @@ class EnhancedAudioPlayer:
         if not self.is_playing:
             return
         
+        if self.fade_seconds > 0 and PYGAME_AVAILABLE and pygame.mixer.get_init():
+            # Fade out first; stopped from the fade thread unless the ad comes back
+            if not self._stopping:
+                self._stopping = True
+                self._fade_to(0.0, on_done=self._finish_stop)
+            return
+        self._stop_playback()
+    
+    def _finish_stop(self):
+        if self._stopping:
+            self._stopping = False
+            self._stop_playback()
+    
+    def _stop_playback(self):
         try:
             # Check if pygame is available and properly initialized
             if not PYGAME_AVAILABLE or not pygame.mixer.get_init():
@@ -851,6 +1186,7 @@ class EnhancedAudioPlayer:
                 
             pygame.mixer.music.stop()
             self.is_playing = False
+            self.volume = 1.0
             self.current_stage = None
             self.music_queue.clear()  # Clear the music queue
             logger.debug(f"Stopped playing audio: {os.path.basename(self.current_audio) if self.current_audio else 'Unknown'}")
@@ -871,25 +1207,36 @@ class EnhancedAudioPlayer:
 
 def is_ad_playing(window_title: str) -> bool:
     """Determine if an ad is playing based on window title (enhanced multi-language detection)"""
+    verdict = detect_ad(window_title)
+    if verdict is None:
+        return _basic_ad_detection(window_title)
+    return verdict.is_ad
+
+def detect_ad(window_title: str):
+    """Full detection verdict for a window title, or None if enhanced detection is unavailable"""
     # Use enhanced ad detector for better international support
     try:
         from enhanced_ad_detection import EnhancedAdDetector
         if not hasattr(is_ad_playing, '_detector'):
-            is_ad_playing._detector = EnhancedAdDetector()
+            # SPOTIFY_DETECTION_BACKEND=ngram scores titles with the trained model (SPOTIFY_NGRAM_MODEL)
+            is_ad_playing._detector = EnhancedAdDetector(
+                known_music_path="known_music.bin",
+                backend=os.environ.get('SPOTIFY_DETECTION_BACKEND', 'patterns').lower(),
+                model_path=os.environ.get('SPOTIFY_NGRAM_MODEL'))
         
-        result = is_ad_playing._detector.is_ad_playing(window_title)
+        verdict = is_ad_playing._detector.detect(window_title)
         
         # Debug logging to help troubleshoot ad detection
-        logger.debug(f"Ad detection: '{window_title}' -> {result} ({'AD' if result else 'MUSIC'})")
+        logger.debug(f"Ad detection: '{window_title}' -> {verdict.describe()}")
         
-        return result
+        return verdict
     except ImportError:
         # Fallback to basic detection if enhanced module not available
         logger.warning("Enhanced ad detection not available, using basic detection")
-        return _basic_ad_detection(window_title)
+        return None
     except Exception as e:
         logger.error(f"Error in enhanced ad detection: {e}")
-        return _basic_ad_detection(window_title)
+        return None
 
 def _basic_ad_detection(window_title: str) -> bool:
     """Basic ad detection as fallback"""
@@ -916,7 +1263,8 @@ def _basic_ad_detection(window_title: str) -> bool:
     
     return True  # Default to ad if uncertain
 
-def main():
+def _run_startup_tasks():
+    """Donation reminders and the background update check"""
     # Import and initialize donation system
     try:
         from donation_system import donation_manager
@@ -943,12 +1291,32 @@ def main():
         logger.debug("Update checker not available")
     except Exception as e:
         logger.debug(f"Error starting update check: {e}")
+
+def main(window_backend: Optional[WindowBackend] = None, audio_controller=None, startup_tasks: bool = True,
+         audio_player=None, recorder: Optional[SessionRecorder] = None):
+    """
+    Run the detection loop. Tests and simulations can inject a window backend
+    (e.g. SimulatedBackend), the audio controller and player, and skip startup
+    tasks. Titles and actions are recorded to `recorder`, or to the file named by
+    SPOTIFY_SESSION_RECORD (see session_recorder.py).
+    """
+    if startup_tasks:
+        _run_startup_tasks()
     
     logger.info(f"🎵 Starting Spotify Ad Silencer v{APP_VERSION} on {CURRENT_OS.title()} - Waiting for Spotify...")
     
-    audio_controller = ProcessSpecificAudioController()
-    spotify_detector = CrossPlatformSpotifyDetector()
-    enhanced_audio_player = EnhancedAudioPlayer()
+    # Mute changes are applied on the actuator's thread, so polling carries on meanwhile
+    audio_backend = None
+    if audio_controller is None:
+        audio_backend = ProcessSpecificAudioController()
+        audio_controller = MuteActuator(audio_backend)
+    spotify_detector = CrossPlatformSpotifyDetector(window_backend)
+    enhanced_audio_player = audio_player or EnhancedAudioPlayer()
+    
+    recorder = recorder or open_session_recorder()
+    if recorder is not None:
+        audio_controller = RecordingAudioController(audio_controller, recorder)
+        enhanced_audio_player = RecordingAudioPlayer(enhanced_audio_player, recorder)
     
     was_muted = False
     ads_blocked = 0
@@ -959,10 +1327,16 @@ def main():
     
     while True:
         try:
+            # Scripted sessions (SimulatedBackend) end with their timeline
+            if spotify_detector.window_backend.finished:
+                raise KeyboardInterrupt
+            
             # Check if Spotify is running
             is_spotify_running = spotify_detector.is_spotify_running()
             
             if not is_spotify_running:
+                if recorder is not None:
+                    recorder.observe_not_running()
                 if not spotify_not_running_logged:
                     logger.info("⏸️  Spotify not running - Waiting for Spotify to start...")
                     spotify_not_running_logged = True
@@ -972,9 +1346,8 @@ def main():
                     was_muted = False
                     last_window_title = ""
                 # Clear detector cache when Spotify is not running
-                spotify_detector._cached_window = None
-                spotify_detector._cached_spotify_pids = []
-                time.sleep(5)
+                spotify_detector.reset()
+                spotify_detector.wait_for_spotify(5)
                 continue
             
             # Reset the flag when Spotify is running again
@@ -983,24 +1356,35 @@ def main():
             
             # Get Spotify window
             spotify_window = spotify_detector.get_spotify_window()
+            if recorder is not None:
+                recorder.observe_window(spotify_window)
             if spotify_window:
                 window_title = spotify_window.title
+                # Normalized once per distinct title (memoized), shared with the detector
+                title_info = normalize_title(window_title)
                 
                 # Skip if we got an invalid window title (file paths, etc.)
-                if not window_title or window_title.strip() == "" or ".exe" in window_title:
+                if not title_info.stripped or ".exe" in title_info.stripped:
                     if not spotify_not_found_logged:
                         logger.info("🔍 Invalid Spotify window detected - Retrying...")
                         spotify_not_found_logged = True
-                    time.sleep(2)
+                    spotify_detector.wait_for_window_change(2)
                     continue
                 
                 # Check if ad is playing
-                is_ad = is_ad_playing(window_title)
+                verdict = detect_ad(window_title)
+                is_ad = verdict.is_ad if verdict is not None else _basic_ad_detection(window_title)
+                # Some backends know ads for sure (MPRIS track ids) - trust them over titles
+                if spotify_window.is_ad is not None:
+                    is_ad = spotify_window.is_ad
+                # Learn long-playing music from the final decision, never from an overridden one
+                if verdict is not None:
+                    is_ad_playing._detector.observe_playback(verdict, is_ad)
                 
                 # Only log when title changes
                 if window_title != last_window_title:
                     # Special handling for paused state
-                    if window_title in ["Spotify Free", "Spotify Premium", "Spotify"]:
+                    if title_info.is_paused:
                         status = "⏸️ [PAUSED]"
                         logger.info(f"{status} {window_title}")
                     else:
@@ -1009,14 +1393,16 @@ def main():
                         
                         # DEBUG: Extra logging for potential ads
                         if is_ad:
-                            logger.info(f"🚨 AD DETECTED! Title: '{window_title}' | Length: {len(window_title)} chars")
-                        elif len(window_title) < 20 and not (' - ' in window_title):
+                            logger.info(f"🚨 AD DETECTED! Title: '{window_title}' | Length: {title_info.length} chars, {title_info.token_count} words")
+                            if verdict is not None:
+                                logger.info(f"   ↳ {verdict.describe()}")
+                        elif title_info.length < 20 and not title_info.has_separator:
                             logger.info(f"🤔 POTENTIAL AD MISSED? Short title: '{window_title}'")
                     
                     last_window_title = window_title
                 
                 # Check if ad is playing (but not if paused)
-                is_paused = window_title in ["Spotify Free", "Spotify Premium", "Spotify"]
+                is_paused = title_info.is_paused
                 
                 if is_ad and not is_paused:
                     # Real ad detected
@@ -1054,9 +1440,12 @@ def main():
             
             # Adaptive sleep interval - scan faster during ads for quicker transitions
             if was_muted:
-                time.sleep(0.3)  # Scan every 300ms during ads for faster music resume
+                interval = 0.3  # Scan every 300ms during ads for faster music resume
             else:
-                time.sleep(1)    # Normal 1-second interval when music is playing
+                interval = 1    # Normal 1-second interval when music is playing
+            if spotify_detector.window_backend.pushes_updates and not was_muted:
+                interval = 5  # Title changes are pushed: wake up on the next one instead of polling
+            spotify_detector.wait_for_window_change(interval)
             
         except KeyboardInterrupt:
             logger.info("🛑 Shutting down Spotify Ad Silencer...")
@@ -1064,6 +1453,24 @@ def main():
                 audio_controller.set_spotify_mute(False)
                 enhanced_audio_player.stop_audio()  # Stop ambient audio on shutdown
             
+            if recorder is not None:
+                recorder.close()
+            if hasattr(is_ad_playing, '_detector'):
+                is_ad_playing._detector.close()  # Save learned known-music titles
+                logger.debug(f"Ad detection cache: {is_ad_playing._detector.cache_info()}")
+            if capabilities.names():
+                logger.debug(f"Capabilities: {capabilities.status()}")
+            if hasattr(spotify_detector.window_backend, 'status'):
+                logger.debug(f"Window backends: {spotify_detector.window_backend.status()}")
+            if hasattr(audio_controller, 'close'):
+                audio_controller.close()  # Applies a pending unmute
+            fade_scheduler.close()  # Finish fades now so volumes are restored before exit
+            if audio_backend is not None:
+                audio_backend.close()  # Last: the fades above restore volumes through it
+            spotify_detector.window_backend.close()
+            logger.debug(f"External commands: {command_executor.stats()}")
+            command_executor.close()
+            
             # Show session stats with donation info
             try:
                 from donation_system import donation_manager
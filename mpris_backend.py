@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+MPRIS D-Bus metadata backend for Spotify Ad Silencer (Linux)
+Subscribes to org.mpris.MediaPlayer2.spotify PropertiesChanged signals so track
+changes (and ads, which carry spotify:ad: track ids) arrive as pushed events
+
+Self-test (starts a private dbus-daemon with a fake Spotify player):
+    python mpris_backend.py --selftest
+"""
+
+import sys
+import time
+import logging
+import threading
+import subprocess
+from typing import Dict, List, Optional
+
+from title_normalization import PAUSED_TITLES
+from window_backends import SpotifyWindow
+
+logger = logging.getLogger(__name__)
+
+# jeepney (pure-Python D-Bus) is optional: without it Linux scrapes window titles
+try:
+    from jeepney import (DBusAddress, HeaderFields, MatchRule, MessageType, Properties,
+                         message_bus, new_method_return, new_signal)
+    from jeepney.io.blocking import open_dbus_connection
+    JEEPNEY_AVAILABLE = True
+except ImportError:
+    JEEPNEY_AVAILABLE = False
+
+SPOTIFY_BUS_NAME = 'org.mpris.MediaPlayer2.spotify'
+MPRIS_PATH = '/org/mpris/MediaPlayer2'
+PLAYER_INTERFACE = 'org.mpris.MediaPlayer2.Player'
+PROPERTIES_INTERFACE = 'org.freedesktop.DBus.Properties'
+
+# Ad track ids: 'spotify:ad:<id>' (older clients) or '/com/spotify/ad/<id>' (object paths)
+AD_TRACKID_PREFIXES = ('spotify:ad:', '/com/spotify/ad/')
+
+class MprisState:
+    """Snapshot of the player's Metadata and PlaybackStatus"""
+
+    __slots__ = ('trackid', 'title', 'artists', 'status', 'received_at')
+
+    def __init__(self, trackid: str = '', title: str = '', artists: Optional[List[str]] = None,
+                 status: str = 'Stopped', received_at: float = 0.0):
+        self.trackid = trackid
+        self.title = title
+        self.artists = artists or []
+        self.status = status  # 'Playing', 'Paused' or 'Stopped'
+        self.received_at = received_at
+
+    @property
+    def is_ad(self) -> bool:
+        return self.trackid.startswith(AD_TRACKID_PREFIXES)
+
+    def __repr__(self) -> str:
+        return f"MprisState({self.status}, {self.trackid!r}, {self.window_title()!r})"
+
+    def window_title(self) -> str:
+        """The title Spotify's window would show: 'Artist - Song' while playing, 'Spotify' otherwise"""
+        if self.status != 'Playing':
+            return "Spotify"
+        if self.is_ad:
+            # Ads are often titled just "Spotify", which would read as paused
+            return self.title if self.title and self.title not in PAUSED_TITLES else "Advertisement"
+        if self.artists and self.title:
+            return f"{', '.join(self.artists)} - {self.title}"
+        return self.title or "Spotify"
+
+def _unwrap(variant):
+    """jeepney variants are (signature, value) tuples"""
+    return variant[1] if isinstance(variant, tuple) and len(variant) == 2 else variant
+
+def parse_properties(properties: Dict, previous: Optional[MprisState] = None) -> MprisState:
+    """Merge a Player properties dict (GetAll result or PropertiesChanged body) into a state"""
+    previous = previous or MprisState()
+    state = MprisState(previous.trackid, previous.title, list(previous.artists),
+                       previous.status, time.monotonic())
+    if 'PlaybackStatus' in properties:
+        state.status = str(_unwrap(properties['PlaybackStatus']))
+    if 'Metadata' in properties:
+        metadata = _unwrap(properties['Metadata']) or {}
+        state.trackid = str(_unwrap(metadata.get('mpris:trackid', ('s', ''))))
+        state.title = str(_unwrap(metadata.get('xesam:title', ('s', ''))))
+        state.artists = [str(a) for a in _unwrap(metadata.get('xesam:artist', ('as', [])))]
+    return state
+
+class MprisSpotifyWatcher:
+    """
+    Follows Spotify's MPRIS player from a daemon thread.
+
+    The initial state comes from Properties.GetAll; after that PropertiesChanged
+    signals update `state` and wake wait_for_change(). NameOwnerChanged tells us
+    when Spotify quits (state becomes None) or starts again (state is re-read).
+    """
+
+    def __init__(self, bus: str = 'SESSION', bus_name: str = SPOTIFY_BUS_NAME):
+        if not JEEPNEY_AVAILABLE:
+            raise ImportError("The MPRIS backend needs jeepney: pip install jeepney")
+        self.bus_name = bus_name
+        self.state: Optional[MprisState] = None
+        self.updates = 0
+        self._changed = threading.Event()
+        self._closed = False
+        self._conn = open_dbus_connection(bus=bus)
+        self._address = DBusAddress(MPRIS_PATH, bus_name=bus_name, interface=PLAYER_INTERFACE)
+        # The bus resolves the well-known sender name; the local filter sees unique names
+        self._bus_rule = MatchRule(type='signal', sender=bus_name, interface=PROPERTIES_INTERFACE,
+                                   member='PropertiesChanged', path=MPRIS_PATH)
+        self._owner_rule = MatchRule(type='signal', sender='org.freedesktop.DBus',
+                                     interface='org.freedesktop.DBus', member='NameOwnerChanged')
+        self._owner_rule.add_arg_condition(0, bus_name)
+        self._signal_rule = MatchRule(type='signal')
+        self._thread = threading.Thread(target=self._run, name="mpris-watcher", daemon=True)
+
+    def start(self) -> "MprisSpotifyWatcher":
+        self._thread.start()
+        return self
+
+    def _refresh(self):
+        """Re-read the full player state (Spotify just appeared, or at startup)"""
+        reply = self._conn.send_and_get_reply(Properties(self._address).get_all(), timeout=2.0)
+        if reply.header.message_type == MessageType.error:
+            self._set_state(None)  # Spotify isn't on the bus
+        else:
+            self._set_state(parse_properties(reply.body[0]))
+
+    def _set_state(self, state: Optional[MprisState]):
+        self.state = state
+        self.updates += 1
+        self._changed.set()
+        logger.debug(f"MPRIS update: {state}")
+
+    def _run(self):
+        try:
+            with self._conn.filter(self._signal_rule, bufsize=64) as queue:
+                self._conn.send_and_get_reply(message_bus.AddMatch(self._bus_rule))
+                self._conn.send_and_get_reply(message_bus.AddMatch(self._owner_rule))
+                self._refresh()
+                while not self._closed:
+                    try:
+                        msg = self._conn.recv_until_filtered(queue, timeout=1.0)
+                    except TimeoutError:
+                        continue
+                    self._handle(msg)
+        except Exception as e:
+            if not self._closed:
+                logger.warning(f"MPRIS watcher stopped: {e}")
+                self._set_state(None)
+
+    def _handle(self, msg):
+        member = msg.header.fields.get(HeaderFields.member)
+        if member == 'PropertiesChanged' and msg.body and msg.body[0] == PLAYER_INTERFACE:
+            self._set_state(parse_properties(msg.body[1], self.state))
+        elif member == 'NameOwnerChanged' and msg.body and msg.body[0] == self.bus_name:
+            if msg.body[2]:
+                self._refresh()  # Spotify (re)started
+            else:
+                self._set_state(None)  # Spotify quit
+
+    @property
+    def available(self) -> bool:
+        """True while the watcher runs and Spotify's player is on the bus"""
+        return self._thread.is_alive() and self.state is not None
+
+    def get_window(self) -> Optional[SpotifyWindow]:
+        """Window-like view of the player state, with the authoritative ad flag while playing"""
+        state = self.state
+        if state is None:
+            return None
+        return SpotifyWindow(state.window_title(), state.is_ad if state.status == 'Playing' else None)
+
+    def wait_for_change(self, timeout: float) -> bool:
+        """Sleep up to `timeout` seconds, returning early when the player state changes"""
+        changed = self._changed.wait(timeout)
+        self._changed.clear()
+        return changed
+
+    def close(self):
+        self._closed = True
+        self._thread.join(timeout=2.0)
+        self._conn.close()
+
+class FakeSpotifyPlayer:
+    """Minimal MPRIS player service for the self-test: answers GetAll and emits PropertiesChanged"""
+
+    def __init__(self, bus: str):
+        self.conn = open_dbus_connection(bus=bus)
+        self.conn.send_and_get_reply(message_bus.RequestName(SPOTIFY_BUS_NAME))
+        self.properties = {'PlaybackStatus': ('s', 'Playing'), 'Metadata': ('a{sv}', {})}
+        self._closed = False
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        rule = MatchRule(type='method_call')
+        with self.conn.filter(rule) as queue:
+            while not self._closed:
+                try:
+                    msg = self.conn.recv_until_filtered(queue, timeout=0.2)
+                except TimeoutError:
+                    continue
+                if msg.header.fields.get(HeaderFields.member) == 'GetAll':
+                    self.conn.send(new_method_return(msg, 'a{sv}', (self.properties,)))
+
+    def play(self, trackid: str, title: str, artists: List[str], status: str = 'Playing'):
+        metadata = {'mpris:trackid': ('o', trackid), 'xesam:title': ('s', title),
+                    'xesam:artist': ('as', artists)}
+        changed = {'Metadata': ('a{sv}', metadata), 'PlaybackStatus': ('s', status)}
+        self.properties.update(changed)
+        emitter = DBusAddress(MPRIS_PATH, interface=PROPERTIES_INTERFACE)
+        self.conn.send(new_signal(emitter, 'PropertiesChanged', 'sa{sv}as', (PLAYER_INTERFACE, changed, [])))
+
+    def close(self):
+        self._closed = True
+        self._thread.join()
+        self.conn.close()
+
+def run_selftest() -> bool:
+    """Start a private session bus, drive a fake player and check the watcher follows it"""
+    daemon = subprocess.Popen(['dbus-daemon', '--session', '--nofork', '--print-address=1'],
+                              stdout=subprocess.PIPE, text=True)
+    try:
+        address = daemon.stdout.readline().strip()
+        player = FakeSpotifyPlayer(address)
+        player.play('/com/spotify/track/1', 'Song', ['Artist'])
+        watcher = MprisSpotifyWatcher(bus=address).start()
+        ok = True
+
+        watcher.wait_for_change(2.0)
+        steps = [
+            (None, "Artist - Song", False),
+            (('/com/spotify/ad/42', 'Spotify', []), "Advertisement", True),
+            (('/com/spotify/track/2', 'Other Song', ['Band', 'Guest']), "Band, Guest - Other Song", False),
+        ]
+        for step, expected_title, expected_ad in steps:
+            if step is not None:
+                started = time.perf_counter()
+                player.play(*step)
+                while watcher.state is None or watcher.state.trackid != step[0]:
+                    if not watcher.wait_for_change(2.0):
+                        break
+                latency = f" in {(time.perf_counter() - started) * 1000:.1f} ms"
+            else:
+                latency = ""
+            window = watcher.get_window()
+            passed = window is not None and window.title == expected_title and window.is_ad == expected_ad
+            ok = ok and passed
+            print(f"{'✅' if passed else '❌'} {window.title if window else None!r} "
+                  f"ad={window.is_ad if window else None}{latency}")
+
+        player.close()  # Releasing the name must clear the state
+        deadline = time.monotonic() + 2.0
+        while watcher.state is not None and time.monotonic() < deadline:
+            watcher.wait_for_change(0.2)
+        passed = watcher.state is None
+        ok = ok and passed
+        print(f"{'✅' if passed else '❌'} player left the bus -> state cleared")
+        watcher.close()
+        return ok
+    finally:
+        daemon.terminate()
+        daemon.wait()
+
+if __name__ == "__main__":
+    if '--selftest' not in sys.argv:
+        print(__doc__)
+        sys.exit(0)
+    sys.exit(0 if run_selftest() else 1)
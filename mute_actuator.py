@@ -0,0 +1,123 @@
+"""
+Asynchronous mute actuator for Spotify Ad Silencer
+Applies mute/unmute requests on a worker thread so slow audio calls (osascript,
+PulseAudio round trips) don't hold up detection; rapid flips collapse into the
+latest requested state
+"""
+
+import time
+import logging
+import threading
+from typing import Callable, Optional
+
+from pulse_streams import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+class MuteAck:
+    """A mute state reaching the audio system"""
+
+    __slots__ = ('muted', 'requested_at', 'acked_at', 'coalesced')
+
+    def __init__(self, muted: bool, requested_at: float, acked_at: float, coalesced: int):
+        self.muted = muted
+        self.requested_at = requested_at  # When the request that was applied was made
+        self.acked_at = acked_at          # When the controller call returned
+        self.coalesced = coalesced        # Earlier requests it replaced
+
+    @property
+    def latency(self) -> float:
+        return self.acked_at - self.requested_at
+
+class MuteActuator:
+    """
+    Stands in for an audio controller: set_spotify_mute() only records the
+    wanted state in a single slot and returns. A worker thread applies the
+    slot's latest value; requests arriving while it works overwrite the slot,
+    so ad→music→ad within one call collapses to one (or no) change. Each
+    applied change is acknowledged with timestamps for latency metrics.
+    """
+
+    def __init__(self, inner, clock: Callable[[], float] = time.monotonic,
+                 on_ack: Optional[Callable[[MuteAck], None]] = None):
+        self.inner = inner
+        self.clock = clock
+        self.on_ack = on_ack
+        self.is_spotify_muted = bool(getattr(inner, 'is_spotify_muted', False))  # Latest requested state
+        self.applied_muted = self.is_spotify_muted  # State the controller last reported
+        self.last_ack: Optional[MuteAck] = None
+        self.latency = LatencyHistogram()
+        self.requests = 0
+        self.coalesced = 0
+        self._slot = None  # (muted, requested_at, requests replaced) waiting for the worker
+        self._busy = False
+        self._closed = False
+        self._wake = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="mute-actuator", daemon=True)
+        self._thread.start()
+
+    def set_spotify_mute(self, mute: bool):
+        with self._wake:
+            self.requests += 1
+            replaced = 0
+            if self._slot is not None:
+                replaced = self._slot[2] + 1
+                self.coalesced += 1
+            self._slot = (mute, self.clock(), replaced)
+            self.is_spotify_muted = mute
+            self._wake.notify()
+
+    def _run(self):
+        while True:
+            with self._wake:
+                while self._slot is None and not self._closed:
+                    self._wake.wait()
+                if self._slot is None:
+                    return
+                (mute, requested_at, replaced), self._slot = self._slot, None
+                self._busy = True
+            try:
+                self._apply(mute, requested_at, replaced)
+            finally:
+                with self._wake:
+                    self._busy = False
+                    self._wake.notify_all()
+
+    def _apply(self, mute: bool, requested_at: float, replaced: int):
+        if mute == getattr(self.inner, 'is_spotify_muted', self.applied_muted):
+            return  # Flipped back before we got to it: nothing to change
+        try:
+            self.inner.set_spotify_mute(mute)
+        except Exception as e:
+            logger.error(f"Mute actuator failed to {'mute' if mute else 'unmute'} Spotify: {e}")
+            return
+        self.applied_muted = getattr(self.inner, 'is_spotify_muted', mute)
+        if self.applied_muted != mute:
+            return  # The controller couldn't (e.g. no Spotify streams yet) and has logged why
+        ack = MuteAck(mute, requested_at, self.clock(), replaced)
+        self.last_ack = ack
+        self.latency.record(ack.latency)
+        if self.on_ack is not None:
+            self.on_ack(ack)
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until every request so far has been applied"""
+        with self._wake:
+            return self._wake.wait_for(lambda: self._slot is None and not self._busy, timeout)
+
+    def describe(self) -> str:
+        return (f"{self.requests} requests, {self.coalesced} coalesced, "
+                f"applied in {self.latency.describe()}")
+
+    def close(self):
+        """
+        Apply the last request and stop the worker. The wrapped controller stays
+        open: fades started by that last request still need it, so its owner
+        closes it once they have finished.
+        """
+        with self._wake:
+            self._closed = True
+            self._wake.notify_all()
+        self._thread.join(timeout=10.0)
+        if self.requests:
+            logger.debug(f"Mute actuator: {self.describe()}")
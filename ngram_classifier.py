@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Character n-gram statistical ad classifier for Spotify window titles
+Logistic regression over hashed character n-grams, scored with NumPy
+
+Usage:
+    python ngram_classifier.py train corpus/titles_v1.json -o models/ngram_model.npz
+    python ngram_classifier.py score models/ngram_model.npz "Title one" "Title two"
+"""
+
+import os
+import json
+import zlib
+import argparse
+from typing import List, Sequence, Tuple
+
+# NumPy is optional: only this backend needs it
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+MODEL_FORMAT_VERSION = 1
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "ngram_model.npz")
+
+def title_ngrams(title: str, n_min: int = 2, n_max: int = 4) -> List[str]:
+    """Distinct character n-grams of a title, padded so word boundaries count"""
+    text = f" {title.casefold()} "
+    grams = set()
+    for n in range(n_min, n_max + 1):
+        for i in range(len(text) - n + 1):
+            grams.add(text[i:i + n])
+    return list(grams)
+
+class NgramAdClassifier:
+    """Logistic regression over hashed character n-grams (binary presence features)"""
+
+    def __init__(self, weights=None, bias: float = 0.0, n_features: int = 2 ** 18,
+                 n_min: int = 2, n_max: int = 4):
+        if not NUMPY_AVAILABLE:
+            raise ImportError("The n-gram classifier needs NumPy: pip install numpy")
+        self.n_features = n_features
+        self.n_min = n_min
+        self.n_max = n_max
+        self.weights = weights if weights is not None else np.zeros(n_features, dtype=np.float32)
+        self.bias = float(bias)
+
+    def _feature_ids(self, title: str) -> List[int]:
+        # crc32 is stable across processes, unlike hash()
+        mask = self.n_features - 1
+        return [zlib.crc32(gram.encode('utf-8')) & mask for gram in title_ngrams(title, self.n_min, self.n_max)]
+
+    def vectorize(self, titles: Sequence[str]) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Titles -> CSR-style (feature indices, row offsets) of a sparse binary matrix"""
+        rows = [self._feature_ids(title) for title in titles]
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(row) for row in rows], out=offsets[1:])
+        indices = np.fromiter((i for row in rows for i in row), dtype=np.int64, count=int(offsets[-1]))
+        return indices, offsets
+
+    def _decision(self, indices: "np.ndarray", offsets: "np.ndarray") -> "np.ndarray":
+        """Sparse matrix-vector product X @ w + b"""
+        contributions = self.weights[indices]
+        sums = np.zeros(len(offsets) - 1, dtype=np.float64)
+        non_empty = offsets[1:] > offsets[:-1]
+        if contributions.size:
+            sums[non_empty] = np.add.reduceat(contributions, offsets[:-1][non_empty])
+        return sums + self.bias
+
+    def predict_proba(self, titles: Sequence[str]) -> "np.ndarray":
+        """Ad probability for each title, scored as one batch"""
+        if not titles:
+            return np.zeros(0)
+        decision = self._decision(*self.vectorize(titles))
+        return 1.0 / (1.0 + np.exp(-decision))
+
+    def fit(self, titles: Sequence[str], labels: Sequence[bool], epochs: int = 300,
+            learning_rate: float = 0.5, l2: float = 1e-4) -> "NgramAdClassifier":
+        """Full-batch gradient descent on the logistic loss"""
+        indices, offsets = self.vectorize(titles)
+        y = np.asarray(labels, dtype=np.float64)
+        row_of_index = np.repeat(np.arange(len(titles)), np.diff(offsets))
+        weights = np.zeros(self.n_features, dtype=np.float64)
+        bias = 0.0
+        n = len(titles)
+
+        for _ in range(epochs):
+            self.weights, self.bias = weights, bias
+            residual = 1.0 / (1.0 + np.exp(-self._decision(indices, offsets))) - y
+            # X^T @ residual for the sparse binary matrix
+            gradient = np.bincount(indices, weights=residual[row_of_index], minlength=self.n_features) / n
+            weights -= learning_rate * (gradient + l2 * weights)
+            bias -= learning_rate * residual.mean()
+
+        self.weights = weights.astype(np.float32)
+        self.bias = bias
+        return self
+
+    def save(self, path: str):
+        """Save the model as a compressed .npz"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez_compressed(path, weights=self.weights, bias=self.bias,
+                            meta=np.array([MODEL_FORMAT_VERSION, self.n_features, self.n_min, self.n_max]))
+
+    @classmethod
+    def load(cls, path: str) -> "NgramAdClassifier":
+        """Load a model saved with save()"""
+        with np.load(path) as data:
+            version, n_features, n_min, n_max = (int(x) for x in data['meta'])
+            if version != MODEL_FORMAT_VERSION:
+                raise ValueError(f"{path}: unsupported model format {version}")
+            return cls(data['weights'], float(data['bias']), n_features, n_min, n_max)
+
+def load_labeled_titles(path: str) -> Tuple[List[str], List[bool]]:
+    """Read a labeled title file: corpus JSON ({'titles': [{title, ad}]}) or TSV lines 'ad|music<TAB>title'"""
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.json'):
+            entries = json.load(f)['titles']
+            return [e['title'] for e in entries], [bool(e['ad']) for e in entries]
+        titles, labels = [], []
+        for line in f:
+            label, _, title = line.rstrip('\r\n').partition('\t')
+            if label in ('ad', 'music'):
+                titles.append(title)
+                labels.append(label == 'ad')
+        return titles, labels
+
+def main():
+    parser = argparse.ArgumentParser(description="Train or run the n-gram ad classifier")
+    sub = parser.add_subparsers(dest='command', required=True)
+    train = sub.add_parser('train', help="Train a model from a labeled title file")
+    train.add_argument('labeled_file')
+    train.add_argument('-o', '--output', default=DEFAULT_MODEL_PATH)
+    train.add_argument('--epochs', type=int, default=300)
+    score = sub.add_parser('score', help="Score titles with a trained model")
+    score.add_argument('model')
+    score.add_argument('titles', nargs='+')
+    args = parser.parse_args()
+
+    if args.command == 'train':
+        titles, labels = load_labeled_titles(args.labeled_file)
+        model = NgramAdClassifier().fit(titles, labels, epochs=args.epochs)
+        predictions = model.predict_proba(titles) >= 0.5
+        accuracy = float(np.mean(predictions == np.asarray(labels)))
+        model.save(args.output)
+        print(f"✅ Trained on {len(titles)} titles (training accuracy {accuracy:.1%}) -> {args.output}")
+    else:
+        model = NgramAdClassifier.load(args.model)
+        for title, probability in zip(args.titles, model.predict_proba(args.titles)):
+            print(f"{probability:.3f}\t{title}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Ad pattern packs for Spotify Ad Silencer
+Loads versioned JSON/TOML pattern files and tracks them for hot reload
+"""
+
+import os
+import sys
+import json
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Python 3.11+ ships tomllib; older versions can use the tomli backport
+try:
+    import tomllib
+    TOML_AVAILABLE = True
+except ImportError:
+    try:
+        import tomli as tomllib
+        TOML_AVAILABLE = True
+    except ImportError:
+        TOML_AVAILABLE = False
+
+PACK_FORMAT_VERSION = 1
+PACK_EXTENSIONS = ('.json', '.toml')
+PATTERN_TYPES = ('exact', 'contains', 'regex')
+
+class PatternPackError(ValueError):
+    """Raised when a pattern pack file is malformed"""
+
+@dataclass
+class PatternPack:
+    """A parsed pattern pack file"""
+    name: str
+    version: str
+    path: str
+    patterns: List[Dict] = field(default_factory=list)  # {pattern, language, confidence, type}
+
+def default_pack_dirs() -> List[str]:
+    """Bundled pattern directory, including PyInstaller bundle locations"""
+    if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
+        return [os.path.join(sys._MEIPASS, 'patterns')]
+    return [os.path.join(os.path.dirname(os.path.abspath(__file__)), 'patterns')]
+
+def parse_pack(path: str, raw: bytes) -> PatternPack:
+    """Parse and validate the contents of one pack file"""
+    try:
+        if path.endswith('.toml'):
+            if not TOML_AVAILABLE:
+                raise PatternPackError("TOML packs need Python 3.11+ or the 'tomli' package")
+            data = tomllib.loads(raw.decode('utf-8'))
+        else:
+            data = json.loads(raw.decode('utf-8'))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise PatternPackError(f"{path}: {e}") from e
+
+    if not isinstance(data, dict):
+        raise PatternPackError(f"{path}: top level must be an object")
+    if data.get('format') != PACK_FORMAT_VERSION:
+        raise PatternPackError(f"{path}: unsupported pack format {data.get('format')!r} "
+                               f"(expected {PACK_FORMAT_VERSION})")
+
+    default_language = data.get('language', 'generic')
+    patterns = []
+    for i, entry in enumerate(data.get('patterns', [])):
+        try:
+            pattern = {
+                'pattern': str(entry['pattern']),
+                'language': str(entry.get('language', default_language)),
+                'confidence': float(entry['confidence']),
+                'type': str(entry['type']),
+            }
+        except (KeyError, TypeError, ValueError) as e:
+            raise PatternPackError(f"{path}: pattern #{i + 1} is invalid ({e})") from e
+        if pattern['type'] not in PATTERN_TYPES:
+            raise PatternPackError(f"{path}: pattern #{i + 1} has unknown type '{pattern['type']}'")
+        if not 0.0 <= pattern['confidence'] <= 1.0:
+            raise PatternPackError(f"{path}: pattern #{i + 1} confidence must be within 0.0-1.0")
+        patterns.append(pattern)
+
+    name = str(data.get('name', os.path.splitext(os.path.basename(path))[0]))
+    return PatternPack(name, str(data.get('version', '0')), path, patterns)
+
+class PatternPackLoader:
+    """Finds pack files, loads them and detects changes by mtime for hot reload"""
+
+    def __init__(self, pack_dirs: Optional[List[str]] = None):
+        self.pack_dirs = pack_dirs if pack_dirs is not None else default_pack_dirs()
+        self.packs: List[PatternPack] = []
+        self.content_hash: Optional[str] = None
+        self._mtimes: Dict[str, float] = {}
+
+    def find_pack_files(self) -> List[str]:
+        """All pack files in the configured directories, in load order"""
+        paths = []
+        for directory in self.pack_dirs:
+            try:
+                names = sorted(os.listdir(directory))
+            except OSError:
+                continue
+            paths.extend(os.path.join(directory, name) for name in names
+                         if name.endswith(PACK_EXTENSIONS))
+        return paths
+
+    def _current_mtimes(self) -> Dict[str, float]:
+        mtimes = {}
+        for path in self.find_pack_files():
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+        return mtimes
+
+    def has_changed(self) -> bool:
+        """Cheap check: did any pack file appear, disappear or get modified?"""
+        return self._current_mtimes() != self._mtimes
+
+    def load(self) -> Tuple[List[PatternPack], bool]:
+        """
+        (Re)load all packs. Returns (packs, changed) where `changed` is False when
+        the combined content hash is identical to the previous load, so callers can
+        skip recompiling. Broken packs are logged and skipped.
+        """
+        self._mtimes = self._current_mtimes()
+        digest = hashlib.sha256()
+        packs = []
+
+        for path in self._mtimes:
+            try:
+                with open(path, 'rb') as f:
+                    raw = f.read()
+                pack = parse_pack(path, raw)
+            except (OSError, PatternPackError) as e:
+                logger.warning(f"Skipping pattern pack: {e}")
+                continue
+            digest.update(path.encode('utf-8'))
+            digest.update(raw)
+            packs.append(pack)
+            logger.debug(f"Loaded pattern pack '{pack.name}' v{pack.version} ({len(pack.patterns)} patterns)")
+
+        content_hash = digest.hexdigest()
+        changed = content_hash != self.content_hash
+        self.content_hash = content_hash
+        if changed:
+            self.packs = packs
+        return self.packs, changed
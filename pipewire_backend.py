@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Native PipeWire backend for Spotify Ad Silencer (Linux)
+Follows Spotify's audio stream nodes through one long-running `pw-dump --monitor`
+and mutes them with Props params over a persistent `pw-cli` session, bypassing
+pipewire-pulse; stream metadata changes double as a detection signal
+
+Opt-in: set SPOTIFY_AUDIO_BACKEND=pipewire to use it instead of PulseAudio
+
+Self-test (starts a headless pipewire daemon with a null sink and a fake
+Spotify stream):
+    python pipewire_backend.py --selftest
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import logging
+import tempfile
+import threading
+import subprocess
+from typing import Callable, Dict, List, Optional
+
+from pulse_streams import is_spotify_stream
+from window_backends import SpotifyWindow
+
+logger = logging.getLogger(__name__)
+
+# The PipeWire command line tools are optional: without them Linux uses pulsectl
+PW_DUMP = shutil.which('pw-dump')
+PW_CLI = shutil.which('pw-cli')
+PIPEWIRE_AVAILABLE = bool(PW_DUMP and PW_CLI)
+# Native control is opt-in; by default PipeWire desktops are driven through pipewire-pulse
+PIPEWIRE_REQUESTED = os.environ.get('SPOTIFY_AUDIO_BACKEND', '').lower() == 'pipewire'
+
+NODE_TYPE = 'PipeWire:Interface:Node'
+STREAM_CLASS = 'Stream/Output/Audio'
+
+# Characters that open, close or quote JSON values
+JSON_STRUCTURE = re.compile(r'[][{}"\\]')
+
+class PipeWireNode:
+    """An audio output stream node: its properties, state and Props (mute, channel volumes)"""
+
+    __slots__ = ('id', 'props', 'state', 'mute', 'volumes', 'updated_at')
+
+    def __init__(self, node_id: int):
+        self.id = node_id
+        self.props: Dict[str, object] = {}
+        self.state = ''          # 'running', 'idle', 'suspended', ...
+        self.mute = False
+        self.volumes: List[float] = []  # Linear channelVolumes
+        self.updated_at = 0.0
+
+    @property
+    def pid(self) -> Optional[str]:
+        pid = self.props.get('application.process.id')
+        return None if pid is None else str(pid)
+
+    @property
+    def volume(self) -> float:
+        """Loudest channel on the cubic scale pactl and wpctl show (same scale as pulsectl)"""
+        return max(self.volumes) ** (1 / 3) if self.volumes else 1.0
+
+    def title(self) -> Optional[str]:
+        """'Artist - Title' when the stream carries media metadata"""
+        title = self.props.get('media.title')
+        artist = self.props.get('media.artist')
+        if title and artist:
+            return f"{artist} - {title}"
+        return str(title) if title else None
+
+    def __repr__(self) -> str:
+        return f"PipeWireNode({self.id}, {self.props.get('application.name')!r}, {self.state}, mute={self.mute})"
+
+def update_node(node: PipeWireNode, info: Dict) -> PipeWireNode:
+    """Merge a pw-dump node 'info' object (full or partial) into `node`"""
+    if info.get('props'):
+        node.props.update(info['props'])
+    if info.get('state'):
+        node.state = info['state']
+    for props in (info.get('params') or {}).get('Props') or []:
+        # Adapter nodes list several Props objects; the stream controls are in the one with these keys
+        if isinstance(props, dict) and ('mute' in props or 'channelVolumes' in props):
+            node.mute = bool(props.get('mute', node.mute))
+            node.volumes = [float(v) for v in props.get('channelVolumes', node.volumes)]
+            break
+    node.updated_at = time.monotonic()
+    return node
+
+class PipeWireEvent:
+    """A change to one of Spotify's stream nodes ('added', 'changed' or 'removed')"""
+
+    __slots__ = ('kind', 'node', 'at')
+
+    def __init__(self, kind: str, node: PipeWireNode, at: float):
+        self.kind = kind
+        self.node = node
+        self.at = at
+
+    def __repr__(self) -> str:
+        return f"PipeWireEvent({self.kind}, {self.node!r})"
+
+class PipeWireStreams:
+    """
+    Spotify's stream nodes, kept current by a reader thread on `pw-dump --monitor`
+    (it prints every object once, then each object again whenever it changes, and
+    `{"id": N, "info": null}` when it goes away). Mute and volume changes are
+    written to one persistent `pw-cli` session, so they cost neither a process
+    start nor a new connection; the monitor then confirms them.
+    """
+
+    def __init__(self, process_names: List[str], remote: Optional[str] = None):
+        if not PIPEWIRE_AVAILABLE:
+            raise ImportError("The PipeWire backend needs pw-dump and pw-cli")
+        self.process_names = list(process_names)
+        self.remote = remote
+        self.nodes: Dict[int, PipeWireNode] = {}  # All output streams, by node id
+        self.events = 0
+        self._listeners: List[Callable[[PipeWireEvent], None]] = []
+        self._changed = threading.Condition()
+        self._ready = threading.Event()
+        self._closed = False
+        self._monitor: Optional[subprocess.Popen] = None
+        self._cli: Optional[subprocess.Popen] = None
+        self._cli_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="pipewire-monitor", daemon=True)
+
+    def _command(self, tool: str, *args: str) -> List[str]:
+        return [tool, *(['-r', self.remote] if self.remote else []), *args]
+
+    def start(self) -> "PipeWireStreams":
+        self._thread.start()
+        return self
+
+    @property
+    def ready(self) -> bool:
+        """True once the monitor has listed the graph (and while it keeps running)"""
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout: float) -> bool:
+        return self._ready.wait(timeout)
+
+    def add_listener(self, callback: Callable[[PipeWireEvent], None]):
+        """Call `callback` (on the monitor thread) for every change to a Spotify stream"""
+        self._listeners.append(callback)
+
+    def streams(self) -> List[PipeWireNode]:
+        """Spotify's current output stream nodes"""
+        with self._changed:
+            return [node for node in self.nodes.values() if is_spotify_stream(node.props, self.process_names)]
+
+    def wait_for_change(self, timeout: float) -> bool:
+        """Sleep up to `timeout`, returning True early when a Spotify stream changes"""
+        with self._changed:
+            events = self.events
+            return self._changed.wait_for(lambda: self.events != events or self._closed, timeout) and not self._closed
+
+    def wait_for(self, predicate: Callable[[], bool], timeout: float) -> bool:
+        """Wait until `predicate` (checked against the monitored nodes) holds"""
+        with self._changed:
+            return self._changed.wait_for(predicate, timeout)
+
+    # Monitor thread
+
+    def _run(self):
+        while not self._closed:
+            try:
+                self._monitor = subprocess.Popen(self._command(PW_DUMP, '--monitor', '--no-colors'),
+                                                 stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                                 text=True, errors='replace')
+                self._read(self._monitor.stdout)
+            except Exception as e:
+                if not self._closed:
+                    logger.debug(f"PipeWire monitor failed: {e}")
+            finally:
+                self._ready.clear()
+                if self._monitor is not None:
+                    self._monitor.kill()
+                    self._monitor.wait()
+            if not self._closed:
+                logger.debug("PipeWire monitor stopped, restarting")
+                with self._changed:
+                    self.nodes.clear()
+                time.sleep(1.0)
+
+    def _read(self, stream):
+        """
+        Parse the monitor's concatenated JSON arrays as they arrive: lines are
+        only collected until the brackets (outside strings) balance, so each
+        array is decoded once however many lines it spans
+        """
+        parts: List[str] = []
+        depth = 0
+        in_string = False
+        for line in stream:
+            start = 0
+            escaped_at = -1
+            for match in JSON_STRUCTURE.finditer(line):
+                position, char = match.start(), match.group()
+                if position == escaped_at:
+                    continue
+                if in_string:
+                    if char == '\\':
+                        escaped_at = position + 1
+                    elif char == '"':
+                        in_string = False
+                elif char == '"':
+                    in_string = True
+                elif char in '[{':
+                    depth += 1
+                elif depth:
+                    depth -= 1
+                    if not depth:
+                        parts.append(line[start:match.end()])
+                        start = match.end()
+                        self._decode(''.join(parts))
+                        parts = []
+            if depth:
+                parts.append(line[start:])
+
+    def _decode(self, text: str):
+        try:
+            objects = json.loads(text)
+        except ValueError as e:
+            logger.debug(f"Skipping unparseable pw-dump output: {e}")
+            return
+        self._apply(objects if isinstance(objects, list) else [objects])
+        self._ready.set()
+
+    def _apply(self, objects: List[Dict]):
+        events = []
+        with self._changed:
+            for obj in objects:
+                node_id = obj.get('id')
+                info = obj.get('info')
+                if info is None:
+                    node = self.nodes.pop(node_id, None)
+                    if node is not None:
+                        events.append(PipeWireEvent('removed', node, time.monotonic()))
+                    continue
+                if obj.get('type', NODE_TYPE) != NODE_TYPE:
+                    continue
+                node = self.nodes.get(node_id)
+                media_class = (info.get('props') or {}).get('media.class')
+                if node is None and media_class != STREAM_CLASS:
+                    continue
+                kind = 'changed' if node is not None else 'added'
+                node = update_node(node or PipeWireNode(node_id), info)
+                self.nodes[node_id] = node
+                events.append(PipeWireEvent(kind, node, node.updated_at))
+            events = [event for event in events if is_spotify_stream(event.node.props, self.process_names)]
+            if events:
+                self.events += len(events)
+            self._changed.notify_all()
+        for event in events:
+            for callback in self._listeners:
+                try:
+                    callback(event)
+                except Exception as e:
+                    logger.debug(f"PipeWire listener failed: {e}")
+
+    # Control
+
+    def _send(self, lines: List[str]):
+        """Write commands to the persistent pw-cli session (restarted if it died)"""
+        with self._cli_lock:
+            if self._closed:
+                raise RuntimeError("PipeWire control is closed")
+            for attempt in range(2):
+                if self._cli is None or self._cli.poll() is not None:
+                    self._cli = subprocess.Popen(self._command(PW_CLI), stdin=subprocess.PIPE,
+                                                 stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                                 text=True, bufsize=1)
+                try:
+                    self._cli.stdin.write(''.join(f"{line}\n" for line in lines))
+                    self._cli.stdin.flush()
+                    return
+                except (BrokenPipeError, OSError):
+                    self._cli = None
+                    if attempt:
+                        raise
+
+    def set_mute(self, nodes: List[PipeWireNode], mute: bool, timeout: float = 0.0) -> bool:
+        """
+        Mute or unmute nodes in one batch; with a timeout, wait until the monitor
+        shows every node in the new state (False if it didn't in time)
+        """
+        ids = [node.id for node in nodes]
+        value = 'true' if mute else 'false'
+        self._send([f"set-param {node_id} Props {{ mute: {value} }}" for node_id in ids])
+        if timeout <= 0:
+            return True
+        return self.wait_for(lambda: all(node_id in self.nodes and self.nodes[node_id].mute == mute
+                                         for node_id in ids), timeout)
+
+    def set_volume(self, node: PipeWireNode, level: float):
+        """Set every channel of a node to `level` (cubic scale, like PipeWireNode.volume)"""
+        linear = max(0.0, level) ** 3
+        channels = ', '.join(f"{linear:.6f}" for _ in (node.volumes or [0, 0]))
+        self._send([f"set-param {node.id} Props {{ channelVolumes: [ {channels} ] }}"])
+
+    def close(self):
+        with self._cli_lock:
+            self._closed = True  # Under the lock, so no send starts a new pw-cli after this
+        with self._changed:
+            self._changed.notify_all()
+        for process in (self._monitor, self._cli):
+            if process is not None and process.poll() is None:
+                process.kill()
+                process.wait()
+        if self._thread.is_alive():
+            self._thread.join(timeout=2.0)
+
+_shared: Optional[PipeWireStreams] = None
+_shared_lock = threading.Lock()
+
+def shared_streams(process_names: Optional[List[str]] = None) -> PipeWireStreams:
+    """The process-wide monitor, shared by the audio controller and the window backend"""
+    global _shared
+    with _shared_lock:
+        if _shared is None or _shared._closed:
+            _shared = PipeWireStreams(process_names or ['spotify', 'Spotify']).start()
+        return _shared
+
+class PipeWireTitleWatcher:
+    """Spotify's stream metadata (media.title / media.artist) as a window title"""
+
+    def __init__(self, streams: PipeWireStreams):
+        self.streams = streams
+
+    def get_window(self) -> Optional[SpotifyWindow]:
+        for node in self.streams.streams():
+            title = node.title()
+            if title:
+                return SpotifyWindow(title)
+        return None
+
+def run_selftest() -> bool:
+    """Start a private pipewire daemon, add a null sink and a fake Spotify stream, and check muting"""
+    pipewire = shutil.which('pipewire')
+    if not (PIPEWIRE_AVAILABLE and pipewire):
+        print("❌ pipewire, pw-dump and pw-cli are needed for the self-test")
+        return False
+    runtime = tempfile.mkdtemp(prefix='sas-pipewire-')
+    env = dict(os.environ, XDG_RUNTIME_DIR=runtime, PIPEWIRE_RUNTIME_DIR=runtime)
+    env.pop('PIPEWIRE_REMOTE', None)
+    os.environ.update(XDG_RUNTIME_DIR=runtime, PIPEWIRE_RUNTIME_DIR=runtime)
+    daemon = subprocess.Popen([pipewire], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    streams = None
+    try:
+        deadline = time.monotonic() + 5.0
+        while subprocess.run([PW_CLI, 'info', '0'], env=env, capture_output=True).returncode != 0:
+            if time.monotonic() > deadline:
+                print("❌ pipewire daemon did not start")
+                return False
+            time.sleep(0.1)
+
+        def create_node(props: str):
+            subprocess.run([PW_CLI, 'create-node', 'adapter', props], env=env, capture_output=True, check=True)
+
+        create_node("{ factory.name=support.null-audio-sink node.name=sas-null-sink "
+                    "media.class=Audio/Sink object.linger=true audio.position=[FL FR] }")
+        create_node("{ factory.name=support.null-audio-sink node.name=sas-fake-spotify "
+                    "media.class=Stream/Output/Audio application.name=Spotify "
+                    "application.process.binary=spotify application.process.id=4242 "
+                    "media.title=\"Song\" media.artist=\"Artist\" object.linger=true audio.position=[FL FR] }")
+
+        streams = PipeWireStreams(['spotify', 'Spotify']).start()
+        ok = streams.wait_ready(5.0) and streams.wait_for(lambda: bool(streams.streams()), 5.0)
+        found = streams.streams()
+        print(f"{'✅' if ok else '❌'} Spotify stream found: {found}")
+        if not ok:
+            return False
+
+        window = PipeWireTitleWatcher(streams).get_window()
+        passed = window is not None and window.title == "Artist - Song"
+        ok = ok and passed
+        print(f"{'✅' if passed else '❌'} Title from stream metadata: {window.title if window else None!r}")
+
+        for mute in (True, False, True, False):
+            started = time.perf_counter()
+            passed = streams.set_mute(found, mute, timeout=2.0)
+            ok = ok and passed
+            print(f"{'✅' if passed else '❌'} {'muted' if mute else 'unmuted'} in "
+                  f"{(time.perf_counter() - started) * 1000:.1f} ms (confirmed by the monitor)")
+
+        streams.set_volume(found[0], 0.5)
+        passed = streams.wait_for(lambda: abs(streams.nodes[found[0].id].volume - 0.5) < 0.01, 2.0)
+        ok = ok and passed
+        print(f"{'✅' if passed else '❌'} volume set to 0.5")
+        return ok
+    finally:
+        if streams is not None:
+            streams.close()
+        daemon.terminate()
+        daemon.wait()
+        shutil.rmtree(runtime, ignore_errors=True)
+
+if __name__ == "__main__":
+    if '--selftest' not in sys.argv:
+        print(__doc__)
+        sys.exit(0)
+    sys.exit(0 if run_selftest() else 1)
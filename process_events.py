@@ -0,0 +1,340 @@
+"""
+Process discovery for Spotify Ad Silencer
+A shared, memoized process scanner (/proc on Linux, psutil elsewhere) plus
+event-driven start detection over the Linux netlink process connector
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import socket
+import struct
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# <linux/netlink.h>, <linux/connector.h>, <linux/cn_proc.h>
+NETLINK_CONNECTOR = 11
+CN_IDX_PROC = 1
+CN_VAL_PROC = 1
+NLMSG_DONE = 3
+PROC_CN_MCAST_LISTEN = 1
+PROC_CN_MCAST_IGNORE = 2
+PROC_EVENT_EXEC = 0x00000002
+PROC_EVENT_COMM = 0x00000200
+PROC_EVENT_EXIT = 0x80000000
+
+_NLMSGHDR = struct.Struct('=IHHII')    # len, type, flags, seq, pid
+_CN_MSG = struct.Struct('=IIIIHH')     # id.idx, id.val, seq, ack, len, flags
+_PROC_EVENT = struct.Struct('=IIQ')    # what, cpu, timestamp_ns
+_PROC_IDS = struct.Struct('=II')       # process_pid, process_tgid (exec, exit, comm)
+
+# os.pidfd_open: Python 3.9+ on Linux 5.3+
+PIDFD_AVAILABLE = hasattr(os, 'pidfd_open') and hasattr(select, 'poll')
+PROC_AVAILABLE = sys.platform.startswith('linux') and os.path.isdir('/proc')
+
+# comm is truncated to TASK_COMM_LEN - 1
+COMM_MAX = 15
+
+def read_comm(pid: int) -> Optional[str]:
+    """Process name from /proc/<pid>/comm (kernel-truncated to 15 chars), None if gone"""
+    # Raw os.open/os.read: a buffered file object costs more than the read itself
+    try:
+        fd = os.open(f'/proc/{pid}/comm', os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        return os.read(fd, 64).rstrip(b'\n').decode('utf-8', 'replace')
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+class ProcessScanner:
+    """
+    Process discovery shared by every caller and memoized per scan generation.
+
+    A scan records the name of every process once; callers asking within `max_age`
+    seconds reuse that generation instead of scanning again. On Linux a scan is one
+    os.scandir('/proc') plus a read of each /proc/<pid>/comm - no per-process objects
+    as with psutil.process_iter. Other platforms scan with psutil.
+    """
+
+    def __init__(self, max_age: float = 1.0):
+        self.max_age = max_age
+        self.generation = 0  # Number of real scans so far
+        self._names: Dict[int, str] = {}
+        self._found: Dict[frozenset, List[int]] = {}  # find() results for this generation
+        self._scanned_at: Optional[float] = None
+        self._lock = threading.Lock()  # The connector thread may rescan concurrently
+
+    def _scan(self) -> Dict[int, str]:
+        names = {}
+        if PROC_AVAILABLE:
+            try:
+                entries = os.scandir('/proc')
+            except OSError as e:
+                logger.debug(f"Cannot scan /proc: {e}")
+                return names
+            with entries:
+                for entry in entries:
+                    if entry.name.isdigit():
+                        pid = int(entry.name)
+                        comm = read_comm(pid)
+                        if comm is not None:
+                            names[pid] = comm
+        else:
+            import psutil
+            for proc in psutil.process_iter(['pid', 'name']):
+                names[proc.info['pid']] = proc.info['name']
+        return names
+
+    def _refresh(self, max_age: Optional[float]):
+        """Start a new generation if the current one is older than `max_age` (lock held)"""
+        max_age = self.max_age if max_age is None else max_age
+        now = time.monotonic()
+        if self._scanned_at is None or now - self._scanned_at > max_age:
+            self._names = self._scan()
+            self._found = {}
+            self._scanned_at = now
+            self.generation += 1
+
+    def snapshot(self, max_age: Optional[float] = None) -> Dict[int, str]:
+        """pid -> process name, rescanning if the current generation is older than `max_age`"""
+        with self._lock:
+            self._refresh(max_age)
+            return self._names
+
+    def find(self, names: Iterable[str], max_age: Optional[float] = None) -> List[int]:
+        """PIDs of processes named one of `names` (max_age=0 forces a fresh scan)"""
+        wanted = frozenset(name[:COMM_MAX] for name in names) if PROC_AVAILABLE else frozenset(names)
+        with self._lock:
+            self._refresh(max_age)
+            found = self._found.get(wanted)
+            if found is None:
+                found = self._found[wanted] = [pid for pid, name in self._names.items() if name in wanted]
+            return list(found)
+
+    def invalidate(self):
+        """Force the next caller to rescan"""
+        self._scanned_at = None
+
+# Shared by the process watcher and the Spotify detector
+process_scanner = ProcessScanner()
+
+class ProcConnector:
+    """Netlink process connector socket delivering exec/comm/exit events (needs CAP_NET_ADMIN)"""
+
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_CONNECTOR)
+        try:
+            self.sock.bind((os.getpid(), CN_IDX_PROC))
+            self._send_op(PROC_CN_MCAST_LISTEN)
+        except OSError:
+            self.sock.close()
+            raise
+
+    def _send_op(self, op: int):
+        payload = struct.pack('=I', op)
+        cn_msg = _CN_MSG.pack(CN_IDX_PROC, CN_VAL_PROC, 0, 0, len(payload), 0) + payload
+        header = _NLMSGHDR.pack(_NLMSGHDR.size + len(cn_msg), NLMSG_DONE, 0, 0, os.getpid())
+        self.sock.send(header + cn_msg)
+
+    def receive(self) -> List[tuple]:
+        """Block for the next datagram; returns [(what, pid, tgid, comm or None)]"""
+        data = self.sock.recv(4096)
+        events = []
+        offset = 0
+        while offset + _NLMSGHDR.size <= len(data):
+            length = _NLMSGHDR.unpack_from(data, offset)[0]
+            if length < _NLMSGHDR.size:
+                break
+            body = offset + _NLMSGHDR.size + _CN_MSG.size
+            if body + _PROC_EVENT.size + _PROC_IDS.size <= offset + length:
+                what = _PROC_EVENT.unpack_from(data, body)[0]
+                pid, tgid = _PROC_IDS.unpack_from(data, body + _PROC_EVENT.size)
+                comm = None
+                if what == PROC_EVENT_COMM:
+                    raw = data[body + _PROC_EVENT.size + _PROC_IDS.size:body + _PROC_EVENT.size + _PROC_IDS.size + 16]
+                    comm = raw.split(b'\0', 1)[0].decode('utf-8', 'replace')
+                events.append((what, pid, tgid, comm))
+            offset += (length + 3) & ~3  # NLMSG_ALIGN
+        return events
+
+    def close(self):
+        try:
+            self._send_op(PROC_CN_MCAST_IGNORE)
+        except OSError:
+            pass
+        self.sock.close()
+
+class PidfdTracker:
+    """
+    Exit notification for a set of PIDs through pidfds.
+
+    A pidfd refers to one specific process, not a PID number, and becomes readable
+    when that process exits - so a liveness check is a single zero-timeout poll()
+    over all of them, and a recycled PID can never be mistaken for the original.
+    """
+
+    def __init__(self):
+        self._fds: Dict[int, int] = {}  # pid -> pidfd
+        self._pids: Dict[int, int] = {}  # pidfd -> pid
+        self._poll = select.poll()
+
+    def __len__(self) -> int:
+        return len(self._fds)
+
+    def track(self, pid: int) -> bool:
+        """Start tracking a PID; False if it has already exited"""
+        if pid in self._fds:
+            return True
+        try:
+            fd = os.pidfd_open(pid)
+        except OSError:
+            return False  # ESRCH: already gone
+        self._fds[pid] = fd
+        self._pids[fd] = pid
+        self._poll.register(fd, select.POLLIN)
+        return True
+
+    def untrack(self, pid: int):
+        fd = self._fds.pop(pid, None)
+        if fd is not None:
+            del self._pids[fd]
+            self._poll.unregister(fd)
+            os.close(fd)
+
+    def reap(self) -> List[int]:
+        """Stop tracking processes that exited; returns their PIDs"""
+        exited = [self._pids[fd] for fd, _ in self._poll.poll(0)]
+        for pid in exited:
+            self.untrack(pid)
+        return exited
+
+    def alive(self) -> List[int]:
+        """Tracked PIDs whose process is still running"""
+        self.reap()
+        return sorted(self._fds)
+
+    def close(self):
+        for pid in list(self._fds):
+            self.untrack(pid)
+
+class ProcessWatcher:
+    """
+    Tracks the PIDs of processes with the given names.
+
+    'connector' mode: one scan at start, then exec/comm/exit events from a daemon
+    thread keep the PID set current, so running_pids() is free and
+    wait_for_start() wakes up as soon as a matching process execs.
+    'scan' mode (no privileges): running_pids() uses the shared scanner's /proc scans
+    (at most one per `max_age`) and holds pidfds for what it found, so exits are seen
+    on the next call rather than the next scan.
+    """
+
+    def __init__(self, names: Iterable[str], use_connector: bool = True):
+        self.names = {name[:COMM_MAX] for name in names}
+        self.mode = 'scan'
+        self._pids: Set[int] = set()
+        self._lock = threading.Lock()
+        self._started = threading.Event()
+        self._pidfds = PidfdTracker() if PIDFD_AVAILABLE else None
+        self._connector: Optional[ProcConnector] = None
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+        if use_connector:
+            try:
+                self._connector = ProcConnector()
+            except OSError as e:
+                logger.debug(f"Process connector unavailable ({e}), scanning /proc instead")
+        if self._connector is not None:
+            self.mode = 'connector'
+            # Subscribed first, so nothing that starts during the scan is missed
+            self._pids.update(process_scanner.find(self.names, max_age=0))
+            self._thread = threading.Thread(target=self._run, name="proc-connector", daemon=True)
+            self._thread.start()
+            logger.debug("Watching process starts via the netlink process connector")
+
+    def _run(self):
+        # Wake up periodically so close() can stop the thread
+        self._connector.sock.settimeout(1.0)
+        while not self._closed:
+            try:
+                events = self._connector.receive()
+            except socket.timeout:
+                continue
+            except OSError as e:
+                if self._closed:
+                    return
+                if e.errno == errno.ENOBUFS:
+                    # Socket buffer overran and events were lost - resync from /proc
+                    with self._lock:
+                        self._pids = set(process_scanner.find(self.names, max_age=0))
+                    continue
+                logger.warning(f"Process connector failed ({e}), falling back to /proc scans")
+                self.mode = 'scan'
+                return
+            for what, pid, tgid, comm in events:
+                self._handle(what, pid, tgid, comm)
+
+    def _handle(self, what: int, pid: int, tgid: int, comm: Optional[str]):
+        if pid != tgid:
+            return  # Thread events (thread renames and exits) don't change the process
+        if what == PROC_EVENT_EXEC or what == PROC_EVENT_COMM:
+            name = comm if comm is not None else read_comm(tgid)
+            with self._lock:
+                if name in self.names:
+                    if tgid not in self._pids:
+                        self._pids.add(tgid)
+                        self._started.set()
+                else:
+                    self._pids.discard(tgid)  # Re-exec'd into something else
+        elif what == PROC_EVENT_EXIT:
+            with self._lock:
+                self._pids.discard(tgid)
+
+    def running_pids(self) -> List[int]:
+        """PIDs of matching processes that are currently running"""
+        if self.mode == 'connector':
+            with self._lock:
+                return sorted(self._pids)
+
+        if self._pidfds is None:
+            return process_scanner.find(self.names)
+        # Exits show up on the pidfds right away; new processes on the scanner's interval
+        alive = set(self._pidfds.alive())
+        for pid in process_scanner.find(self.names):
+            if pid in alive:
+                continue
+            # Re-check the name once the pidfd pins the process: the PID may have been reused
+            if self._pidfds.track(pid):
+                if read_comm(pid) in self.names:
+                    alive.add(pid)
+                else:
+                    self._pidfds.untrack(pid)
+        return sorted(alive)
+
+    def wait_for_start(self, timeout: float) -> bool:
+        """
+        Wait up to `timeout` seconds for a matching process to start.
+        Returns True as soon as one execs (connector mode only).
+        """
+        if self.mode != 'connector':
+            self._started.wait(timeout)  # Nothing sets it in scan mode: plain sleep
+            return False
+        started = self._started.wait(timeout)
+        self._started.clear()
+        return started
+
+    def close(self):
+        self._closed = True
+        if self._connector is not None:
+            self._connector.close()
+        if self._pidfds is not None:
+            self._pidfds.close()
@@ -0,0 +1,171 @@
+"""
+PulseAudio stream tracking for Spotify Ad Silencer (Linux)
+Keeps an always-current index of Spotify's sink inputs from pulsectl sink_input
+events, so muting doesn't have to list and scan every stream on the server
+"""
+
+import time
+import bisect
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# pulsectl is optional (and needs libpulse): without it Linux audio control is off
+try:
+    import pulsectl
+    PULSECTL_AVAILABLE = True
+except (ImportError, OSError):
+    PULSECTL_AVAILABLE = False
+
+def is_spotify_stream(proplist: Optional[Dict[str, str]], process_names: Iterable[str]) -> bool:
+    """Does a sink input's property list belong to Spotify?"""
+    if not proplist:
+        return False
+    app_name = proplist.get('application.name', '').lower()
+    process_name = proplist.get('application.process.binary', '').lower()
+    return 'spotify' in app_name or any(proc.lower() in process_name for proc in process_names)
+
+class LatencyHistogram:
+    """Log-spaced latency buckets (0.125 ms to ~1 s) with counts and percentiles"""
+
+    BOUNDS = [0.000125 * 2 ** i for i in range(14)]  # Upper bucket edges in seconds
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)  # Last bucket: slower than every bound
+        self.total = 0
+        self.worst = 0.0
+
+    def record(self, seconds: float):
+        self.counts[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+        self.total += 1
+        self.worst = max(self.worst, seconds)
+
+    def percentile(self, fraction: float) -> float:
+        """Upper edge of the bucket holding the given fraction of samples"""
+        if not self.total:
+            return 0.0
+        target, seen = fraction * self.total, 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return self.BOUNDS[i] if i < len(self.BOUNDS) else self.worst
+        return self.worst
+
+    def render(self, width: int = 40) -> List[str]:
+        """Text bars, one line per non-empty bucket"""
+        peak = max(self.counts) or 1
+        lines = []
+        for i, count in enumerate(self.counts):
+            if count:
+                edge = f"≤{self.BOUNDS[i] * 1000:.3g}ms" if i < len(self.BOUNDS) else "slower"
+                lines.append(f"{edge:>10} {'█' * max(1, round(width * count / peak)):<{width}} {count}")
+        return lines
+
+    def describe(self) -> str:
+        return (f"{self.total} samples, p50 ≤{self.percentile(0.5) * 1000:.3g}ms, "
+                f"p99 ≤{self.percentile(0.99) * 1000:.3g}ms, worst {self.worst * 1000:.2f}ms")
+
+class SinkInputIndex:
+    """
+    Spotify's sink inputs, kept current by a listener thread on its own PulseAudio
+    connection: sink_input 'new'/'change' events re-read that one stream, 'remove'
+    events drop it. streams() is then a dictionary read instead of a server round
+    trip. On disconnect the thread reconnects and rebuilds the index from a list.
+    """
+
+    def __init__(self, process_names: Iterable[str], client_name: str = 'spotify-ad-silencer-index'):
+        if not PULSECTL_AVAILABLE:
+            raise ImportError("The sink input index needs pulsectl")
+        self.process_names = list(process_names)
+        self.client_name = client_name
+        self._streams: Dict[int, object] = {}  # sink input index -> PulseSinkInputInfo
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._closed = False
+        self._pulse = None
+        self.events = 0
+        self._thread = threading.Thread(target=self._run, name="pulse-sink-inputs", daemon=True)
+
+    def start(self) -> "SinkInputIndex":
+        self._thread.start()
+        return self
+
+    @property
+    def ready(self) -> bool:
+        """True while the index is connected and up to date"""
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout: float) -> bool:
+        return self._ready.wait(timeout)
+
+    def streams(self) -> List[object]:
+        """Spotify's current sink inputs (PulseSinkInputInfo objects)"""
+        with self._lock:
+            return list(self._streams.values())
+
+    def _rebuild(self, pulse):
+        streams = {info.index: info for info in pulse.sink_input_list()
+                   if is_spotify_stream(info.proplist, self.process_names)}
+        with self._lock:
+            self._streams = streams
+        logger.debug(f"Sink input index: {len(streams)} Spotify streams")
+
+    def _apply(self, pulse, event):
+        """Update the index for one sink_input event"""
+        self.events += 1
+        if event.t == 'remove':
+            with self._lock:
+                self._streams.pop(event.index, None)
+            return
+        try:
+            info = pulse.sink_input_info(event.index)
+        except pulsectl.PulseIndexError:
+            info = None  # Gone again before we asked
+        with self._lock:
+            if info is not None and is_spotify_stream(info.proplist, self.process_names):
+                self._streams[event.index] = info
+            else:
+                self._streams.pop(event.index, None)
+
+    def _run(self):
+        while not self._closed:
+            try:
+                with pulsectl.Pulse(self.client_name) as pulse:
+                    self._pulse = pulse
+                    pending = []
+
+                    def on_event(event):
+                        pending.append(event)
+                        raise pulsectl.PulseLoopStop  # Handle it outside the callback
+
+                    pulse.event_mask_set('sink_input')
+                    pulse.event_callback_set(on_event)
+                    self._rebuild(pulse)
+                    self._ready.set()
+                    while not self._closed:
+                        pulse.event_listen(timeout=1.0)
+                        # No pulse calls are allowed inside event callbacks
+                        events, pending[:] = pending[:], []
+                        for event in events:
+                            self._apply(pulse, event)
+            except Exception as e:
+                if self._closed:
+                    break
+                logger.debug(f"Sink input index lost PulseAudio ({e}), reconnecting")
+            finally:
+                self._ready.clear()
+                self._pulse = None
+            if not self._closed:
+                time.sleep(1.0)
+
+    def close(self):
+        self._closed = True
+        pulse = self._pulse
+        if pulse is not None:
+            try:
+                pulse.event_listen_stop()
+            except Exception:
+                pass
+        self._thread.join(timeout=2.0)
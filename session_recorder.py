@@ -0,0 +1,179 @@
+"""
+Session recording for Spotify Ad Silencer
+Appends every observed title and every mute/audio action to a compact text
+file so sessions can be replayed later (see session_replay.py)
+"""
+
+import os
+import json
+import time
+import logging
+from typing import Callable, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+SESSION_MAGIC = '#sas-session'
+SESSION_VERSION = 1
+
+# One event per line: '<seconds since session start>\t<kind>[\t<value>]'
+TITLE = 'T'          # Value: JSON string; 'T+'/'T-' when the backend flagged it ad/music
+NO_WINDOW = 'N'      # Spotify runs but has no window
+NOT_RUNNING = 'S'    # Spotify is not running
+MUTE = 'M'
+UNMUTE = 'U'
+AUDIO = 'A'          # Value: 'start' or 'stop' (replacement audio)
+END = 'E'            # Clean shutdown
+
+_AD_FLAGS = {None: '', True: '+', False: '-'}
+
+class SessionEvent(NamedTuple):
+    at: float
+    kind: str
+    value: Optional[str] = None
+    is_ad: Optional[bool] = None  # Backend ad flag, for TITLE events
+
+class SessionRecorder:
+    """
+    Append-only session writer. Observations are deduplicated (only changes are
+    written) and every line is flushed as written, so a crash loses nothing but
+    the clean END marker. Each session starts with its own header line.
+    """
+
+    def __init__(self, path: str, clock: Callable[[], float] = time.monotonic):
+        self.path = path
+        self.clock = clock
+        self._started = clock()
+        self._last_observation = None
+        self.events = 0
+        self._file = open(path, 'a', encoding='utf-8', buffering=1)
+        self._file.write(f"{SESSION_MAGIC} v{SESSION_VERSION} {time.strftime('%Y-%m-%dT%H:%M:%S')}\n")
+
+    def _write(self, kind: str, value: Optional[str] = None):
+        at = self.clock() - self._started
+        self._file.write(f"{at:.3f}\t{kind}\n" if value is None else f"{at:.3f}\t{kind}\t{value}\n")
+        self.events += 1
+
+    def _observe(self, observation, kind: str, value: Optional[str] = None):
+        if observation != self._last_observation:
+            self._last_observation = observation
+            self._write(kind, value)
+
+    def observe_window(self, window):
+        """Record what the window backend reported (a SpotifyWindow or None)"""
+        if window is None:
+            self._observe(NO_WINDOW, NO_WINDOW)
+        else:
+            self._observe((window.title, window.is_ad), TITLE + _AD_FLAGS[window.is_ad],
+                          json.dumps(window.title, ensure_ascii=False))
+
+    def observe_not_running(self):
+        self._observe(NOT_RUNNING, NOT_RUNNING)
+
+    def mute(self, mute: bool):
+        self._write(MUTE if mute else UNMUTE)
+
+    def audio(self, action: str):
+        self._write(AUDIO, action)
+
+    def close(self):
+        if not self._file.closed:
+            self._write(END)
+            self._file.close()
+
+def open_session_recorder(path: Optional[str] = None) -> Optional[SessionRecorder]:
+    """Recorder for `path` or $SPOTIFY_SESSION_RECORD, or None when recording is off"""
+    path = path or os.environ.get('SPOTIFY_SESSION_RECORD')
+    if not path:
+        return None
+    try:
+        recorder = SessionRecorder(path)
+        logger.info(f"⏺️  Recording session to {path}")
+        return recorder
+    except OSError as e:
+        logger.warning(f"Cannot record session to {path}: {e}")
+        return None
+
+def load_sessions(path: str) -> List[List[SessionEvent]]:
+    """Parse a recording file into its sessions (oldest first); malformed lines are skipped"""
+    sessions: List[List[SessionEvent]] = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if line.startswith(SESSION_MAGIC):
+                sessions.append([])
+                continue
+            if not line or not sessions:
+                continue
+            fields = line.split('\t', 2)
+            try:
+                at, kind = float(fields[0]), fields[1]
+                value = fields[2] if len(fields) > 2 else None
+                if kind[:1] == TITLE:
+                    flag = kind[1:]
+                    sessions[-1].append(SessionEvent(at, TITLE, json.loads(value),
+                                                     True if flag == '+' else False if flag == '-' else None))
+                else:
+                    sessions[-1].append(SessionEvent(at, kind, value))
+            except (IndexError, ValueError):
+                logger.debug(f"Skipping malformed session line: {line!r}")
+    return sessions
+
+class RecordingAudioController:
+    """
+    Wraps an audio controller (or stands in for one) and records each mute
+    change with the time it was requested.
+    """
+
+    def __init__(self, inner=None, recorder: Optional[SessionRecorder] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.inner = inner
+        self.recorder = recorder
+        self.clock = clock
+        self.events: List[tuple] = []  # (clock time, muted)
+        self.is_spotify_muted = False
+
+    def set_spotify_mute(self, mute: bool):
+        self.events.append((self.clock(), mute))
+        if self.recorder is not None:
+            self.recorder.mute(mute)
+        if self.inner is not None:
+            self.inner.set_spotify_mute(mute)
+        self.is_spotify_muted = mute
+
+    def close(self):
+        if self.inner is not None and hasattr(self.inner, 'close'):
+            self.inner.close()
+
+class RecordingAudioPlayer:
+    """Wraps EnhancedAudioPlayer (or stands in for it silently) and records start/stop actions"""
+
+    def __init__(self, inner=None, recorder: Optional[SessionRecorder] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.inner = inner
+        self.recorder = recorder
+        self.clock = clock
+        self.events: List[tuple] = []  # (clock time, action)
+        self.is_playing = False
+
+    def _action(self, action: str):
+        self.events.append((self.clock(), action))
+        if self.recorder is not None:
+            self.recorder.audio(action)
+
+    def start_ad_audio_sequence(self):
+        if not self.is_playing:
+            self._action('start')
+        self.is_playing = True
+        if self.inner is not None:
+            self.inner.start_ad_audio_sequence()
+
+    def update_audio_playback(self):
+        if self.inner is not None:
+            self.inner.update_audio_playback()
+
+    def stop_audio(self):
+        if self.is_playing:
+            self._action('stop')
+        self.is_playing = False
+        if self.inner is not None:
+            self.inner.stop_audio()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Accelerated replay of recorded sessions for Spotify Ad Silencer
+Feeds a recording (see session_recorder.py) back through main()'s detection and
+muting logic on a virtual clock, then compares the replayed decisions with the
+recorded ones: mismatches (e.g. missed ads), flapping and decision latency
+
+Usage:
+    python session_replay.py session.log [--session -1] [--speed 1000] [--poll]
+"""
+
+import sys
+import os
+import time
+import logging
+import argparse
+from typing import List, NamedTuple, Optional, Tuple
+
+# Add current directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from session_recorder import (END, MUTE, NO_WINDOW, NOT_RUNNING as RECORDED_NOT_RUNNING, TITLE, UNMUTE,
+                              RecordingAudioController, RecordingAudioPlayer, SessionEvent,
+                              SessionRecorder, load_sessions)
+from window_backends import NOT_RUNNING, SimulatedBackend
+
+FLAP_WINDOW = 10.0  # A mute change reversed within this many seconds counts as a flap
+
+class VirtualClock:
+    """
+    Time that only moves when someone sleeps. Each sleep advances it instantly;
+    with a `speed`, sleeps also take 1/speed of their length in real time so the
+    replay stays watchable. Either way results don't depend on the machine.
+    """
+
+    def __init__(self, speed: float = 1000.0):
+        self.speed = speed
+        self._now = 0.0
+
+    def now(self) -> float:
+        return self._now
+
+    def sleep(self, seconds: float):
+        seconds = max(0.0, seconds)
+        self._now += seconds
+        if self.speed:
+            time.sleep(seconds / self.speed)
+
+class Decision(NamedTuple):
+    at: float                 # When the observation was recorded
+    observation: str          # Title, or a marker for no window / not running
+    muted: bool               # Mute state in effect when the next observation arrived
+    latency: Optional[float]  # Seconds until the mute state changed, if it did
+
+def session_timeline(events: List[SessionEvent], tail: float = 5.0) -> List[Tuple[float, Optional[str], Optional[bool]]]:
+    """SimulatedBackend timeline from a session's observations, ending at END (or `tail` after the last event)"""
+    timeline = []
+    for event in events:
+        if event.kind == TITLE:
+            timeline.append((event.at, event.value, event.is_ad))
+        elif event.kind == NO_WINDOW:
+            timeline.append((event.at, None, None))
+        elif event.kind == RECORDED_NOT_RUNNING:
+            timeline.append((event.at, NOT_RUNNING, None))
+    end = next((event.at for event in events if event.kind == END), None)
+    if end is None:
+        end = (events[-1].at if events else 0.0) + tail
+    timeline.append((max(end, timeline[-1][0] if timeline else 0.0), None, None))
+    return timeline
+
+def decisions(timeline, mute_events: List[Tuple[float, bool]]) -> List[Decision]:
+    """Mute decision per timeline entry (except the end marker) from (time, muted) events"""
+    result = []
+    muted, cursor = False, 0
+    for index, (at, title, _) in enumerate(timeline[:-1]):
+        next_at = timeline[index + 1][0]
+        latency = None
+        while cursor < len(mute_events) and mute_events[cursor][0] < next_at:
+            when, mute = mute_events[cursor]
+            if mute != muted and latency is None and when >= at:
+                latency = when - at
+            muted = mute
+            cursor += 1
+        label = '<not running>' if title == NOT_RUNNING else '<no window>' if title is None else title
+        result.append(Decision(at, label, muted, latency))
+    return result
+
+def count_flaps(mute_events: List[Tuple[float, bool]]) -> int:
+    """Mute changes that undo the previous change within FLAP_WINDOW seconds"""
+    flaps = 0
+    for (previous_at, previous), (at, mute) in zip(mute_events, mute_events[1:]):
+        if mute != previous and at - previous_at < FLAP_WINDOW:
+            flaps += 1
+    return flaps
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class ReplayResult(NamedTuple):
+    timeline: list
+    backend: SimulatedBackend
+    controller: RecordingAudioController
+    player: RecordingAudioPlayer
+    wall_seconds: float
+
+def replay(events: List[SessionEvent], speed: float = 1000.0, push: bool = True,
+           recorder_path: Optional[str] = None) -> ReplayResult:
+    """Run main() against the session's observations on a virtual clock"""
+    import main as app
+
+    clock = VirtualClock(speed)
+    timeline = session_timeline(events)
+    backend = SimulatedBackend(timeline, clock=clock.now, sleep=clock.sleep, push=push, backend_flags=True)
+    controller = RecordingAudioController(clock=backend.script_time)
+    player = RecordingAudioPlayer(clock=backend.script_time)
+    recorder = SessionRecorder(recorder_path, clock=backend.script_time) if recorder_path else None
+
+    # A fresh detector without the learned known-music store keeps replays reproducible
+    previous_detector = getattr(app.is_ad_playing, '_detector', None)
+    try:
+        from enhanced_ad_detection import EnhancedAdDetector
+        app.is_ad_playing._detector = EnhancedAdDetector()
+    except ImportError:
+        pass
+
+    started = time.perf_counter()
+    try:
+        app.main(window_backend=backend, audio_controller=controller, startup_tasks=False,
+                 audio_player=player, recorder=recorder)
+    finally:
+        if previous_detector is not None:
+            app.is_ad_playing._detector = previous_detector
+        elif hasattr(app.is_ad_playing, '_detector'):
+            del app.is_ad_playing._detector
+    return ReplayResult(timeline, backend, controller, player, time.perf_counter() - started)
+
+def recorded_mutes(events: List[SessionEvent]) -> List[Tuple[float, bool]]:
+    return [(event.at, event.kind == MUTE) for event in events if event.kind in (MUTE, UNMUTE)]
+
+def report(events: List[SessionEvent], result: ReplayResult):
+    recorded = decisions(result.timeline, recorded_mutes(events))
+    replayed = decisions(result.timeline, result.controller.events)
+    span = result.timeline[-1][0]
+
+    print("\n📊 SESSION REPLAY")
+    print("=" * 72)
+    print(f"Observations: {len(recorded)} over {span:.0f}s | replayed in {result.wall_seconds:.2f}s "
+          f"({span / max(result.wall_seconds, 1e-9):,.0f}x)")
+
+    mismatches = [(old, new) for old, new in zip(recorded, replayed) if old.muted != new.muted]
+    if mismatches:
+        print(f"\n⚠️  {len(mismatches)} decisions differ from the recording:")
+        for old, new in mismatches:
+            change = "now muted (was not)" if new.muted else "now unmuted (was muted)"
+            print(f"  {old.at:>9.1f}s  {change:<24} {old.observation!r}")
+    else:
+        print("\n✅ Replayed decisions match the recording")
+
+    print(f"\n{'':<10} {'mutes':>6} {'unmutes':>8} {'flaps':>6} {'latency p50':>12} {'p95':>8} {'max':>8}")
+    for label, mute_events, rows in [("recorded", recorded_mutes(events), recorded),
+                                     ("replayed", result.controller.events, replayed)]:
+        latencies = [row.latency for row in rows if row.latency is not None]
+        mutes = sum(1 for _, mute in mute_events if mute)
+        stats = (f"{percentile(latencies, 0.5) * 1000:>10.0f}ms {percentile(latencies, 0.95) * 1000:>6.0f}ms "
+                 f"{max(latencies) * 1000:>6.0f}ms" if latencies else f"{'-':>12} {'-':>8} {'-':>8}")
+        print(f"{label:<10} {mutes:>6} {len(mute_events) - mutes:>8} {count_flaps(mute_events):>6} {stats}")
+    print("=" * 72)
+    return not mismatches
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded session through the detection loop")
+    parser.add_argument('recording', help="File written with SPOTIFY_SESSION_RECORD")
+    parser.add_argument('--session', type=int, default=-1, help="Session index within the file (default: last)")
+    parser.add_argument('--speed', type=float, default=1000.0, help="Virtual seconds per real second (0: no pacing)")
+    parser.add_argument('--poll', action='store_true', help="Model a polling window scraper instead of pushed titles")
+    parser.add_argument('--record-to', help="Also record the replayed session to this file")
+    parser.add_argument('--verbose', action='store_true', help="Show the loop's log output")
+    args = parser.parse_args()
+
+    sessions = load_sessions(args.recording)
+    if not sessions:
+        print(f"❌ No sessions in {args.recording}")
+        sys.exit(1)
+    events = sessions[args.session]
+
+    if not args.verbose:
+        logging.disable(logging.INFO)
+    result = replay(events, speed=args.speed, push=not args.poll, recorder_path=args.record_to)
+    logging.disable(logging.NOTSET)
+    sys.exit(0 if report(events, result) else 2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Scripted session runner for Spotify Ad Silencer
+Drives the real main() loop with a SimulatedBackend title timeline and a
+recording audio controller, then reports detection latency and mute accuracy
+
+Usage:
+    python simulate_session.py [corpus/session_demo.json] [--speed 60] [--record session.log]
+"""
+
+import sys
+import os
+import time
+import logging
+import argparse
+from typing import List, Tuple
+
+# Add current directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from session_recorder import RecordingAudioController, RecordingAudioPlayer, SessionRecorder
+from window_backends import NOT_RUNNING, SimulatedBackend
+
+def muted_at(events: List[Tuple[float, bool]], at: float) -> bool:
+    """Mute state in effect at script time `at`"""
+    muted = False
+    for when, mute in events:
+        if when > at:
+            break
+        muted = mute
+    return muted
+
+def report(backend: SimulatedBackend, controller: RecordingAudioController):
+    print("\n📊 SIMULATED SESSION")
+    print("=" * 72)
+    print(f"{'at':>7} {'seen after':>11} {'label':>6} {'muted':>6}  title")
+    correct = labelled = 0
+    for index, (at, title, is_ad) in enumerate(backend.timeline):
+        seen = backend.first_seen.get(index)
+        # Judge the decision just before the next entry, once the loop had time to react
+        next_at = backend.timeline[index + 1][0] if index + 1 < len(backend.timeline) else at
+        muted = muted_at(controller.events, max(at, next_at - 1e-6))
+        mark = ""
+        if is_ad is not None and title not in (None, NOT_RUNNING):
+            labelled += 1
+            correct += muted == is_ad
+            mark = "✅" if muted == is_ad else "❌"
+        label = "-" if is_ad is None else ("ad" if is_ad else "music")
+        latency = f"{seen - at:.2f}s" if seen is not None else "never"
+        shown = '<not running>' if title == NOT_RUNNING else repr(title)
+        print(f"{at:>7.1f} {latency:>11} {label:>6} {'yes' if muted else 'no':>6}  {shown} {mark}")
+    latencies = [latency for _, latency in backend.latencies()]
+    print("=" * 72)
+    if latencies:
+        print(f"Detection latency (script time): mean {sum(latencies) / len(latencies):.2f}s, "
+              f"max {max(latencies):.2f}s over {len(latencies)} changes")
+    if labelled:
+        print(f"Mute decisions matching labels: {correct}/{labelled}")
+    print(f"Mute changes: {len(controller.events)} | Backend polls: {backend.polls}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the main loop against a scripted title timeline")
+    parser.add_argument('timeline', nargs='?', default=os.path.join('corpus', 'session_demo.json'),
+                        help="Timeline file (.json with ad labels, or 'seconds<TAB>title' lines)")
+    parser.add_argument('--speed', type=float, default=60.0, help="Script seconds per wall-clock second")
+    parser.add_argument('--record', help="Record the session for session_replay.py")
+    parser.add_argument('--verbose', action='store_true', help="Show the loop's log output")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.INFO)
+    import main as app
+
+    backend = SimulatedBackend.from_file(args.timeline, speed=args.speed)
+    controller = RecordingAudioController(clock=backend.script_time)
+    player = RecordingAudioPlayer(clock=backend.script_time)
+    recorder = SessionRecorder(args.record, clock=backend.script_time) if args.record else None
+    started = time.perf_counter()
+    app.main(window_backend=backend, audio_controller=controller, startup_tasks=False,
+             audio_player=player, recorder=recorder)
+    logging.disable(logging.NOTSET)
+    length = backend.timeline[-1][0] if backend.timeline else 0.0
+    print(f"\nReplayed {length:.0f}s of script in {time.perf_counter() - started:.1f}s")
+    report(backend, controller)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+"""
+Shared test setup for Spotify Ad Silencer
+The modules live at the repository root, next to main.py
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
@@ -0,0 +1,83 @@
+"""
+Fade scheduler: ramps, cancellation and turning a fade around
+"""
+
+import threading
+
+import pytest
+
+from audio_fades import FadeScheduler, Ramp
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+class SteppedFadeScheduler(FadeScheduler):
+    """No timer thread: tests advance the clock and call _step() themselves"""
+
+    def _run(self):
+        pass
+
+@pytest.fixture
+def scheduler(clock):
+    scheduler = SteppedFadeScheduler(clock=clock)
+    yield scheduler
+    scheduler.close()
+
+def test_ramp_levels_follow_the_curve():
+    ramp = Ramp('spotify', print, 1.0, 0.0, 2.0, 'linear', None, 0.0)
+    assert [ramp.level_at(t) for t in (0.0, 1.0, 2.0, 3.0)] == [1.0, 0.5, 0.0, 0.0]
+    rising = Ramp('spotify', print, 0.0, 1.0, 1.0, 'equal-power', None, 0.0)
+    assert rising.level_at(0.5) == pytest.approx(2 ** -0.5)
+
+def test_ramp_runs_to_the_end_and_calls_on_done(scheduler, clock):
+    levels, done = [], threading.Event()
+    scheduler.start('spotify', levels.append, 0.0, 1.0, 'linear', start=1.0, on_done=done.set)
+    clock.now = 0.5
+    scheduler._step()
+    clock.now = 1.0
+    scheduler._step()
+    assert levels[-2:] == [0.5, 0.0]
+    assert done.is_set()
+    assert not scheduler.active('spotify')
+    assert scheduler.level('spotify') == 0.0
+
+def test_cancel_stops_without_on_done(scheduler, clock):
+    levels, done = [], threading.Event()
+    scheduler.start('spotify', levels.append, 0.0, 1.0, 'linear', start=1.0, on_done=done.set)
+    clock.now = 0.25
+    scheduler._step()
+    assert scheduler.cancel('spotify') == 0.75
+    applied = len(levels)
+    clock.now = 2.0
+    scheduler._step()
+    scheduler.close()
+    assert len(levels) == applied
+    assert not done.is_set()
+
+def test_restart_continues_from_the_level_reached(scheduler, clock):
+    out_done = threading.Event()
+    first = scheduler.start('spotify', lambda level: None, 0.0, 1.0, 'linear', start=1.0, on_done=out_done.set)
+    clock.now = 0.4
+    scheduler._step()
+    # Turned out to be music: fade back in from 0.6, not from silence
+    second = scheduler.start('spotify', lambda level: None, 1.0, 1.0, 'linear')
+    assert first.cancelled
+    assert second.start == pytest.approx(0.6)
+    scheduler.close()
+    assert scheduler.level('spotify') == 1.0
+    assert not out_done.is_set()
+
+def test_close_finishes_every_ramp(scheduler, clock):
+    levels, done = [], threading.Event()
+    scheduler.start('replacement', levels.append, 1.0, 5.0, 'smooth', start=0.0, on_done=done.set)
+    scheduler.close()
+    assert levels[-1] == 1.0
+    assert done.is_set()
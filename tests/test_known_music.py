@@ -0,0 +1,55 @@
+"""
+Known-music store: learning by dwell time and the on-disk round trip
+"""
+
+from enhanced_ad_detection import EnhancedAdDetector
+from known_music import KnownMusicStore
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'known_music.bin')
+    store = KnownMusicStore(path, batch_size=1000)
+    for title in ("ABBA - Dancing Queen", "Rammstein - Du Hast"):
+        store.add(title)
+    assert "ABBA - Dancing Queen" in store  # Pending titles count before the flush
+    store.flush()
+
+    reloaded = KnownMusicStore(path)
+    assert len(reloaded) == 2
+    assert "Rammstein - Du Hast" in reloaded
+    assert "Advertisement" not in reloaded
+
+def test_keeps_newest_entries(tmp_path):
+    path = str(tmp_path / 'known_music.bin')
+    store = KnownMusicStore(path, max_entries=2, batch_size=1)
+    for title in ("one", "two", "three"):
+        store.add(title)
+    reloaded = KnownMusicStore(path)
+    assert len(reloaded) == 2
+    assert "one" not in reloaded and "three" in reloaded
+
+def test_corrupt_file_starts_empty(tmp_path):
+    path = tmp_path / 'known_music.bin'
+    path.write_bytes(b'garbage!!')
+    assert len(KnownMusicStore(str(path))) == 0
+
+def test_learns_after_dwell_and_ads_reset_it(tmp_path):
+    store = KnownMusicStore(str(tmp_path / 'known_music.bin'), dwell_seconds=90.0)
+    store.observe("Song", False, now=0.0)
+    store.observe("Song", True, now=60.0)   # Flagged as an ad: dwell restarts
+    store.observe("Song", False, now=100.0)
+    assert "Song" not in store
+    store.observe("Song", False, now=200.0)
+    assert "Song" in store
+
+def test_observe_playback_uses_the_final_decision(tmp_path):
+    detector = EnhancedAdDetector(known_music_path=str(tmp_path / 'known_music.bin'), early_exit=False)
+    detector.known_music.dwell_seconds = 0.0
+    verdict = detector.detect("Artist - Sponsored Track")
+    assert not verdict.is_ad
+    # MPRIS said it is an ad: never learned as music
+    detector.observe_playback(verdict, True)
+    detector.observe_playback(verdict, True)
+    assert "Artist - Sponsored Track" not in detector.known_music
+    detector.observe_playback(verdict)
+    detector.observe_playback(verdict)
+    assert "Artist - Sponsored Track" in detector.known_music
@@ -0,0 +1,67 @@
+"""
+Mute actuator: requests collapse into the latest state while a change is applied
+"""
+
+import threading
+
+from mute_actuator import MuteActuator
+
+class BlockingController:
+    """Audio controller whose calls wait until the test releases them"""
+
+    def __init__(self):
+        self.is_spotify_muted = False
+        self.calls = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.closed = False
+
+    def set_spotify_mute(self, mute: bool):
+        self.entered.set()
+        self.release.wait(5.0)
+        self.calls.append(mute)
+        self.is_spotify_muted = mute
+
+    def close(self):
+        self.closed = True
+
+def test_latest_request_wins():
+    controller = BlockingController()
+    actuator = MuteActuator(controller)
+    actuator.set_spotify_mute(True)
+    assert controller.entered.wait(5.0)  # Worker is busy muting
+    for mute in (False, True, False):
+        actuator.set_spotify_mute(mute)
+    assert actuator.is_spotify_muted is False
+    controller.release.set()
+    assert actuator.wait_idle(5.0)
+    assert controller.calls == [True, False]
+    assert actuator.requests == 4
+    assert actuator.coalesced == 2
+    assert actuator.last_ack.muted is False and actuator.last_ack.coalesced == 2
+    actuator.close()
+
+def test_flip_back_before_applied_is_dropped():
+    controller = BlockingController()
+    actuator = MuteActuator(controller)
+    actuator.set_spotify_mute(True)
+    assert controller.entered.wait(5.0)
+    actuator.set_spotify_mute(False)
+    actuator.set_spotify_mute(True)  # Same as the state being applied
+    controller.release.set()
+    assert actuator.wait_idle(5.0)
+    assert controller.calls == [True]
+    actuator.close()
+
+def test_close_applies_pending_request_and_leaves_controller_open():
+    controller = BlockingController()
+    controller.release.set()
+    acks = []
+    actuator = MuteActuator(controller, on_ack=acks.append)
+    actuator.set_spotify_mute(True)
+    actuator.set_spotify_mute(False)
+    actuator.set_spotify_mute(True)
+    actuator.close()
+    assert controller.is_spotify_muted is True
+    assert acks and acks[-1].muted is True
+    assert not controller.closed  # Its owner closes it after fades finish
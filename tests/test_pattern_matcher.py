@@ -0,0 +1,67 @@
+"""
+Compiled pattern matcher against the per-pattern loop it replaced
+"""
+
+import os
+import json
+import shutil
+
+import pytest
+
+from conftest import ROOT
+from enhanced_ad_detection import AdPattern, CompiledPatternMatcher, EnhancedAdDetector
+from benchmark_ad_detection import uncompiled_classifier
+from title_normalization import normalize_title
+
+THRESHOLDS = (0.5, 0.6, 0.7, 0.8, 0.9)
+
+def corpus_titles():
+    with open(os.path.join(ROOT, 'corpus', 'titles_v1.json'), 'r', encoding='utf-8') as f:
+        titles = [entry['title'] for entry in json.load(f)['titles']]
+    return titles + ["Play Get Premium BY Upgrade", "Get Premium - Now", "Hello by Adele", "Commercial"]
+
+@pytest.fixture
+def desktop_patterns(tmp_path):
+    """Pack directory with only the desktop patterns (the original hard-coded set)"""
+    shutil.copy(os.path.join(ROOT, 'patterns', 'desktop.json'), tmp_path)
+    return str(tmp_path)
+
+@pytest.mark.parametrize('early_exit', [False, True])
+def test_matches_baseline_verdicts(desktop_patterns, early_exit):
+    detector = EnhancedAdDetector(pattern_dirs=[desktop_patterns], cache_size=0, early_exit=early_exit)
+    baseline = uncompiled_classifier(detector)
+    for threshold in THRESHOLDS:
+        differing = [title for title in corpus_titles()
+                     if detector.is_ad_playing(title, threshold) != baseline(title, threshold)]
+        assert differing == [], f"threshold {threshold}"
+
+def test_early_exit_keeps_exhaustive_verdicts():
+    exhaustive = EnhancedAdDetector(cache_size=0, early_exit=False)
+    early = EnhancedAdDetector(cache_size=0, early_exit=True)
+    for threshold in THRESHOLDS:
+        for title in corpus_titles():
+            verdict = early.detect(title, threshold)
+            assert verdict.is_ad == exhaustive.detect(title, threshold).is_ad, title
+            assert verdict.exact == (verdict.reason is not None)
+
+def test_whole_title_patterns_skip_music_discount():
+    detector = EnhancedAdDetector(cache_size=0)
+    for title in ("Spotify - Advertisement", "Spotify – Anuncio", "Spotify - Advertisement break"):
+        verdict = detector.detect(title)
+        assert verdict.is_ad, verdict.describe()
+        assert verdict.music_discount == 0.0
+    # Other patterns are still discounted
+    verdict = EnhancedAdDetector(cache_size=0, early_exit=False).detect("Get Premium - Now")
+    assert not verdict.is_ad
+    assert verdict.music_discount == pytest.approx(0.4)
+
+def test_exhaustive_match_reports_every_regex_in_a_stage():
+    patterns = [AdPattern(r'^Ad\w*', 'en', 0.9, 'regex'), AdPattern(r'^\w+ break', 'en', 0.9, 'regex'),
+                AdPattern(r'break$', 'en', 0.9, 'regex'), AdPattern(r'^Werbung$', 'de', 0.9, 'regex')]
+    matcher = CompiledPatternMatcher(patterns, 'en')
+    confidence, discount, matched, _ = matcher.match(normalize_title("Adverts break"))
+    assert confidence == 0.9 and discount == 0.0
+    assert [p.pattern for p in matched] == [r'^Ad\w*', r'^\w+ break', r'break$']
+    # A verdict only needs the first one
+    _, _, matched, _ = matcher.match(normalize_title("Adverts break"), stop_below=0.6)
+    assert len(matched) == 1
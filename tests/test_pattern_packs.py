@@ -0,0 +1,69 @@
+"""
+Pattern pack parsing, loading and hot reload
+"""
+
+import os
+import json
+
+import pytest
+
+from enhanced_ad_detection import EnhancedAdDetector
+from pattern_packs import PatternPackError, PatternPackLoader, parse_pack
+
+def write_pack(directory, name, patterns, **fields):
+    path = os.path.join(str(directory), name)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'format': 1, 'patterns': patterns, **fields}, f)
+    return path
+
+def bump_mtime(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+def test_parse_pack_defaults():
+    pack = parse_pack('packs/sv.json', json.dumps({
+        'format': 1, 'language': 'sv', 'version': '3',
+        'patterns': [{'pattern': 'Reklam', 'confidence': 0.9, 'type': 'exact'}],
+    }).encode('utf-8'))
+    assert (pack.name, pack.version) == ('sv', '3')
+    assert pack.patterns == [{'pattern': 'Reklam', 'language': 'sv', 'confidence': 0.9, 'type': 'exact'}]
+
+@pytest.mark.parametrize('data', [
+    {'format': 2, 'patterns': []},
+    {'format': 1, 'patterns': [{'pattern': 'Ad', 'confidence': 0.9, 'type': 'glob'}]},
+    {'format': 1, 'patterns': [{'pattern': 'Ad', 'confidence': 1.5, 'type': 'exact'}]},
+    {'format': 1, 'patterns': [{'pattern': 'Ad', 'type': 'exact'}]},
+])
+def test_parse_pack_rejects_invalid(data):
+    with pytest.raises(PatternPackError):
+        parse_pack('bad.json', json.dumps(data).encode('utf-8'))
+
+def test_loader_skips_broken_packs(tmp_path):
+    write_pack(tmp_path, 'a.json', [{'pattern': 'Reklam', 'confidence': 0.9, 'type': 'exact'}])
+    (tmp_path / 'b.json').write_text('{not json')
+    packs, changed = PatternPackLoader([str(tmp_path)]).load()
+    assert changed
+    assert [pack.name for pack in packs] == ['a']
+
+def test_loader_content_hash_ignores_touch(tmp_path):
+    path = write_pack(tmp_path, 'a.json', [{'pattern': 'Reklam', 'confidence': 0.9, 'type': 'exact'}])
+    loader = PatternPackLoader([str(tmp_path)])
+    loader.load()
+    assert not loader.has_changed()
+    bump_mtime(path)
+    assert loader.has_changed()
+    _, changed = loader.load()
+    assert not changed
+
+def test_detector_hot_reloads_packs(tmp_path):
+    path = write_pack(tmp_path, 'a.json', [{'pattern': 'Reklam', 'language': 'sv', 'confidence': 0.9, 'type': 'exact'}])
+    detector = EnhancedAdDetector(pattern_dirs=[str(tmp_path)], reload_interval=0.0)
+    assert detector.is_ad_playing("Reklam")
+    assert not detector.is_ad_playing("Mainos")
+    version = detector.pattern_version
+
+    write_pack(tmp_path, 'a.json', [{'pattern': 'Mainos', 'language': 'fi', 'confidence': 0.9, 'type': 'exact'}])
+    bump_mtime(path)
+    assert detector.is_ad_playing("Mainos")  # Reloaded on the next detection, cache dropped
+    assert not detector.is_ad_playing("Reklam")
+    assert detector.pattern_version == version + 1
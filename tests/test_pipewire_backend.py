@@ -0,0 +1,112 @@
+"""
+pw-dump --monitor parsing and pw-cli control of Spotify's PipeWire streams
+"""
+
+import io
+import os
+import json
+import time
+
+import pytest
+
+import pipewire_backend
+from conftest import ROOT
+from pipewire_backend import PipeWireNode, PipeWireStreams, update_node
+
+FIXTURE = os.path.join(ROOT, 'tests', 'fixtures', 'pw_dump_monitor.txt')
+
+@pytest.fixture
+def streams(monkeypatch):
+    """PipeWireStreams without its monitor thread or tools: fed from the fixture by hand"""
+    monkeypatch.setattr(pipewire_backend, 'PIPEWIRE_AVAILABLE', True)
+    streams = PipeWireStreams(['spotify', 'Spotify'])
+    yield streams
+    streams.close()
+
+def monitor_output():
+    """The fixture split into pw-dump's successive JSON arrays"""
+    arrays = []
+    with open(FIXTURE, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.rstrip() == '[':
+                arrays.append('')
+            arrays[-1] += line
+    return arrays
+
+def test_initial_dump_finds_spotify_stream(streams):
+    events = []
+    streams.add_listener(events.append)
+    streams._read(io.StringIO(monitor_output()[0]))
+    assert streams.ready
+    assert sorted(streams.nodes) == [62, 70]  # Output streams only, not the sink or the core
+    (node,) = streams.streams()
+    assert (node.id, node.pid, node.state, node.mute) == (62, '4242', 'running', False)
+    assert node.volume == pytest.approx(0.9)
+    assert [(event.kind, event.node.id) for event in events] == [('added', 62)]
+
+def test_partial_update_and_removal(streams):
+    events = []
+    streams.add_listener(events.append)
+    # The monitor's output arrives a line at a time
+    streams._read(io.StringIO(''.join(monitor_output())))
+    assert [(event.kind, event.node.id) for event in events] == [('added', 62), ('changed', 62), ('removed', 62)]
+    changed = events[1].node
+    assert changed.mute
+    assert changed.props['application.name'] == 'spotify'  # Kept from the full object
+    assert changed.title() == "Spotify - Advertisement"
+    assert streams.nodes == {}
+    assert streams.events == 3
+
+def test_update_node_reads_the_stream_props_object():
+    node = update_node(PipeWireNode(1), {'params': {'Props': [{'params': []},
+                                                              {'mute': True, 'channelVolumes': [0.125, 0.5]}]}})
+    assert node.mute and node.volumes == [0.125, 0.5]
+    assert node.volume == pytest.approx(0.5 ** (1 / 3))
+    assert PipeWireNode(2).volume == 1.0
+
+def test_sends_fail_fast_after_close(streams, monkeypatch):
+    def spawn(*args, **kwargs):
+        raise AssertionError("pw-cli started after close()")
+    monkeypatch.setattr(pipewire_backend.subprocess, 'Popen', spawn)
+    streams.close()
+    with pytest.raises(RuntimeError):
+        streams.set_mute([PipeWireNode(62)], True)
+
+def large_dump(streams: int, sinks: int) -> str:
+    """A pretty-printed initial listing the size of a busy desktop's graph, then a removal"""
+    objects = []
+    for i in range(sinks):
+        objects.append({'id': 1000 + i, 'type': 'PipeWire:Interface:Node', 'version': 3,
+                        'info': {'state': 'running', 'props': {'media.class': 'Audio/Sink', 'node.name': f"sink {i}",
+                                                               'node.description': f"Sink \"{i}\" \\ [{{"},
+                                 'params': {'Props': [{'mute': False, 'channelVolumes': [0.5, 0.5]}]}}})
+    for i in range(streams):
+        spotify = i % 10 == 0
+        objects.append({'id': 5000 + i, 'type': 'PipeWire:Interface:Node', 'version': 3,
+                        'info': {'state': 'running',
+                                 'props': {'media.class': 'Stream/Output/Audio',
+                                           'application.name': 'spotify' if spotify else f"app-{i}",
+                                           'application.process.binary': 'spotify' if spotify else 'player',
+                                           'application.process.id': 10000 + i,
+                                           'media.title': "Song ] with } brackets",
+                                           'media.name': "\"quoted\" \\"},
+                                 'params': {'Props': [{'mute': False, 'channelVolumes': [1.0, 1.0]},
+                                                      {'params': []}]}}})
+    return (json.dumps(objects, indent=2) + '\n'
+            + json.dumps([{'id': 5000, 'info': None}], indent=2) + '\n'
+            + json.dumps([{'id': 5010, 'info': None}]) + json.dumps([{'id': 5020, 'info': None}]) + '\n')
+
+def test_large_dump_is_decoded_once_per_array(streams):
+    text = large_dump(streams=3000, sinks=500)
+    assert len(text) > 1_000_000
+    decoded = []
+    apply = streams._apply
+    streams._apply = lambda objects: (decoded.append(len(objects)), apply(objects))
+    started = time.perf_counter()
+    streams._read(io.StringIO(text))
+    assert time.perf_counter() - started < 10.0
+    assert decoded == [3500, 1, 1, 1]
+    assert streams.ready
+    assert len(streams.nodes) == 2997  # Sinks ignored, three streams removed
+    assert len(streams.streams()) == 297
+    assert streams.nodes[5001].props['media.title'] == "Song ] with } brackets"
@@ -0,0 +1,75 @@
+"""
+Session recording format and virtual-clock replay of the main loop
+"""
+
+import pytest
+
+from session_recorder import (AUDIO, END, MUTE, NO_WINDOW, TITLE, UNMUTE, SessionEvent,
+                              SessionRecorder, load_sessions)
+from session_replay import count_flaps, decisions, recorded_mutes, replay, session_timeline
+from window_backends import NOT_RUNNING, SpotifyWindow
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def test_record_and_load_round_trip(tmp_path):
+    path = str(tmp_path / 'session.log')
+    clock = FakeClock()
+    recorder = SessionRecorder(path, clock=clock)
+    recorder.observe_window(SpotifyWindow("Artist - Song"))
+    clock.now += 1.5
+    recorder.observe_window(SpotifyWindow("Artist - Song"))  # Unchanged: not written
+    recorder.observe_window(SpotifyWindow("Advertisement\tbreak", True))
+    recorder.mute(True)
+    recorder.audio('start')
+    clock.now += 30.0
+    recorder.observe_window(None)
+    recorder.mute(False)
+    recorder.close()
+    SessionRecorder(path, clock=clock).close()  # A second session in the same file
+
+    sessions = load_sessions(path)
+    assert len(sessions) == 2
+    assert sessions[0] == [
+        SessionEvent(0.0, TITLE, "Artist - Song", None),
+        SessionEvent(1.5, TITLE, "Advertisement\tbreak", True),
+        SessionEvent(1.5, MUTE),
+        SessionEvent(1.5, AUDIO, 'start'),
+        SessionEvent(31.5, NO_WINDOW),
+        SessionEvent(31.5, UNMUTE),
+        SessionEvent(31.5, END),
+    ]
+    assert sessions[1] == [SessionEvent(0.0, END)]
+
+def test_malformed_lines_are_skipped(tmp_path):
+    path = tmp_path / 'session.log'
+    path.write_text('#sas-session v1\n0.0\tT\t"Song"\nbroken\nx\tM\n2.0\tM\n', encoding='utf-8')
+    assert load_sessions(str(path)) == [[SessionEvent(0.0, TITLE, "Song", None), SessionEvent(2.0, MUTE)]]
+
+def test_timeline_and_decisions():
+    events = [SessionEvent(0.0, TITLE, "Artist - Song"), SessionEvent(10.0, TITLE, "Advertisement", True),
+              SessionEvent(10.2, MUTE), SessionEvent(40.0, 'S'), SessionEvent(40.1, UNMUTE),
+              SessionEvent(50.0, END)]
+    timeline = session_timeline(events)
+    assert timeline == [(0.0, "Artist - Song", None), (10.0, "Advertisement", True),
+                        (40.0, NOT_RUNNING, None), (50.0, None, None)]
+    result = decisions(timeline, recorded_mutes(events))
+    assert [(d.observation, d.muted) for d in result] == [
+        ("Artist - Song", False), ("Advertisement", True), ('<not running>', False)]
+    assert result[1].latency == pytest.approx(0.2)
+
+def test_count_flaps():
+    assert count_flaps([(0.0, True), (1.0, False), (30.0, True), (60.0, False)]) == 1
+
+def test_replay_reproduces_recorded_decisions():
+    events = [SessionEvent(0.0, TITLE, "Artist - Song"), SessionEvent(60.0, TITLE, "Advertisement"),
+              SessionEvent(60.1, MUTE), SessionEvent(90.0, TITLE, "Other Artist - Other Song"),
+              SessionEvent(90.1, UNMUTE), SessionEvent(120.0, END)]
+    result = replay(events, speed=0)
+    replayed = decisions(result.timeline, result.controller.events)
+    assert [d.muted for d in replayed] == [d.muted for d in decisions(result.timeline, recorded_mutes(events))]
+    assert [mute for _, mute in result.controller.events] == [True, False]
@@ -0,0 +1,49 @@
+"""
+Per-stream volume snapshots taken before muting
+"""
+
+import os
+
+from volume_snapshots import VolumeSnapshotStore, stream_key
+
+def test_stream_key():
+    assert stream_key(12, 3456) == '12:3456'
+    assert stream_key(pid=3456) == ':3456'
+    assert stream_key() == ':'
+
+def test_capture_persists_and_clear_removes(tmp_path):
+    store = VolumeSnapshotStore(str(tmp_path))
+    store.capture([(stream_key(1, 100), 0.8), (stream_key(2, 200), 0.5)])
+    assert os.path.exists(store.snapshot_file)
+
+    crashed = VolumeSnapshotStore(str(tmp_path))
+    assert crashed.load()
+    assert crashed.volumes == {'1:100': 0.8, '2:200': 0.5}
+
+    store.clear()
+    assert not os.path.exists(store.snapshot_file)
+    assert not VolumeSnapshotStore(str(tmp_path)).load()
+
+def test_volume_for_falls_back_to_same_process():
+    store = VolumeSnapshotStore()
+    store.volumes = {'1:100': 0.8, '2:200': 0.5}
+    assert store.volume_for('1:100') == 0.8
+    assert store.volume_for('7:200') == 0.5  # Stream renumbered, same process
+    assert store.volume_for('9:999') is None
+
+def test_single_level_applies_to_any_stream():
+    store = VolumeSnapshotStore()
+    store.volumes = {':': 0.6}
+    assert store.volume_for('3:300') == 0.6
+
+def test_restore_plan_skips_unknown_streams():
+    store = VolumeSnapshotStore()
+    store.volumes = {'1:100': 0.8, '2:200': 0.5}
+    assert store.restore_plan(['1:100', '5:200', '9:999']) == [('1:100', 0.8), ('5:200', 0.5)]
+
+def test_unreadable_snapshot_is_ignored(tmp_path):
+    store = VolumeSnapshotStore(str(tmp_path))
+    with open(store.snapshot_file, 'w') as f:
+        f.write('{"format": 99, "volumes": {}}')
+    assert not store.load()
+    assert store.volumes == {}
@@ -0,0 +1,58 @@
+"""
+Window title normalization for Spotify Ad Silencer
+Computes a normalized record once per distinct title so detection, logging and
+the main loop's paused/short-title checks don't re-derive it on every poll
+"""
+
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+
+# Titles Spotify shows when playback is paused or idle
+PAUSED_TITLES = frozenset(["Spotify Free", "Spotify Premium", "Spotify"])
+
+# Substrings that mean we grabbed the wrong window (a file path or executable)
+PATH_INDICATORS = (
+    ':\\',   # Windows drive letter
+    '.exe',  # Executable file
+    '/',     # Unix path separator
+    '\\',    # Windows path separator
+)
+
+# Hyphen, non-breaking hyphen, figure dash, en dash, em dash, horizontal bar, minus sign
+_DASHES = str.maketrans({dash: '-' for dash in '‐‑‒–—―−'})
+
+def fold_text(text: str) -> str:
+    """Caseless matching form: NFKC, casefolded, every dash variant mapped to '-'"""
+    return unicodedata.normalize('NFKC', text).casefold().translate(_DASHES)
+
+@dataclass(frozen=True)
+class NormalizedTitle:
+    """Derived forms and features of one window title"""
+    raw: str
+    stripped: str
+    folded: str          # fold_text(stripped): compare against folded pattern keys
+    length: int          # len(stripped)
+    token_count: int
+    is_path: bool        # Wrong window: file path or executable
+    is_paused: bool      # Spotify's paused/idle title
+    has_separator: bool  # "Artist - Song" style separator (any dash variant)
+
+@lru_cache(maxsize=1024)
+def normalize_title(title: str) -> NormalizedTitle:
+    """
+    Normalize a window title. Memoized: the title only changes every few minutes
+    while it is polled several times a second, so repeat calls are a dict lookup.
+    """
+    stripped = title.strip() if title else ''
+    folded = fold_text(stripped)
+    return NormalizedTitle(
+        raw=title,
+        stripped=stripped,
+        folded=folded,
+        length=len(stripped),
+        token_count=len(folded.split()),
+        is_path=any(indicator in stripped for indicator in PATH_INDICATORS),
+        is_paused=stripped in PAUSED_TITLES,
+        has_separator=' - ' in folded,
+    )
@@ -0,0 +1,110 @@
+"""
+Volume snapshots for Spotify Ad Silencer
+Remembers each Spotify stream's volume before muting, keyed by stream identity,
+and keeps a copy on disk so a run that crashed while muted can be undone later
+"""
+
+import os
+import json
+import time
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+
+def stream_key(index: Optional[int] = None, pid: Optional[int] = None) -> str:
+    """
+    Stream identity: '<sink input index>:<pid>' for PulseAudio streams,
+    ':<pid>' for Windows audio sessions, ':' when neither is known (macOS)
+    """
+    return f"{'' if index is None else index}:{'' if pid is None else pid}"
+
+def _key_pid(key: str) -> str:
+    return key.partition(':')[2]
+
+class VolumeSnapshotStore:
+    """
+    Volumes captured in one pass when muting and handed back in one batch when
+    unmuting. Every capture is written to disk before the streams are muted
+    (write-then-rename, so the file is never half-written) and the file is
+    removed once the volumes are restored: a file found at startup means the
+    previous run stopped while Spotify was muted.
+    """
+
+    def __init__(self, config_dir: str = "."):
+        self.config_dir = config_dir
+        self.snapshot_file = os.path.join(config_dir, "volume_snapshot.json")
+        self.volumes: Dict[str, float] = {}
+        self.captured_at: Optional[float] = None
+
+    def capture(self, volumes: Iterable[Tuple[str, float]]) -> Dict[str, float]:
+        """Replace the snapshot with (key, volume) pairs and persist it"""
+        self.volumes = dict(volumes)
+        self.captured_at = time.time()
+        self._save()
+        return self.volumes
+
+    def volume_for(self, key: str) -> Optional[float]:
+        """
+        Saved volume for a stream: exact identity first, then the same process
+        (PulseAudio may renumber a stream), then the only level saved if all
+        streams shared it. None when the stream was not part of the snapshot.
+        """
+        if key in self.volumes:
+            return self.volumes[key]
+        pid = _key_pid(key)
+        if pid:
+            for saved_key, volume in self.volumes.items():
+                if _key_pid(saved_key) == pid:
+                    return volume
+        levels = set(self.volumes.values())
+        return levels.pop() if len(levels) == 1 else None
+
+    def restore_plan(self, keys: Iterable[str]) -> List[Tuple[str, float]]:
+        """(key, volume) for every current stream the snapshot has a volume for"""
+        plan = []
+        for key in keys:
+            volume = self.volume_for(key)
+            if volume is not None:
+                plan.append((key, volume))
+        return plan
+
+    def clear(self):
+        """Forget the snapshot once its volumes are back in place"""
+        self.volumes = {}
+        self.captured_at = None
+        try:
+            os.remove(self.snapshot_file)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Failed to remove volume snapshot: {e}")
+
+    def load(self) -> bool:
+        """Load a snapshot left behind by a previous run; True if there was one"""
+        try:
+            with open(self.snapshot_file, 'r') as f:
+                data = json.load(f)
+            if data.get('format') != SNAPSHOT_FORMAT:
+                raise ValueError(f"unknown format {data.get('format')!r}")
+            self.volumes = {str(key): float(volume) for key, volume in data['volumes'].items()}
+            self.captured_at = data.get('captured_at')
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable volume snapshot {self.snapshot_file}: {e}")
+            return False
+        return bool(self.volumes)
+
+    def _save(self):
+        data = {'format': SNAPSHOT_FORMAT, 'captured_at': self.captured_at, 'volumes': self.volumes}
+        temporary = self.snapshot_file + '.tmp'
+        try:
+            os.makedirs(self.config_dir, exist_ok=True)
+            with open(temporary, 'w') as f:
+                json.dump(data, f, indent=2)
+            os.replace(temporary, self.snapshot_file)
+        except Exception as e:
+            logger.warning(f"Failed to save volume snapshot: {e}")
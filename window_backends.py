@@ -0,0 +1,509 @@
+"""
+Window/metadata backends for Spotify Ad Silencer
+Common interface for everything that reports what Spotify is playing (window
+scrapers, event watchers, a scripted simulator) plus a registry that picks the
+fastest one available
+"""
+
+import sys
+import json
+import time
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+from capabilities import capabilities
+
+logger = logging.getLogger(__name__)
+
+class SpotifyWindow:
+    """What a backend reports: the title, plus an ad flag when the backend knows for sure"""
+
+    __slots__ = ('title', 'is_ad', 'handle')
+
+    def __init__(self, title: str, is_ad: Optional[bool] = None, handle=None):
+        self.title = title
+        self.is_ad = is_ad      # None: decide from the title
+        self.handle = handle    # Native window handle (e.g. HWND) for cache validation
+
+    def __repr__(self) -> str:
+        return f"SpotifyWindow({self.title!r}, is_ad={self.is_ad})"
+
+class WindowBackend:
+    """
+    Backend interface. poll() returns the current window (or None when Spotify has
+    none); backends that receive updates as events set `pushes_updates` and make
+    wait_for_change() return as soon as something changes.
+    """
+
+    name = 'base'
+    requires: Tuple[str, ...] = ()  # Capabilities (any of) this backend needs, see capabilities.py
+    pushes_updates = False
+    finished = False  # True once a scripted backend has nothing more to play
+
+    def is_available(self) -> bool:
+        """Can poll() answer right now? (e.g. the player is on D-Bus)"""
+        return True
+
+    def poll(self) -> Optional[SpotifyWindow]:
+        raise NotImplementedError
+
+    def wait_for_change(self, timeout: float) -> bool:
+        """Sleep up to `timeout`; push backends return True early on a change"""
+        time.sleep(timeout)
+        return False
+
+    def spotify_running(self) -> Optional[bool]:
+        """Whether Spotify runs, if this backend knows (None: ask the process check)"""
+        return None
+
+    def reset(self):
+        """Forget cached state (Spotify went away)"""
+
+    def close(self):
+        pass
+
+class PollingBackend(WindowBackend):
+    """Wraps a scraping function, reusing its result for `min_interval` seconds while `validate` accepts it"""
+
+    def __init__(self, name: str, scrape: Callable[[], Optional[SpotifyWindow]], min_interval: float = 0.5,
+                 validate: Optional[Callable[[SpotifyWindow], bool]] = None):
+        self.name = name
+        self._scrape = scrape
+        self.min_interval = min_interval
+        self._validate = validate
+        self._cached: Optional[SpotifyWindow] = None
+        self._checked_at = 0.0
+        self.scrapes = 0
+
+    def poll(self) -> Optional[SpotifyWindow]:
+        now = time.perf_counter()
+        if self._cached is not None and now - self._checked_at < self.min_interval:
+            try:
+                if self._validate is None or self._validate(self._cached):
+                    return self._cached
+            except Exception:
+                pass
+        self.scrapes += 1
+        self._cached = self._scrape()
+        self._checked_at = now
+        return self._cached
+
+    def reset(self):
+        self._cached = None
+
+class BackendStats:
+    """Per-backend poll latency (EWMA and worst case) and how often it answered first"""
+
+    __slots__ = ('calls', 'answers', 'wins', 'errors', 'ewma', 'worst')
+
+    ALPHA = 0.2  # EWMA weight of the newest sample
+
+    def __init__(self):
+        self.calls = 0
+        self.answers = 0  # Polls that returned a window
+        self.wins = 0     # Races this backend's answer was used for
+        self.errors = 0
+        self.ewma: Optional[float] = None
+        self.worst = 0.0
+
+    def record(self, seconds: float, answered: bool):
+        self.calls += 1
+        self.answers += answered
+        self.ewma = seconds if self.ewma is None else self.ewma + self.ALPHA * (seconds - self.ewma)
+        self.worst = max(self.worst, seconds)
+
+    def describe(self) -> str:
+        if self.ewma is None:
+            return "unused"
+        return (f"{self.ewma * 1000:.1f}ms avg, {self.worst * 1000:.1f}ms worst, "
+                f"{self.answers}/{self.calls} answered, {self.wins} wins, {self.errors} errors")
+
+class BackendChain(WindowBackend):
+    """
+    Backends in preference order. Each poll asks the first available backend that
+    reports a window, so e.g. MPRIS is used while Spotify is on D-Bus and window
+    scraping covers the rest. A backend that keeps raising is skipped by its
+    circuit breaker until the breaker lets a retry through.
+
+    Event-driven backends answer from memory and are asked inline. With `race`,
+    the polling ones (each a subprocess or API round trip) run concurrently on a
+    small thread pool and the first window reported wins, so the worst case is
+    the slowest single backend rather than their sum. A backend still busy with
+    an earlier poll is not asked again; its pending answer joins the race.
+    Polling backends are ordered by their measured latency, so the fastest one
+    is preferred when racing is off (every EXPLORE_EVERY polls the least used
+    one goes first, so a backend that was slow once gets measured again).
+    """
+
+    name = 'chain'
+    EXPLORE_EVERY = 50
+
+    def __init__(self, backends: List[WindowBackend], race: bool = True, race_timeout: float = 2.0):
+        self.backends = backends
+        self.race = race
+        self.race_timeout = race_timeout  # Give up on a poll after this long
+        self.active: Optional[WindowBackend] = None  # Backend that answered the last poll
+        self._announced: Optional[str] = None
+        self.breakers = {backend.name: capabilities.breaker(f"{backend.name} backend") for backend in backends}
+        self.stats = {backend.name: BackendStats() for backend in backends}
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._running: Dict[str, Future] = {}  # Polls still in flight, by backend name
+        self._polls = 0
+        self._lock = threading.Lock()  # Stats are updated from racing pool threads
+
+    @property
+    def pushes_updates(self) -> bool:
+        return self.active is not None and self.active.pushes_updates
+
+    def _eligible(self) -> List[WindowBackend]:
+        """Backends worth asking now: breaker closed, capabilities present, source available"""
+        eligible = []
+        for backend in self.backends:
+            # Cached probes: a missing tool costs nothing here and is noticed once installed
+            if backend.requires and not any(capabilities.available(c) for c in backend.requires):
+                continue
+            if not self.breakers[backend.name].allow():
+                continue
+            try:
+                if backend.is_available():
+                    eligible.append(backend)
+            except Exception as e:
+                self._record_error(backend, e)
+        return eligible
+
+    def _record_error(self, backend: WindowBackend, error: Exception):
+        logger.debug(f"Window backend '{backend.name}' failed: {error}")
+        with self._lock:
+            self.stats[backend.name].errors += 1
+        self.breakers[backend.name].record_failure(error)
+
+    def _timed_poll(self, backend: WindowBackend) -> Optional[SpotifyWindow]:
+        """poll() with latency and breaker bookkeeping; errors count as no answer"""
+        started = time.perf_counter()
+        try:
+            window = backend.poll()
+        except Exception as e:
+            self._record_error(backend, e)
+            return None
+        with self._lock:
+            self.stats[backend.name].record(time.perf_counter() - started, window is not None)
+        self.breakers[backend.name].record_success()
+        return window
+
+    def _answer(self, backend: WindowBackend, window: SpotifyWindow) -> SpotifyWindow:
+        if backend.name != self._announced:
+            logger.info(f"🪟 Reading Spotify titles via {backend.name}")
+            self._announced = backend.name
+        with self._lock:
+            self.stats[backend.name].wins += 1
+        self.active = backend
+        return window
+
+    def poll(self) -> Optional[SpotifyWindow]:
+        eligible = self._eligible()
+        inline = [backend for backend in eligible if backend.pushes_updates]
+        polling = [backend for backend in eligible if not backend.pushes_updates]
+        # Fastest measured first (unmeasured ones lead so they get measured)
+        self._polls += 1
+        with self._lock:
+            if self._polls % self.EXPLORE_EVERY == 0:
+                polling.sort(key=lambda backend: self.stats[backend.name].calls)
+            else:
+                polling.sort(key=lambda backend: self.stats[backend.name].ewma or 0.0)
+
+        if not (self.race and len(polling) > 1):
+            inline += polling
+            polling = []
+        for backend in inline:
+            window = self._timed_poll(backend)
+            if window is not None:
+                return self._answer(backend, window)
+        if polling:
+            return self._race(polling)
+        self.active = None
+        return None
+
+    def _race(self, backends: List[WindowBackend]) -> Optional[SpotifyWindow]:
+        """Poll `backends` concurrently; the first window reported wins"""
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=len(self.backends), thread_name_prefix="window-backend")
+        futures = {}
+        for backend in backends:
+            previous = self._running.get(backend.name)
+            if previous is not None and not previous.done():
+                futures[previous] = backend  # Still busy with an earlier poll: its answer is recent enough
+                continue
+            future = self._pool.submit(self._timed_poll, backend)
+            futures[future] = backend
+            self._running[backend.name] = future
+        deadline = time.perf_counter() + self.race_timeout
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.perf_counter()),
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                logger.debug(f"Window backends timed out: {[futures[f].name for f in pending]}")
+                break
+            # Several may finish together: prefer the earlier (faster) backend
+            for future in sorted(done, key=lambda f: backends.index(futures[f])):
+                window = future.result()
+                if window is not None:
+                    return self._answer(futures[future], window)
+        self.active = None
+        return None
+
+    def wait_for_change(self, timeout: float) -> bool:
+        if self.active is not None:
+            return self.active.wait_for_change(timeout)
+        return super().wait_for_change(timeout)
+
+    def spotify_running(self) -> Optional[bool]:
+        for backend in self.backends:
+            running = backend.spotify_running()
+            if running is not None:
+                return running
+        return None
+
+    def reset(self):
+        for backend in self.backends:
+            backend.reset()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+        for backend in self.backends:
+            backend.close()
+
+    def status(self) -> Dict[str, str]:
+        """Breaker state and latency per backend, for logs"""
+        with self._lock:
+            return {name: f"{self.breakers[name].describe()}; {self.stats[name].describe()}" for name in self.breakers}
+
+# name -> (priority, factory, requires); lower priority is preferred. Factories
+# receive the detector (for platform scrapers and PID lookups) and raise if
+# unusable here; `requires` lists capabilities of which at least one must be present.
+_REGISTRY: Dict[str, Tuple[int, Callable[..., WindowBackend], Tuple[str, ...]]] = {}
+
+def register_backend(name: str, factory: Callable[..., WindowBackend], priority: int,
+                     requires: Tuple[str, ...] = ()):
+    """Register a backend factory; re-registering a name replaces it"""
+    _REGISTRY[name] = (priority, factory, requires)
+
+def registered_backends() -> List[str]:
+    """Registered backend names, most preferred first"""
+    return sorted(_REGISTRY, key=lambda name: _REGISTRY[name][0])
+
+def create_backends(context, only: Optional[List[str]] = None) -> BackendChain:
+    """Instantiate every usable backend (or just `only`) into a chain, fastest first"""
+    backends = []
+    for name in (only or registered_backends()):
+        if name not in _REGISTRY:
+            logger.warning(f"Unknown window backend '{name}'")
+            continue
+        _, factory, requires = _REGISTRY[name]
+        try:
+            backend = factory(context)
+            backend.requires = requires
+            backends.append(backend)
+        except Exception as e:
+            logger.debug(f"Window backend '{name}' not available: {e}")
+    logger.debug(f"Window backends: {[backend.name for backend in backends]}")
+    return BackendChain(backends)
+
+class MprisBackend(WindowBackend):
+    """Spotify's MPRIS player over D-Bus (Linux): pushed updates, ads by track id"""
+
+    name = 'mpris'
+    pushes_updates = True
+
+    def __init__(self, context=None):
+        from mpris_backend import MprisSpotifyWatcher
+        self.watcher = MprisSpotifyWatcher().start()
+
+    def is_available(self) -> bool:
+        return self.watcher.available
+
+    def poll(self) -> Optional[SpotifyWindow]:
+        return self.watcher.get_window()
+
+    def wait_for_change(self, timeout: float) -> bool:
+        return self.watcher.wait_for_change(timeout)
+
+    def close(self):
+        self.watcher.close()
+
+class X11Backend(WindowBackend):
+    """Spotify's X11 window followed through PropertyNotify events (Linux)"""
+
+    name = 'x11'
+    pushes_updates = True
+
+    def __init__(self, context):
+        from x11_window_watcher import X11TitleWatcher
+        self.watcher = X11TitleWatcher(context.get_spotify_pids)
+
+    def poll(self) -> Optional[SpotifyWindow]:
+        window = self.watcher.get_window()
+        return SpotifyWindow(window.title) if window is not None else None
+
+    def wait_for_change(self, timeout: float) -> bool:
+        return self.watcher.wait(timeout)
+
+    def reset(self):
+        self.watcher.window = None
+
+    def close(self):
+        self.watcher.close()
+
+class PipeWireBackend(WindowBackend):
+    """Spotify's PipeWire stream metadata (media.title/media.artist), pushed by the graph monitor (Linux)"""
+
+    name = 'pipewire'
+    pushes_updates = True
+
+    def __init__(self, context=None):
+        from pipewire_backend import PipeWireTitleWatcher, shared_streams
+        if not capabilities.available('pipewire'):
+            raise RuntimeError("PipeWire is not running")
+        self.streams = shared_streams()
+        self.watcher = PipeWireTitleWatcher(self.streams)
+
+    def is_available(self) -> bool:
+        return self.streams.ready and self.watcher.get_window() is not None
+
+    def poll(self) -> Optional[SpotifyWindow]:
+        return self.watcher.get_window()
+
+    def wait_for_change(self, timeout: float) -> bool:
+        return self.streams.wait_for_change(timeout)
+
+def _linux_only(factory):
+    def create(context):
+        if not sys.platform.startswith('linux'):
+            raise RuntimeError("Linux only")
+        return factory(context)
+    return create
+
+register_backend('mpris', _linux_only(MprisBackend), priority=10, requires=('mpris',))
+register_backend('pipewire', _linux_only(PipeWireBackend), priority=15, requires=('pipewire',))
+register_backend('x11', _linux_only(X11Backend), priority=20, requires=('xlib',))
+
+# Timeline title for "Spotify is not running"
+NOT_RUNNING = '\x00not running'
+
+class SimulatedBackend(WindowBackend):
+    """
+    Plays back a scripted title timeline instead of talking to Spotify.
+
+    `timeline` is [(seconds from start, title or None, is_ad or None)] sorted by
+    time; None titles mean "no window", NOT_RUNNING means Spotify is closed.
+    is_ad is the expected verdict, kept for reports - polls leave detection to the
+    caller. With backend_flags=True it is instead reported as the backend's own
+    ad flag (SpotifyWindow.is_ad), e.g. to replay a recorded MPRIS session.
+    `speed` compresses the script (speed=60 plays a minute per second). Records
+    when each entry was first polled so callers can measure detection latency.
+    The script ends at the last entry, after which `finished` is True. With
+    push=False it behaves like a polling scraper (waits always run to the timeout).
+    """
+
+    name = 'simulated'
+
+    def __init__(self, timeline: List[Tuple[float, Optional[str], Optional[bool]]], speed: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep,
+                 push: bool = True, backend_flags: bool = False):
+        self.timeline = timeline
+        self.speed = speed
+        self.backend_flags = backend_flags
+        self.pushes_updates = push
+        self.clock = clock
+        self.sleep = sleep
+        self.started_at: Optional[float] = None
+        self.first_seen: Dict[int, float] = {}  # Timeline index -> script time it was first polled
+        self.polls = 0
+        self._polled_index = -1
+
+    def script_time(self) -> float:
+        """Seconds into the script (starts counting on first use)"""
+        if self.started_at is None:
+            self.started_at = self.clock()
+        return (self.clock() - self.started_at) * self.speed
+
+    def _current_index(self) -> int:
+        now = self.script_time()
+        index = -1
+        for i, (at, _, _) in enumerate(self.timeline):
+            if at > now:
+                break
+            index = i
+        return index
+
+    @property
+    def finished(self) -> bool:
+        if self.started_at is None:
+            return False
+        return not self.timeline or self.script_time() >= self.timeline[-1][0]
+
+    def _observe(self) -> int:
+        """Current timeline index, marked as seen by the caller"""
+        index = self._current_index()
+        self._polled_index = index
+        if index >= 0:
+            self.first_seen.setdefault(index, self.script_time())
+        return index
+
+    def poll(self) -> Optional[SpotifyWindow]:
+        self.polls += 1
+        index = self._observe()
+        if index < 0:
+            return None
+        _, title, is_ad = self.timeline[index]
+        if title in (None, NOT_RUNNING):
+            return None
+        return SpotifyWindow(title, is_ad if self.backend_flags else None)
+
+    def wait_for_change(self, timeout: float) -> bool:
+        """Sleep until the next scripted change or `timeout` (in wall-clock seconds)"""
+        if not self.pushes_updates:
+            self.sleep(timeout)
+            return False
+        index = self._current_index()
+        if index != self._polled_index:
+            return True  # Changed while the caller was busy, like a queued push event
+        if index + 1 < len(self.timeline):
+            until_next = (self.timeline[index + 1][0] - self.script_time()) / self.speed
+            if until_next <= timeout:
+                self.sleep(max(0.0, until_next))
+                return True
+        self.sleep(timeout)
+        return False
+
+    def spotify_running(self) -> Optional[bool]:
+        if self.finished:
+            return False
+        index = self._observe()
+        return index < 0 or self.timeline[index][1] != NOT_RUNNING
+
+    def latencies(self) -> List[Tuple[str, float]]:
+        """(title, script seconds between the scripted change and its first poll) per entry seen"""
+        return [(self.timeline[i][1], seen - self.timeline[i][0]) for i, seen in sorted(self.first_seen.items())]
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "SimulatedBackend":
+        """
+        Load a timeline: JSON {"timeline": [{"at": seconds, "title": str|null, "ad": bool}]}
+        (the last entry marks the end; "running": false means Spotify is closed)
+        or text lines 'seconds<TAB>title'
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            if path.endswith('.json'):
+                entries = [(float(e['at']), e.get('title') if e.get('running', True) else NOT_RUNNING, e.get('ad'))
+                           for e in json.load(f)['timeline']]
+            else:
+                entries = []
+                for line in f:
+                    at, _, title = line.rstrip('\r\n').partition('\t')
+                    if at.strip():
+                        entries.append((float(at), title, None))
+        return cls(sorted(entries, key=lambda e: e[0]), **kwargs)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Persistent X11 window-title watcher for Spotify Ad Silencer (Linux)
+Keeps one X connection open, finds Spotify's window by _NET_WM_PID and receives
+title changes as _NET_WM_NAME PropertyNotify events - no wmctrl/xdotool forks
+
+Self-test (needs an X server, e.g. Xvfb):
+    xvfb-run python x11_window_watcher.py --selftest
+"""
+
+import os
+import sys
+import select
+import logging
+from typing import Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# python-xlib is optional: without it Linux falls back to wmctrl/xdotool
+try:
+    from Xlib import X, Xatom, display
+    from Xlib.error import DisplayError, XError
+    XLIB_AVAILABLE = True
+except ImportError:
+    XLIB_AVAILABLE = False
+
+class X11SpotifyWindow:
+    """Live view of the watched window: reading `title` first applies pending X events"""
+
+    def __init__(self, watcher: "X11TitleWatcher", window_id: int):
+        self._watcher = watcher
+        self.window_id = window_id
+
+    @property
+    def title(self) -> str:
+        self._watcher.pump()
+        return self._watcher.title or ''
+
+class X11TitleWatcher:
+    """
+    Tracks the title of the first top-level window owned by one of `get_pids()`.
+
+    The root window is watched for property changes only (_NET_CLIENT_LIST: new
+    windows) and the matched window for _NET_WM_NAME/WM_NAME changes and its own
+    destruction, so other windows' map/configure traffic never reaches us. Without a
+    window manager new windows are found by get_window(). pump() drains queued
+    events without blocking; wait() blocks on the connection's socket.
+    """
+
+    def __init__(self, get_pids: Callable[[], Iterable[int]], display_name: Optional[str] = None):
+        if not XLIB_AVAILABLE:
+            raise ImportError("The X11 watcher needs python-xlib: pip install python-xlib")
+        self.get_pids = get_pids
+        self.display = display.Display(display_name)
+        self.root = self.display.screen().root
+        self._atom_pid = self.display.intern_atom('_NET_WM_PID')
+        self._atom_name = self.display.intern_atom('_NET_WM_NAME')
+        self._atom_utf8 = self.display.intern_atom('UTF8_STRING')
+        self._atom_clients = self.display.intern_atom('_NET_CLIENT_LIST')
+        self.window = None
+        self.title: Optional[str] = None
+        self.events = 0  # Events processed (for stats)
+        self.root.change_attributes(event_mask=X.PropertyChangeMask)
+        self.display.flush()
+
+    def fileno(self) -> int:
+        return self.display.fileno()
+
+    def _top_level_windows(self):
+        """Managed windows from the window manager, or the root's children without one"""
+        clients = self.root.get_full_property(self._atom_clients, Xatom.WINDOW)
+        if clients is not None:
+            return [self.display.create_resource_object('window', wid) for wid in clients.value]
+        return self.root.query_tree().children
+
+    def _window_pid(self, window) -> Optional[int]:
+        prop = window.get_full_property(self._atom_pid, Xatom.CARDINAL)
+        return int(prop.value[0]) if prop is not None and len(prop.value) else None
+
+    def _read_title(self, window) -> Optional[str]:
+        prop = window.get_full_property(self._atom_name, self._atom_utf8)
+        if prop is not None and prop.value:
+            value = prop.value
+            return value.decode('utf-8', 'replace') if isinstance(value, bytes) else str(value)
+        name = window.get_wm_name()  # Legacy WM_NAME
+        if isinstance(name, bytes):
+            name = name.decode('latin-1')
+        return name or None
+
+    def find_window(self) -> bool:
+        """Locate a titled window owned by a Spotify PID and subscribe to its property changes"""
+        pids = set(self.get_pids())
+        if not pids:
+            return False
+        try:
+            for window in self._top_level_windows():
+                if self._window_pid(window) not in pids:
+                    continue
+                title = self._read_title(window)
+                if not title:
+                    continue  # Helper/unmapped windows without a title
+                window.change_attributes(event_mask=X.PropertyChangeMask | X.StructureNotifyMask)
+                self.display.flush()
+                self.window, self.title = window, title
+                logger.debug(f"X11 watcher attached to window 0x{window.id:x}")
+                return True
+        except XError as e:
+            logger.debug(f"X11 window lookup failed: {e}")
+        return False
+
+    def pump(self):
+        """Apply all queued X events without blocking"""
+        while self.display.pending_events():
+            event = self.display.next_event()
+            self.events += 1
+            if self.window is not None and getattr(event, 'window', None) == self.window:
+                if event.type == X.PropertyNotify and event.atom in (self._atom_name, Xatom.WM_NAME):
+                    try:
+                        self.title = self._read_title(self.window)
+                    except XError:
+                        self.window, self.title = None, None
+                elif event.type == X.DestroyNotify:
+                    self.window, self.title = None, None
+            elif self.window is None and event.type == X.PropertyNotify and event.atom == self._atom_clients:
+                self.find_window()  # The window manager listed a new window
+
+    def wait(self, timeout: float) -> bool:
+        """Block up to `timeout` seconds for X events, then apply them; True if any arrived"""
+        before = self.events
+        if not self.display.pending_events():
+            select.select([self.fileno()], [], [], timeout)
+        self.pump()
+        return self.events != before
+
+    def get_window(self) -> Optional[X11SpotifyWindow]:
+        """The watched window, attaching to one first if needed"""
+        self.pump()
+        if self.window is None and not self.find_window():
+            return None
+        return X11SpotifyWindow(self, self.window.id)
+
+    def close(self):
+        self.display.close()
+
+def run_selftest() -> bool:
+    """Create a dummy window owned by this PID, retitle it and check the watcher follows"""
+    try:
+        owner = display.Display()
+    except DisplayError as e:
+        print(f"❌ No X display ({e}) - run it under an X server, e.g. xvfb-run")
+        return False
+    window = owner.screen().root.create_window(0, 0, 100, 100, 0, owner.screen().root_depth)
+    window.change_property(owner.intern_atom('_NET_WM_PID'), Xatom.CARDINAL, 32, [os.getpid()])
+    utf8 = owner.intern_atom('UTF8_STRING')
+    net_wm_name = owner.intern_atom('_NET_WM_NAME')
+    window.change_property(net_wm_name, utf8, 8, "Artist - Song".encode('utf-8'))
+    window.map()
+    owner.sync()
+
+    watcher = X11TitleWatcher(lambda: [os.getpid()])
+    spotify_window = watcher.get_window()
+    ok = spotify_window is not None and spotify_window.title == "Artist - Song"
+    print(f"{'✅' if ok else '❌'} attach: {spotify_window.title if spotify_window else None!r}")
+
+    for title in ["Advertisement", "Spotify Free", "Другой исполнитель – Песня"]:
+        window.change_property(net_wm_name, utf8, 8, title.encode('utf-8'))
+        owner.sync()
+        watcher.wait(1.0)
+        passed = spotify_window.title == title
+        ok = ok and passed
+        print(f"{'✅' if passed else '❌'} retitle via PropertyNotify: {spotify_window.title!r}")
+
+    window.destroy()
+    owner.sync()
+    watcher.wait(1.0)
+    passed = watcher.window is None
+    ok = ok and passed
+    print(f"{'✅' if passed else '❌'} window destroyed -> detached")
+    watcher.close()
+    owner.close()
+    return ok
+
+if __name__ == "__main__":
+    if '--selftest' not in sys.argv:
+        print(__doc__)
+        sys.exit(0)
+    if not XLIB_AVAILABLE:
+        print("❌ python-xlib is not installed")
+        sys.exit(1)
+    sys.exit(0 if run_selftest() else 1)